@@ -0,0 +1,103 @@
+"""Per-request overhead of the hot-path helpers, before and after precomputation.
+
+Times, per call:
+
+- prompt: rereading ``test_case_prompt.txt`` vs the in-memory ``PromptTemplate``
+- issue_key: ``re.search`` with pattern strings vs the precompiled patterns
+- auth_headers: rebuilding the Basic-auth header vs the per-token memo
+- cache_key: hashing the prompt template on every lookup vs once per template
+
+and the cold import time of ``main`` in a fresh interpreter, checking that
+the Gemini SDK and ``requests`` are not imported until used.
+
+Run from the backend directory:
+    python benchmarks/bench_hot_path.py --iterations 20000
+"""
+import argparse
+import base64
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import timeit
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import main as backend  # noqa: E402
+from jira_client import JiraClient  # noqa: E402
+from suite_cache import SuiteCache, content_hash  # noqa: E402
+
+URL = "https://yourcompany.atlassian.net/browse/PROJECT-1234?focusedCommentId=10"
+LEGACY_PATTERNS = [r'/browse/([A-Z]+-\d+)', r'/issues/([A-Z]+-\d+)', r'/issue/([A-Z]+-\d+)', r'([A-Z]+-\d+)']
+
+
+def legacy_load_prompt() -> str:
+    with open(os.path.join(BACKEND_DIR, 'test_case_prompt.txt'), 'r', encoding='utf-8') as file:
+        return file.read()
+
+
+def legacy_issue_key(url: str):
+    for pattern in LEGACY_PATTERNS:
+        match = re.search(pattern, url)
+        if match:
+            return match.group(1)
+    return None
+
+
+def legacy_auth_headers(email: str, auth_token: str):
+    headers = {'Accept': 'application/json', 'Content-Type': 'application/json'}
+    encoded_credentials = base64.b64encode(f"{email}:{auth_token}".encode()).decode()
+    headers['Authorization'] = f'Basic {encoded_credentials}'
+    return headers
+
+
+def per_call_us(function, iterations: int) -> float:
+    return min(timeit.repeat(function, number=iterations, repeat=3)) / iterations * 1e6
+
+
+def cold_import() -> str:
+    script = (
+        "import sys, time; start = time.perf_counter(); import main; "
+        "print(f'{(time.perf_counter() - start) * 1000:.0f}ms', "
+        "'google.generativeai' in sys.modules, 'requests' in sys.modules)"
+    )
+    return subprocess.run([sys.executable, "-c", script], cwd=BACKEND_DIR, capture_output=True, text=True).stdout.split()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    client = JiraClient(email="user@example.com")
+    template = backend.TEST_CASE_PROMPT
+    template.load()
+    with tempfile.TemporaryDirectory() as directory:
+        cache = SuiteCache(os.path.join(directory, "bench.db"))
+        description = "As a user I want to reset my password. " * 50
+        cases = [
+            ("prompt", legacy_load_prompt, lambda: template.text),
+            ("issue_key", lambda: legacy_issue_key(URL), lambda: backend.extract_issue_key_from_url(URL)),
+            ("auth_headers", lambda: legacy_auth_headers("user@example.com", "token"), lambda: client.auth_headers("token")),
+            (
+                "cache_key",
+                lambda: content_hash(content_hash(template.text), "model", description),
+                lambda: cache.make_key(template.text, "model", description),
+            ),
+        ]
+        print(f"{'helper':>14} {'before':>10} {'after':>10} {'speedup':>8}")
+        for name, before, after in cases:
+            assert name != "issue_key" or before() == after()
+            before_us = per_call_us(before, args.iterations)
+            after_us = per_call_us(after, args.iterations)
+            print(f"{name:>14} {before_us:>8.2f}us {after_us:>8.2f}us {before_us / after_us:>7.1f}x")
+        cache.close()
+
+    elapsed, genai_loaded, requests_loaded = cold_import()
+    print(f"\ncold import of main: {elapsed}; google.generativeai imported: {genai_loaded}; requests imported: {requests_loaded}")
+
+
+if __name__ == "__main__":
+    main()
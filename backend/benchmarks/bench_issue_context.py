@@ -0,0 +1,112 @@
+"""Compare per-issue full fetches with the field-projected bulk context fetch.
+
+Starts the stub Jira in-process with issues that have subtasks and linked
+issues and full payloads padded with comments, then builds the requirement
+context for one story two ways:
+
+- per_issue: fetch the story with every field, then each related issue the
+  same way, one request after another
+- projected: ``load_jira_issue_details`` with ``fields=`` followed by
+  ``load_requirement_context`` (one paginated search for the related issues)
+
+and reports Jira round trips, response bytes and elapsed time.
+
+Run from the backend directory:
+    python benchmarks/bench_issue_context.py --related-issues 20 --extra-field-bytes 30000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import uvicorn
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, "benchmarks"))
+
+workdir = tempfile.mkdtemp(prefix="bench_issue_context_")
+os.environ.update({
+    "JIRA_EMAIL": "bench@example.com",
+    "JIRA_API_TOKEN": "stub",
+    "SUITE_CACHE_PATH": os.path.join(workdir, "suite_cache.db"),
+    "JOB_STORE_PATH": os.path.join(workdir, "jobs.db"),
+    # Measure round trips, not the client-side rate limit
+    "JIRA_RATE_LIMIT_PER_SECOND": "10000",
+    "JIRA_RATE_LIMIT_BURST": "10000",
+})
+
+import main as backend  # noqa: E402
+from stub_jira import create_app, related_keys  # noqa: E402
+
+
+def start_stub(port: int, **options) -> uvicorn.Server:
+    """Start the stub Jira server on a background thread"""
+    config = uvicorn.Config(create_app(**options), host="127.0.0.1", port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    server.app_state = config.app.state
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def per_issue(base_url: str, issue_key: str, related_issues: int) -> int:
+    """Fetch the story and each related issue with every field, sequentially"""
+    keys = [issue_key, *sum(related_keys(issue_key, related_issues), [])]
+    for key in keys:
+        response = await backend.jira_client.get(f"{base_url}/rest/api/2/issue/{key}", backend.JIRA_API_TOKEN)
+        response.raise_for_status()
+    return len(keys)
+
+
+async def projected(base_url: str, issue_key: str, related_issues: int) -> int:
+    """Fetch the story with the detail fields, then its related issues in one search"""
+    details = await backend.load_jira_issue_details(issue_key, base_url, backend.JIRA_API_TOKEN)
+    context = await backend.load_requirement_context(issue_key, details, base_url, backend.JIRA_API_TOKEN)
+    if 'error' in context:
+        raise RuntimeError(context['error'])
+    return context['description'].count('\n## ') + 1
+
+
+async def run(args, base_url: str, state) -> None:
+    async with backend.lifespan(backend.app):
+        print(f"{'approach':>10} {'issues':>7} {'requests':>9} {'bytes':>10} {'elapsed':>9}")
+        for number, (name, runner) in enumerate((("per_issue", per_issue), ("projected", projected)), start=1):
+            served, sent = state.served, state.bytes_sent
+            start = time.perf_counter()
+            issues = await runner(base_url, f"CTX-{number}", args.related_issues)
+            elapsed = time.perf_counter() - start
+            print(
+                f"{name:>10} {issues:>7} {state.served - served:>9} {state.bytes_sent - sent:>10,} "
+                f"{elapsed * 1000:>7.0f}ms"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8103)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--related-issues", type=int, default=20)
+    parser.add_argument("--extra-field-bytes", type=int, default=30000, help="comment data in a full issue payload")
+    parser.add_argument("--description-bytes", type=int, default=1000)
+    args = parser.parse_args()
+
+    server = start_stub(
+        args.port,
+        latency_ms=args.latency_ms,
+        related_issues=args.related_issues,
+        extra_field_bytes=args.extra_field_bytes,
+        description_bytes=args.description_bytes,
+    )
+    try:
+        asyncio.run(run(args, f"http://127.0.0.1:{args.port}", server.app_state))
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
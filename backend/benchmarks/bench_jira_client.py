@@ -0,0 +1,85 @@
+"""Compare blocking per-call Jira fetches with the pooled async client.
+
+Starts the stub Jira server in-process and fetches the same number of
+issues two ways:
+
+- blocking: ``requests.get`` called from coroutines, as the endpoints used
+  to do, so every call stalls the event loop and opens a new connection
+- pooled: the shared ``JiraClient`` with keep-alive and per-host limits
+
+Run from the backend directory:
+    python benchmarks/bench_jira_client.py --requests 200 --concurrency 20
+"""
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import requests
+import uvicorn
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jira_client import JiraClient  # noqa: E402
+from jira_scheduler import JiraScheduler  # noqa: E402
+from stub_jira import create_app  # noqa: E402
+
+
+def start_stub(port: int, latency_ms: float) -> uvicorn.Server:
+    """Start the stub Jira server on a background thread"""
+    config = uvicorn.Config(create_app(latency_ms), host="127.0.0.1", port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def run_blocking(base_url: str, total: int, concurrency: int) -> float:
+    """Fetch issues with a blocking client from inside coroutines"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(i: int):
+        async with semaphore:
+            requests.get(f"{base_url}/rest/api/2/issue/BENCH-{i}", timeout=10)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(fetch(i) for i in range(total)))
+    return time.perf_counter() - start
+
+
+async def run_pooled(base_url: str, total: int, concurrency: int) -> float:
+    """Fetch issues with the shared pooled async client"""
+    # No rate limit here: this compares connection handling only
+    client = JiraClient(per_host_concurrency=concurrency, scheduler=JiraScheduler(rate=1e9, burst=1e9))
+    try:
+        start = time.perf_counter()
+        await asyncio.gather(*(client.get(f"{base_url}/rest/api/2/issue/BENCH-{i}") for i in range(total)))
+        return time.perf_counter() - start
+    finally:
+        await client.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Jira client throughput benchmark")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    server = start_stub(args.port, args.latency_ms)
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        for name, runner in (("blocking", run_blocking), ("pooled", run_pooled)):
+            elapsed = asyncio.run(runner(base_url, args.requests, args.concurrency))
+            print(f"{name:>8}: {args.requests} requests in {elapsed:.2f}s ({args.requests / elapsed:.1f} req/s)")
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Backfill against a rate-limited Jira without being throttled into failure.
+
+Starts the stub Jira with a token-bucket rate limit and fetches a batch of
+issues at background priority through the shared ``JiraClient``, whose
+scheduler starts well above the stub's limit and has to adapt from the 429s
+and ``Retry-After`` headers. A trickle of interactive requests runs at the
+same time to show they overtake the queued backfill.
+
+Run from the backend directory:
+    python benchmarks/bench_jira_rate_limit.py --requests 300 --limit 20
+Exits non-zero if any request ultimately fails.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import uvicorn
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jira_client import JiraClient  # noqa: E402
+from jira_scheduler import BACKGROUND, INTERACTIVE, JiraScheduler  # noqa: E402
+from stub_jira import create_app  # noqa: E402
+
+
+def start_stub(port: int, latency_ms: float, limit: float, burst: float, advertise: bool):
+    """Start the rate-limited stub Jira server on a background thread"""
+    app = create_app(latency_ms, rate_limit=limit, rate_limit_burst=burst, advertise_rate_limit=advertise)
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, app
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+
+async def run(base_url: str, total: int, interactive: int, start_rate: float):
+    client = JiraClient(scheduler=JiraScheduler(rate=start_rate, burst=start_rate), max_retries=8)
+    latencies = {INTERACTIVE: [], BACKGROUND: []}
+    failures = 0
+
+    async def fetch(i: int, priority: int):
+        nonlocal failures
+        start = time.perf_counter()
+        response = await client.get(f"{base_url}/rest/api/2/issue/RATE-{i}", priority=priority)
+        latencies[priority].append(time.perf_counter() - start)
+        if response.status_code != 200:
+            failures += 1
+
+    async def trickle():
+        # Interactive requests arriving while the backfill is queued
+        await asyncio.sleep(0.5)
+        for i in range(interactive):
+            await fetch(100000 + i, INTERACTIVE)
+            await asyncio.sleep(0.2)
+
+    try:
+        start = time.perf_counter()
+        await asyncio.gather(trickle(), *(fetch(i, BACKGROUND) for i in range(total)))
+        elapsed = time.perf_counter() - start
+        return elapsed, latencies, failures, client.scheduler.stats()
+    finally:
+        await client.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8101)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--interactive", type=int, default=10)
+    parser.add_argument("--limit", type=float, default=20, help="stub requests per second")
+    parser.add_argument("--burst", type=float, default=10)
+    parser.add_argument("--start-rate", type=float, default=100, help="client's initial requests per second")
+    parser.add_argument("--advertise", action="store_true", help="stub sends X-RateLimit-FillRate headers")
+    args = parser.parse_args()
+
+    server, app = start_stub(args.port, args.latency_ms, args.limit, args.burst, args.advertise)
+    try:
+        elapsed, latencies, failures, stats = asyncio.run(
+            run(f"http://127.0.0.1:{args.port}", args.requests, args.interactive, args.start_rate)
+        )
+    finally:
+        server.should_exit = True
+
+    total = args.requests + args.interactive
+    print(f"{total} requests in {elapsed:.2f}s: {total / elapsed:.1f} req/s against a {args.limit:g} req/s limit")
+    print(f"stub served {app.state.served}, answered 429 {app.state.throttled} times; failed requests: {failures}")
+    for priority, name in ((INTERACTIVE, "interactive"), (BACKGROUND, "background")):
+        samples = latencies[priority]
+        print(f"{name:>11}: p50={percentile(samples, 0.5):.2f}s p95={percentile(samples, 0.95):.2f}s n={len(samples)}")
+    print(f"scheduler: {stats}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Check and time test suite extraction from raw model output.
+
+Runs every sample in ``benchmarks/corpus`` (clean, fenced, truncated and
+otherwise malformed Gemini responses) through ``extract_test_suite`` and
+compares the number of recovered test cases with ``corpus/expected.json``.
+An expected value of ``"error"`` means extraction must fail cleanly.
+
+It then times the extractor on large synthetic responses, both complete
+and truncated, to show that parsing stays linear in the response size.
+
+Run from the backend directory:
+    python benchmarks/bench_json_extract.py --cases 2000
+Exits non-zero if any corpus sample does not match its expectation.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from suite_parser import SuiteExtractionError, extract_test_suite  # noqa: E402
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+
+
+def check_corpus() -> int:
+    """Run the corpus and return the number of mismatches"""
+    with open(os.path.join(CORPUS_DIR, "expected.json")) as f:
+        expected = json.load(f)
+
+    failures = 0
+    for name, want in sorted(expected.items()):
+        with open(os.path.join(CORPUS_DIR, name)) as f:
+            text = f.read()
+        try:
+            got = len(extract_test_suite(text)["test_suite"]["test_cases"])
+        except SuiteExtractionError:
+            got = "error"
+        status = "ok" if got == want else "FAIL"
+        failures += status != "ok"
+        print(f"{status:4} {name:45} expected={want} got={got}")
+    return failures
+
+
+def synthetic_response(cases: int) -> str:
+    """Build a fenced response with braces and escaped quotes inside strings"""
+    test_cases = [
+        {
+            "test_case_id": f"TC_{i:03d}",
+            "title": f"Verify \"quoted\" {{payload}} handling {i}",
+            "description": "Send {\"id\": 1} and check the } closing brace is kept",
+            "preconditions": ["Service is running"],
+            "test_steps": [
+                {"step_number": 1, "step_description": "POST the payload", "expected_result": "201 Created"},
+                {"step_number": 2, "step_description": "GET it back", "expected_result": "Same payload"},
+            ],
+            "test_data": {"input_data": "C:\\data\\input.json", "expected_output": "{}"},
+            "priority": "High",
+            "test_type": "Functional",
+        }
+        for i in range(1, cases + 1)
+    ]
+    document = {"test_suite": {"suite_name": "Synthetic", "total_test_cases": cases, "test_cases": test_cases}}
+    return "Here is the suite:\n```json\n" + json.dumps(document, indent=2) + "\n```\n"
+
+
+def time_extraction(label: str, text: str, repeat: int) -> None:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        recovered = len(extract_test_suite(text)["test_suite"]["test_cases"])
+    elapsed = (time.perf_counter() - start) / repeat
+    print(
+        f"{label:10} size={len(text) / 1024:8.1f} KiB  cases={recovered:5}  "
+        f"time={elapsed * 1000:8.2f} ms  throughput={len(text) / elapsed / 1024 / 1024:6.1f} MiB/s"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", type=int, default=2000, help="test cases in the largest synthetic response")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    # Recovery warnings are expected for the malformed samples
+    logging.basicConfig(level=logging.ERROR)
+
+    failures = check_corpus()
+    print()
+
+    for cases in (args.cases // 20, args.cases // 4, args.cases):
+        text = synthetic_response(max(cases, 1))
+        time_extraction("complete", text, args.repeat)
+        time_extraction("truncated", text[: int(len(text) * 0.9)], args.repeat)
+
+    if failures:
+        print(f"\n{failures} corpus sample(s) did not match expectations")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
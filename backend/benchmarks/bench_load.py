@@ -0,0 +1,295 @@
+"""Load test the backend end to end against stub Jira and model servers.
+
+Starts the stub Jira (``stub_jira.py``), the stub model (``stub_model.py``)
+and the backend as separate processes, with the backend pointed at the
+stubs, then drives each scenario at increasing concurrency:
+
+- health: ``GET /health``
+- parse: ``POST /parse`` for a new issue each time (Jira fetch)
+- generate: ``POST /generate-test-cases`` for a new issue each time (Jira + model)
+- generate_cached: ``POST /generate-test-cases`` for one issue (suite cache hit)
+- generate_stream: ``POST /generate-test-cases/stream`` for a new issue, read to the end
+
+Each level reports p50/p95/p99 latency, requests per second, status codes
+and the backend's resident memory (all worker processes together). Results
+are written as JSON so runs can be compared across versions with
+``--baseline``; compare ``--workers 1`` with ``--workers N`` to check how
+throughput scales with cores.
+
+Run from the backend directory:
+    python benchmarks/bench_load.py --concurrency 1,4,16 --output load.json
+    python benchmarks/bench_load.py --baseline load.json --output load-new.json
+    python benchmarks/bench_load.py --workers 4 --baseline load.json --output load-4.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCHMARKS_DIR)
+
+SCENARIOS = ("health", "parse", "generate", "generate_cached", "generate_stream")
+
+_issue_numbers = itertools.count(1)
+
+
+def start_process(args: List[str], port: int, env: Optional[Dict[str, str]] = None) -> subprocess.Popen:
+    """Launch a server process and wait until it answers HTTP on ``port``"""
+    process = subprocess.Popen([sys.executable, *args], cwd=BACKEND_DIR, env={**os.environ, **(env or {})})
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{args[0]} exited with status {process.returncode}")
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/openapi.json", timeout=1)
+            return process
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"{args[0]} did not start within 30s")
+
+
+def rss_mb(pid: int) -> Optional[float]:
+    """Resident memory of a process and its children in MB (Linux /proc), or None elsewhere"""
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            kb = next(int(line.split()[1]) for line in status if line.startswith("VmRSS:"))
+        with open(f"/proc/{pid}/task/{pid}/children") as children:
+            child_pids = [int(child) for child in children.read().split()]
+    except (OSError, StopIteration):
+        return None
+    return round(kb / 1024 + sum(rss_mb(child) or 0.0 for child in child_pids), 1)
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def send(client: httpx.AsyncClient, scenario: str, jira_url: str) -> int:
+    """Issue one request for a scenario and return its status code"""
+    if scenario == "health":
+        return (await client.get("/health")).status_code
+    if scenario == "generate_cached":
+        body = {"url": f"{jira_url}/browse/LOAD-0"}
+    else:
+        body = {"url": f"{jira_url}/browse/LOAD-{next(_issue_numbers)}"}
+    if scenario == "parse":
+        response = await client.post("/parse", json=body)
+    elif scenario == "generate_stream":
+        async with client.stream("POST", "/generate-test-cases/stream", json=body) as response:
+            async for _ in response.aiter_bytes():
+                pass
+        return response.status_code
+    else:
+        response = await client.post("/generate-test-cases", json=body)
+    # Endpoints report Jira and model failures in the body with a 200
+    if response.status_code == 200 and response.json().get("error"):
+        return 599
+    return response.status_code
+
+
+async def run_level(
+    client: httpx.AsyncClient, scenario: str, concurrency: int, total: int, jira_url: str, pid: int
+) -> Dict[str, Any]:
+    """Send ``total`` requests for one scenario with ``concurrency`` in flight"""
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    remaining = iter(range(total))
+    memory = [rss_mb(pid)]
+
+    async def worker():
+        for _ in remaining:
+            start = time.perf_counter()
+            try:
+                status = await send(client, scenario, jira_url)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - start)
+            statuses[str(status)] += 1
+
+    async def sample_memory():
+        while True:
+            await asyncio.sleep(0.1)
+            memory.append(rss_mb(pid))
+
+    sampler = asyncio.create_task(sample_memory())
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    sampler.cancel()
+    memory.append(rss_mb(pid))
+
+    readings = [reading for reading in memory if reading is not None]
+    return {
+        "scenario": scenario,
+        "concurrency": concurrency,
+        "requests": total,
+        "ok": statuses.get("200", 0),
+        "errors": total - statuses.get("200", 0),
+        "status_codes": dict(statuses),
+        "duration_seconds": round(elapsed, 3),
+        "rps": round(total / elapsed, 2),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.50) * 1000, 1),
+            "p95": round(percentile(latencies, 0.95) * 1000, 1),
+            "p99": round(percentile(latencies, 0.99) * 1000, 1),
+            "max": round(max(latencies) * 1000, 1),
+            "mean": round(sum(latencies) / len(latencies) * 1000, 1),
+        },
+        "rss_mb": {
+            "start": readings[0] if readings else None,
+            "peak": max(readings) if readings else None,
+            "end": readings[-1] if readings else None,
+        },
+    }
+
+
+async def run(args, backend_url: str, jira_url: str, pid: int) -> List[Dict[str, Any]]:
+    results = []
+    limits = httpx.Limits(max_connections=max(args.concurrency) * 2)
+    async with httpx.AsyncClient(base_url=backend_url, timeout=args.timeout, limits=limits) as client:
+        # Warm the suite cache for generate_cached
+        await client.post("/generate-test-cases", json={"url": f"{jira_url}/browse/LOAD-0"})
+        for scenario in args.scenarios:
+            for concurrency in args.concurrency:
+                total = max(args.min_requests, concurrency * args.rounds)
+                result = await run_level(client, scenario, concurrency, total, jira_url, pid)
+                latency = result["latency_ms"]
+                print(
+                    f"{scenario:>16} c={concurrency:<4} {result['rps']:>8.1f} req/s  "
+                    f"p50={latency['p50']:>8.1f}ms p95={latency['p95']:>8.1f}ms p99={latency['p99']:>8.1f}ms  "
+                    f"errors={result['errors']:<4} rss={result['rss_mb']['peak']}MB"
+                )
+                results.append(result)
+    return results
+
+
+def compare(results: List[Dict[str, Any]], baseline_path: str) -> None:
+    """Print p95 latency and throughput changes against an earlier results file"""
+    with open(baseline_path) as f:
+        baseline = {(r["scenario"], r["concurrency"]): r for r in json.load(f)["results"]}
+    print(f"\nCompared with {baseline_path}:")
+    for result in results:
+        before = baseline.get((result["scenario"], result["concurrency"]))
+        if before is None:
+            continue
+        p95_change = (result["latency_ms"]["p95"] / before["latency_ms"]["p95"] - 1) * 100 if before["latency_ms"]["p95"] else 0.0
+        rps_change = (result["rps"] / before["rps"] - 1) * 100 if before["rps"] else 0.0
+        print(f"{result['scenario']:>16} c={result['concurrency']:<4} p95 {p95_change:+6.1f}%  rps {rps_change:+6.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated subset of " + ", ".join(SCENARIOS))
+    parser.add_argument("--concurrency", default="1,4,16,32", help="comma-separated concurrency levels")
+    parser.add_argument("--rounds", type=int, default=5, help="requests per worker at each level")
+    parser.add_argument("--min-requests", type=int, default=20)
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--backend-port", type=int, default=8300)
+    parser.add_argument("--jira-port", type=int, default=8301)
+    parser.add_argument("--model-port", type=int, default=8302)
+    parser.add_argument("--jira-latency-ms", type=float, default=50)
+    parser.add_argument("--jira-error-rate", type=float, default=0.0)
+    parser.add_argument("--description-bytes", type=int, default=2000)
+    parser.add_argument("--model-latency-ms", type=float, default=800)
+    parser.add_argument("--model-jitter-ms", type=float, default=200)
+    parser.add_argument("--model-error-rate", type=float, default=0.0)
+    parser.add_argument("--test-cases", type=int, default=10, help="test cases per stub model response")
+    parser.add_argument("--workers", type=int, default=1, help="backend worker processes")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="extra backend environment")
+    parser.add_argument("--output", default=None, help="results file (default: load-<timestamp>.json)")
+    parser.add_argument("--baseline", default=None, help="earlier results file to compare against")
+    args = parser.parse_args()
+    args.scenarios = [scenario for scenario in args.scenarios.split(",") if scenario]
+    args.concurrency = [int(level) for level in args.concurrency.split(",") if level]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    processes = [
+        start_process([
+            os.path.join(BENCHMARKS_DIR, "stub_jira.py"), "--port", str(args.jira_port),
+            "--latency-ms", str(args.jira_latency_ms), "--error-rate", str(args.jira_error_rate),
+            "--description-bytes", str(args.description_bytes),
+        ], args.jira_port),
+        start_process([
+            os.path.join(BENCHMARKS_DIR, "stub_model.py"), "--port", str(args.model_port),
+            "--latency-ms", str(args.model_latency_ms), "--jitter-ms", str(args.model_jitter_ms),
+            "--error-rate", str(args.model_error_rate), "--test-cases", str(args.test_cases),
+        ], args.model_port),
+    ]
+    workdir = tempfile.mkdtemp(prefix="bench_load_")
+    backend_env = {
+        "JIRA_EMAIL": "load@example.com",
+        "JIRA_API_TOKEN": "stub",
+        "MODEL_BACKENDS": "openai:stub",
+        "OPENAI_API_KEY": "stub",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{args.model_port}/v1",
+        "SUITE_CACHE_PATH": os.path.join(workdir, "suite_cache.db"),
+        "JOB_STORE_PATH": os.path.join(workdir, "jobs.db"),
+        # Measure the backend, not the client-side Jira rate limit
+        "JIRA_RATE_LIMIT_PER_SECOND": "10000",
+        "JIRA_RATE_LIMIT_BURST": "10000",
+        # Shared by the workers when --workers > 1
+        "JIRA_ISSUE_CACHE_PATH": os.path.join(workdir, "jira_issue_cache.db"),
+        "JIRA_RATE_LIMIT_STATE_PATH": os.path.join(workdir, "jira_rate_limits.db"),
+    }
+    backend_env.update(item.split("=", 1) for item in args.env)
+    try:
+        backend = start_process(
+            [
+                "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(args.backend_port),
+                "--workers", str(args.workers), "--log-level", "warning",
+            ],
+            args.backend_port, backend_env,
+        )
+        processes.append(backend)
+        results = asyncio.run(run(args, f"http://127.0.0.1:{args.backend_port}", f"http://127.0.0.1:{args.jira_port}", backend.pid))
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait(timeout=30)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+            "backend_env": backend_env,
+        },
+        "results": results,
+    }
+    output = args.output or f"load-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+    if args.baseline:
+        compare(results, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
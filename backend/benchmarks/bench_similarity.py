@@ -0,0 +1,130 @@
+"""Similarity index build, load and lookup cost at 100k stored suites.
+
+Generates synthetic user stories from templates and a random vocabulary,
+indexes them in a temporary SQLite file, then reports:
+
+- build: MinHash signatures computed and stored (what ``python
+  similarity_index.py`` does offline for an existing suite cache)
+- load: a fresh worker reading every signature into memory
+- lookup latency (p50/p99) for near-duplicates of indexed stories and for
+  unrelated stories, next to a brute-force scan of every signature
+- recall: how often the edited story's source is the best match above the
+  adapt threshold, and how many unrelated stories match anything
+
+Run from the backend directory:
+    python benchmarks/bench_similarity.py --suites 100000 --queries 500
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from similarity_index import SIMILARITY_ADAPT_THRESHOLD, SimilarityIndex, minhash  # noqa: E402
+
+ROLES = ["user", "admin", "guest", "support agent", "manager", "customer", "auditor", "developer"]
+PLATFORMS = ["iOS", "Android", "web", "desktop", "tablet", "kiosk"]
+TEMPLATES = [
+    "As a {role} on {platform} I want to {a} {b} so that I can {c} {d}.",
+    "Acceptance criteria: the {a} {b} is shown within {n} seconds and {c} {d} is logged.",
+    "When the {a} fails the {role} sees an error about {b} and can retry {c}.",
+    "The {a} {b} must respect the {c} limit of {n} items per {d}.",
+]
+
+
+def story(rng: random.Random, vocabulary, sentences: int) -> str:
+    lines = []
+    for _ in range(sentences):
+        words = rng.sample(vocabulary, 4)
+        lines.append(rng.choice(TEMPLATES).format(
+            role=rng.choice(ROLES), platform=rng.choice(PLATFORMS), n=rng.randint(1, 500),
+            a=words[0], b=words[1], c=words[2], d=words[3],
+        ))
+    return "\n\n".join(lines)
+
+
+def edit(rng: random.Random, vocabulary, description: str, words: int) -> str:
+    """Replace a few words, as when a story is cloned for another platform or field"""
+    tokens = description.split(" ")
+    for position in rng.sample(range(len(tokens)), words):
+        tokens[position] = rng.choice(vocabulary)
+    return " ".join(tokens)
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    return statistics.median(ordered), ordered[int(len(ordered) * 0.99) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--suites", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--sentences", type=int, default=8)
+    parser.add_argument("--edited-words", type=int, default=3, help="words changed in each near-duplicate")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    vocabulary = [f"w{i}" for i in range(20000)]
+    descriptions = [story(rng, vocabulary, args.sentences) for _ in range(args.suites)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "similarity.db")
+        start = time.perf_counter()
+        SimilarityIndex(path).add_many((f"bench/S-{i}", text) for i, text in enumerate(descriptions))
+        build = time.perf_counter() - start
+
+        index = SimilarityIndex(path)
+        start = time.perf_counter()
+        index.refresh()
+        load = time.perf_counter() - start
+        print(f"suites: {len(index):,}  build: {build:.1f}s  load: {load:.2f}s  "
+              f"memory: {index.stats()['memory_bytes'] / 2**20:.0f} MiB")
+
+        sources = rng.sample(range(args.suites), args.queries)
+        near = [edit(rng, vocabulary, descriptions[i], args.edited_words) for i in sources]
+        unrelated = [story(rng, vocabulary, args.sentences) for _ in range(args.queries)]
+
+        found, near_ms = 0, []
+        for source, text in zip(sources, near):
+            start = time.perf_counter()
+            matches = index.query(text)
+            near_ms.append((time.perf_counter() - start) * 1000)
+            if matches and matches[0][0] == f"bench/S-{source}" and matches[0][1] >= SIMILARITY_ADAPT_THRESHOLD:
+                found += 1
+
+        false_matches, unrelated_ms = 0, []
+        for text in unrelated:
+            start = time.perf_counter()
+            matches = index.query(text)
+            unrelated_ms.append((time.perf_counter() - start) * 1000)
+            false_matches += bool(matches and matches[0][1] >= SIMILARITY_ADAPT_THRESHOLD)
+
+        # Without banding: compare the query against every stored signature
+        signatures = index._signatures[:len(index)]
+        scan_ms = []
+        for text in near[:100]:
+            start = time.perf_counter()
+            signature = minhash(text)
+            similarities = (signatures == signature).mean(axis=1)
+            int(np.argmax(similarities))
+            scan_ms.append((time.perf_counter() - start) * 1000)
+
+        print(f"{'lookup':>18} {'p50':>8} {'p99':>8}")
+        for name, samples in (("near_duplicate", near_ms), ("unrelated", unrelated_ms), ("brute_force_scan", scan_ms)):
+            p50, p99 = percentiles(samples)
+            print(f"{name:>18} {p50:>6.2f}ms {p99:>6.2f}ms")
+        print(f"\nnear-duplicates matched to their source: {found}/{args.queries}; "
+              f"unrelated stories above {SIMILARITY_ADAPT_THRESHOLD}: {false_matches}/{args.queries}")
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
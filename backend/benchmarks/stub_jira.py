@@ -0,0 +1,231 @@
+"""Local stub of the Jira REST API used by the benchmarks.
+
+``error_rate`` answers that share of issue fetches with a 503 and
+``description_bytes`` pads issue descriptions to emulate large stories.
+Issues honour ``fields=``; without it ``extra_field_bytes`` of comments and
+custom fields are added, like a full Jira payload. ``related_issues`` gives
+each fetched issue that many subtasks and linked issues, which the search
+endpoint returns for ``parent = KEY`` and ``key in (...)`` queries.
+With ``rate_limit`` set, the stub enforces a token bucket per server and
+answers excess requests with 429, ``Retry-After`` and Jira Cloud's
+``X-RateLimit-*`` headers, so client backoff can be tested locally.
+
+Run standalone with:
+    python benchmarks/stub_jira.py --port 8100 --latency-ms 50 --rate-limit 20
+"""
+import argparse
+import asyncio
+import math
+import os
+import random
+import re
+import time
+from typing import List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+import uvicorn
+
+STUB_LATENCY_MS = float(os.getenv("STUB_JIRA_LATENCY_MS", "50"))
+STUB_SEARCH_TOTAL = int(os.getenv("STUB_JIRA_SEARCH_TOTAL", "250"))
+
+STUB_DESCRIPTION = "As a user I want to log in with my email and password so that I can access my account."
+
+
+def build_description(size: int = 0) -> str:
+    """A story description of at least ``size`` bytes, split into acceptance criteria"""
+    description = STUB_DESCRIPTION
+    criterion = 0
+    while len(description) < size:
+        criterion += 1
+        description += f"\n\nh2. Acceptance criterion {criterion}\nGiven a registered user, when they sign in from device {criterion}, then the session is created and audited."
+    return description
+
+
+def related_keys(issue_key: str, related_issues: int) -> List[List[str]]:
+    """The [subtask keys, linked issue keys] of an issue with ``related_issues`` relations"""
+    project, number = issue_key.rsplit("-", 1)
+    base = int(number) * 1000
+    subtasks = (related_issues + 1) // 2
+    return [
+        [f"{project}-{base + i}" for i in range(1, subtasks + 1)],
+        [f"{project}-{base + 500 + i}" for i in range(1, related_issues - subtasks + 1)],
+    ]
+
+
+def build_issue(issue_key: str, description: str = STUB_DESCRIPTION, related_issues: int = 0, extra_field_bytes: int = 0) -> dict:
+    """Build a Jira issue payload"""
+    subtasks, linked = related_keys(issue_key, related_issues)
+    comments = [
+        {"author": {"displayName": "Stub Commenter"}, "body": "Discussed in refinement. " * 20, "created": "2024-01-02T10:00:00.000+0000"}
+        for _ in range(extra_field_bytes // 600)
+    ]
+    return {
+        "key": issue_key,
+        "fields": {
+            "summary": f"Stub issue {issue_key}",
+            # Unique per issue so generated suites are not shared through the suite cache
+            "description": f"{description}\n\nReference: {issue_key}",
+            "status": {"name": "In Progress"},
+            "assignee": {"displayName": "Stub Assignee"},
+            "reporter": {"displayName": "Stub Reporter"},
+            "priority": {"name": "Medium"},
+            "issuetype": {"name": "Story"},
+            "created": "2024-01-01T10:00:00.000+0000",
+            "updated": "2024-01-02T10:00:00.000+0000",
+            "subtasks": [
+                {"key": key, "fields": {"summary": f"Stub issue {key}", "status": {"name": "To Do"}}} for key in subtasks
+            ],
+            "issuelinks": [
+                {"type": {"name": "Blocks", "inward": "is blocked by", "outward": "blocks"},
+                 "outwardIssue": {"key": key, "fields": {"summary": f"Stub issue {key}", "status": {"name": "To Do"}}}}
+                for key in linked
+            ],
+            "comment": {"comments": comments, "total": len(comments)},
+            "worklog": {"worklogs": [], "total": 0},
+            "attachment": [],
+        },
+    }
+
+
+def project_fields(issue: dict, fields: str) -> dict:
+    """Keep only the requested fields, as Jira does for ``fields=``"""
+    if not fields or fields in ("*all", "*navigable"):
+        return issue
+    wanted = set(fields.split(","))
+    return {**issue, "fields": {name: value for name, value in issue["fields"].items() if name in wanted}}
+
+
+def search_keys(jql: str, related_issues: int, search_total: int) -> List[str]:
+    """Issue keys matching the ``parent = KEY`` / ``key in (...)`` queries, or a fixed listing"""
+    keys = []
+    parent = re.search(r"parent = ([A-Z]+-\d+)", jql)
+    if parent:
+        keys.extend(related_keys(parent.group(1), related_issues)[0])
+    listed = re.search(r"key in \(([^)]*)\)", jql)
+    if listed:
+        keys.extend(key.strip() for key in listed.group(1).split(","))
+    if not parent and not listed:
+        return [f"STUB-{i}" for i in range(1, search_total + 1)]
+    return sorted(set(keys))
+
+
+class StubRateLimit:
+    """Token bucket emulating Jira Cloud's per-tenant rate limiting"""
+
+    def __init__(self, rate: float, burst: float, advertise: bool):
+        self.rate = rate
+        self.burst = burst
+        self.advertise = advertise
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self) -> Optional[float]:
+        """Take a token, or return the seconds until one is available"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return None
+        return (1 - self.tokens) / self.rate
+
+    def headers(self) -> dict:
+        headers = {
+            "X-RateLimit-Limit": str(int(self.burst)),
+            "X-RateLimit-Remaining": str(int(self.tokens)),
+        }
+        if self.advertise:
+            headers["X-RateLimit-FillRate"] = str(self.rate)
+            headers["X-RateLimit-Interval-Seconds"] = "1"
+        return headers
+
+
+def create_app(
+    latency_ms: float = STUB_LATENCY_MS,
+    search_total: int = STUB_SEARCH_TOTAL,
+    rate_limit: Optional[float] = None,
+    rate_limit_burst: Optional[float] = None,
+    advertise_rate_limit: bool = False,
+    error_rate: float = 0.0,
+    description_bytes: int = 0,
+    related_issues: int = 0,
+    extra_field_bytes: int = 0,
+) -> FastAPI:
+    """Create the stub Jira application"""
+    app = FastAPI(title="Stub Jira")
+    description = build_description(description_bytes)
+    app.state.served = 0
+    app.state.throttled = 0
+    app.state.bytes_sent = 0
+    limiter = StubRateLimit(rate_limit, rate_limit_burst or rate_limit, advertise_rate_limit) if rate_limit else None
+
+    @app.middleware("http")
+    async def enforce_rate_limit(request: Request, call_next):
+        if limiter is None:
+            app.state.served += 1
+            response = await call_next(request)
+            app.state.bytes_sent += int(response.headers.get("content-length", 0))
+            return response
+        wait = limiter.take()
+        if wait is not None:
+            app.state.throttled += 1
+            return JSONResponse(
+                {"errorMessages": ["Rate limit exceeded"]},
+                status_code=429,
+                headers={"Retry-After": str(math.ceil(wait)), **limiter.headers()},
+            )
+        app.state.served += 1
+        response = await call_next(request)
+        app.state.bytes_sent += int(response.headers.get("content-length", 0))
+        response.headers.update(limiter.headers())
+        return response
+
+    @app.get("/rest/api/2/issue/{issue_key}")
+    async def get_issue(issue_key: str, fields: str = ""):
+        await asyncio.sleep(latency_ms / 1000)
+        if error_rate and random.random() < error_rate:
+            return JSONResponse({"errorMessages": ["Service unavailable"]}, status_code=503)
+        return project_fields(build_issue(issue_key, description, related_issues, extra_field_bytes), fields)
+
+    @app.get("/rest/api/2/search")
+    async def search(jql: str = "", startAt: int = 0, maxResults: int = 50, fields: str = ""):
+        await asyncio.sleep(latency_ms / 1000)
+        matches = search_keys(jql, related_issues, search_total)
+        return {
+            "startAt": startAt,
+            "maxResults": maxResults,
+            "total": len(matches),
+            "issues": [
+                project_fields(build_issue(key, description, extra_field_bytes=extra_field_bytes), fields)
+                for key in matches[startAt:startAt + maxResults]
+            ],
+        }
+
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub Jira REST API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency-ms", type=float, default=STUB_LATENCY_MS)
+    parser.add_argument("--rate-limit", type=float, default=None, help="requests per second before answering 429")
+    parser.add_argument("--rate-limit-burst", type=float, default=None)
+    parser.add_argument("--advertise-rate-limit", action="store_true", help="send X-RateLimit-FillRate headers")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of issue fetches answered with 503")
+    parser.add_argument("--description-bytes", type=int, default=0, help="pad issue descriptions to this size")
+    parser.add_argument("--related-issues", type=int, default=0, help="subtasks and linked issues per fetched issue")
+    parser.add_argument("--extra-field-bytes", type=int, default=0, help="comment data returned when fields= is not set")
+    args = parser.parse_args()
+    app = create_app(
+        args.latency_ms,
+        rate_limit=args.rate_limit,
+        rate_limit_burst=args.rate_limit_burst,
+        advertise_rate_limit=args.advertise_rate_limit,
+        error_rate=args.error_rate,
+        description_bytes=args.description_bytes,
+        related_issues=args.related_issues,
+        extra_field_bytes=args.extra_field_bytes,
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
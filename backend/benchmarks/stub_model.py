@@ -0,0 +1,83 @@
+"""Local stub of a model API used by the load benchmarks.
+
+Serves an OpenAI-compatible ``/v1/chat/completions`` endpoint, which the
+``openai:`` model backend talks to over HTTP, and answers with the same
+deterministic suites as the ``fake`` backend. ``latency_ms``/``jitter_ms``
+set the generation time, ``error_rate`` answers that share of calls with a
+Gemini-style 503 (``UNAVAILABLE``) and ``test_cases`` sets the payload size.
+
+Run standalone with:
+    python benchmarks/stub_model.py --port 8200 --latency-ms 800 --test-cases 10
+then start the backend with MODEL_BACKENDS=openai:stub, OPENAI_API_KEY=stub and
+OPENAI_BASE_URL=http://127.0.0.1:8200/v1.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+import uvicorn
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model_router import FakeBackend  # noqa: E402
+from schemas import TestSuiteUpdate  # noqa: E402
+
+STUB_MODEL_LATENCY_MS = float(os.getenv("STUB_MODEL_LATENCY_MS", "800"))
+
+# Marker of the incremental update prompt (test_case_update_prompt.txt)
+UPDATE_PROMPT_MARKER = "**What Changed in the Description:**"
+
+
+def create_app(
+    latency_ms: float = STUB_MODEL_LATENCY_MS,
+    jitter_ms: float = 0.0,
+    error_rate: float = 0.0,
+    test_cases: int = 10,
+) -> FastAPI:
+    """Create the stub model application"""
+    app = FastAPI(title="Stub model")
+    app.state.served = 0
+    app.state.failed = 0
+    suites = FakeBackend("stub", test_cases=test_cases)
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        prompt = body["messages"][-1]["content"]
+        await asyncio.sleep(max(0.0, latency_ms + random.uniform(-jitter_ms, jitter_ms)) / 1000)
+        if error_rate and random.random() < error_rate:
+            app.state.failed += 1
+            return JSONResponse(
+                {"error": {"code": 503, "message": "The model is overloaded.", "status": "UNAVAILABLE"}},
+                status_code=503,
+            )
+        app.state.served += 1
+        response_model = TestSuiteUpdate if UPDATE_PROMPT_MARKER in prompt else None
+        content = suites.response_text(prompt, response_model)
+        return {
+            "id": f"chatcmpl-{app.state.served}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        }
+
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub model API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8200)
+    parser.add_argument("--latency-ms", type=float, default=STUB_MODEL_LATENCY_MS)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of calls answered with 503")
+    parser.add_argument("--test-cases", type=int, default=10, help="test cases per generated suite")
+    args = parser.parse_args()
+    app = create_app(args.latency_ms, args.jitter_ms, args.error_rate, args.test_cases)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,103 @@
+import asyncio
+import logging
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+# LLM concurrency configuration
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))
+GEMINI_MAX_QUEUE_DEPTH = int(os.getenv("GEMINI_MAX_QUEUE_DEPTH", "32"))
+GEMINI_QUEUE_TIMEOUT_SECONDS = float(os.getenv("GEMINI_QUEUE_TIMEOUT_SECONDS", "30"))
+GEMINI_TIMEOUT_SECONDS = float(os.getenv("GEMINI_TIMEOUT_SECONDS", "90"))
+
+T = TypeVar("T")
+
+
+class GenerationRejected(Exception):
+    """Raised when a generation cannot be admitted or does not finish in time"""
+
+    def __init__(self, message: str, status_code: int, retry_after: int):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class GenerationLimiter:
+    """Bound in-flight LLM calls with a semaphore and a bounded wait queue"""
+
+    def __init__(
+        self,
+        max_concurrency: int = GEMINI_MAX_CONCURRENCY,
+        max_queue_depth: int = GEMINI_MAX_QUEUE_DEPTH,
+        queue_timeout: float = GEMINI_QUEUE_TIMEOUT_SECONDS,
+        timeout: float = GEMINI_TIMEOUT_SECONDS,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_queue_depth = max_queue_depth
+        self.queue_timeout = queue_timeout
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.in_flight = 0
+        self.waiting = 0
+        # Moving average of call duration, used to estimate Retry-After
+        self._avg_duration = 10.0
+
+    def retry_after(self) -> int:
+        """Estimate how many seconds until a queued call would be admitted"""
+        batches = (self.waiting + 1) / self.max_concurrency
+        return max(1, math.ceil(batches * self._avg_duration))
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold a generation slot, rejecting when overloaded"""
+        if self._semaphore.locked():
+            if self.waiting >= self.max_queue_depth:
+                logger.warning(f"Generation queue full ({self.waiting} waiting)")
+                raise GenerationRejected(
+                    "Too many test case generations in progress, please retry later",
+                    status_code=429,
+                    retry_after=self.retry_after(),
+                )
+
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                raise GenerationRejected(
+                    "Timed out waiting for a free generation slot",
+                    status_code=503,
+                    retry_after=self.retry_after(),
+                )
+            finally:
+                self.waiting -= 1
+        else:
+            await self._semaphore.acquire()
+
+        self.in_flight += 1
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self._avg_duration = 0.8 * self._avg_duration + 0.2 * (time.monotonic() - start)
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def timed_out(self) -> GenerationRejected:
+        """Build the error raised when a call exceeds the per-request timeout"""
+        return GenerationRejected(
+            f"Test case generation timed out after {self.timeout:.0f}s",
+            status_code=504,
+            retry_after=self.retry_after(),
+        )
+
+    async def run(self, call: Callable[[], Awaitable[T]]) -> T:
+        """Run an LLM call once a slot is free, rejecting when overloaded"""
+        async with self.slot():
+            try:
+                return await asyncio.wait_for(call(), timeout=self.timeout)
+            except asyncio.TimeoutError:
+                raise self.timed_out()
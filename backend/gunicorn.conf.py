@@ -0,0 +1,34 @@
+"""Gunicorn settings for running the backend as several uvicorn worker processes
+
+Run from the backend directory:
+    gunicorn -c gunicorn.conf.py main:app
+
+Each worker runs the full app (its own Jira connection pool, model clients
+and job workers); the caches, job queue and Jira rate-limit budgets are
+shared through SQLite files next to the code. WEB_CONCURRENCY defaults to 1.
+"""
+import os
+import sys
+
+from dotenv import load_dotenv
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BACKEND_DIR)
+load_dotenv(os.path.join(BACKEND_DIR, ".env"))
+
+from shared_state import use_shared_state  # noqa: E402
+
+use_shared_state()
+
+chdir = BACKEND_DIR
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '8000')}"
+# One worker unless asked for more: the Gemini concurrency limit, request coalescing and
+# webhook debouncing are per process, so each extra worker multiplies the model quota in use
+workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+worker_class = "uvicorn.workers.UvicornWorker"
+# Workers open their SQLite connections and clients in the app lifespan, so never preload
+preload_app = False
+# Restart a worker whose event loop stops answering the arbiter's heartbeat for this long
+timeout = int(os.getenv("GUNICORN_TIMEOUT_SECONDS", "120"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT_SECONDS", "30"))
+keepalive = 5
@@ -0,0 +1,200 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Issue cache configuration
+JIRA_ISSUE_CACHE_TTL_SECONDS = float(os.getenv("JIRA_ISSUE_CACHE_TTL_SECONDS", "3600"))
+# Opt-in window for serving entries without asking Jira; an edit can go unseen for this long (0 = always revalidate)
+JIRA_ISSUE_CACHE_FRESH_SECONDS = float(os.getenv("JIRA_ISSUE_CACHE_FRESH_SECONDS", "0"))
+JIRA_ISSUE_CACHE_MAX_ENTRIES = int(os.getenv("JIRA_ISSUE_CACHE_MAX_ENTRIES", "1000"))
+JIRA_ISSUE_CACHE_PATH = os.getenv("JIRA_ISSUE_CACHE_PATH", "")
+
+CacheKey = Tuple[str, str, str]
+
+
+def credential_identity(auth_token: Optional[str]) -> str:
+    """Identify a credential without storing the token itself"""
+    if not auth_token:
+        return "anonymous"
+    return hashlib.sha256(auth_token.encode()).hexdigest()[:16]
+
+
+def make_cache_key(base_url: str, issue_key: str, auth_token: Optional[str]) -> CacheKey:
+    """Build the cache key for an issue fetched with a given credential"""
+    return (base_url.rstrip('/'), issue_key, credential_identity(auth_token))
+
+
+@dataclass
+class CachedIssue:
+    details: Dict[str, Any]
+    etag: Optional[str]
+    updated: Optional[str]
+    stored_at: float
+    validated_at: float
+
+
+class MemoryIssueStore:
+    """In-process LRU store"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[CacheKey, CachedIssue]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: CacheKey) -> Optional[CachedIssue]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: CacheKey, entry: CachedIssue) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: CacheKey) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SqliteIssueStore:
+    """LRU store on local disk, shared by every process that opens the same file"""
+
+    def __init__(self, path: str, max_entries: int):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jira_issues (
+                cache_key TEXT PRIMARY KEY,
+                details TEXT NOT NULL,
+                etag TEXT,
+                updated TEXT,
+                stored_at REAL NOT NULL,
+                validated_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jira_issues_accessed ON jira_issues (accessed_at)")
+
+    @staticmethod
+    def _key(key: CacheKey) -> str:
+        return "|".join(key)
+
+    def get(self, key: CacheKey) -> Optional[CachedIssue]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT details, etag, updated, stored_at, validated_at FROM jira_issues WHERE cache_key = ?",
+                (self._key(key),),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE jira_issues SET accessed_at = ? WHERE cache_key = ?",
+                (time.time(), self._key(key)),
+            )
+        return CachedIssue(json.loads(row[0]), row[1], row[2], row[3], row[4])
+
+    def put(self, key: CacheKey, entry: CachedIssue) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO jira_issues VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    self._key(key), json.dumps(entry.details), entry.etag, entry.updated,
+                    entry.stored_at, entry.validated_at, time.time(),
+                ),
+            )
+            self._conn.execute(
+                """
+                DELETE FROM jira_issues WHERE cache_key IN (
+                    SELECT cache_key FROM jira_issues ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            )
+
+    def delete(self, key: CacheKey) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM jira_issues WHERE cache_key = ?", (self._key(key),))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM jira_issues").fetchone()[0]
+
+
+class IssueCache:
+    """TTL + LRU cache of Jira issue details with conditional revalidation
+
+    Entries younger than ``fresh_seconds`` are served directly. Older entries
+    are only served after the caller confirms with Jira (ETag or ``updated``
+    timestamp) that the issue has not changed; entries older than
+    ``ttl_seconds`` are dropped.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = JIRA_ISSUE_CACHE_TTL_SECONDS,
+        fresh_seconds: float = JIRA_ISSUE_CACHE_FRESH_SECONDS,
+        max_entries: int = JIRA_ISSUE_CACHE_MAX_ENTRIES,
+        path: str = JIRA_ISSUE_CACHE_PATH,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.fresh_seconds = fresh_seconds
+        self.store = SqliteIssueStore(path, max_entries) if path else MemoryIssueStore(max_entries)
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+
+    def get(self, key: CacheKey) -> Optional[CachedIssue]:
+        """Get an entry that has not outlived the TTL"""
+        entry = self.store.get(key)
+        if entry is None:
+            return None
+        if time.time() - entry.stored_at > self.ttl_seconds:
+            self.store.delete(key)
+            return None
+        return entry
+
+    def is_fresh(self, entry: CachedIssue) -> bool:
+        """Whether an entry can be served without revalidation"""
+        return time.time() - entry.validated_at < self.fresh_seconds
+
+    def put(self, key: CacheKey, details: Dict[str, Any], etag: Optional[str] = None) -> None:
+        now = time.time()
+        self.store.put(key, CachedIssue(details, etag, details.get('updated_date'), now, now))
+
+    def mark_validated(self, key: CacheKey, entry: CachedIssue) -> None:
+        """Record that Jira confirmed the entry is still current"""
+        entry.validated_at = time.time()
+        self.store.put(key, entry)
+
+    def invalidate(self, key: CacheKey) -> None:
+        self.store.delete(key)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.store),
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidations": self.revalidations,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,67 @@
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+# Most related issues (subtasks, epic children, linked issues) folded into one requirement context
+JIRA_CONTEXT_MAX_ISSUES = int(os.getenv("JIRA_CONTEXT_MAX_ISSUES", "50"))
+
+# Fields that list an issue's subtasks and links, requested alongside the detail fields
+JIRA_RELATION_FIELDS = "subtasks,issuelinks"
+
+
+def extract_related_issues(fields: Dict[str, Any]) -> List[Dict[str, str]]:
+    """Subtasks and linked issues of a Jira issue payload as [{'key', 'relation'}]"""
+    related = [
+        {'key': subtask['key'], 'relation': 'subtask'}
+        for subtask in fields.get('subtasks') or []
+        if subtask.get('key')
+    ]
+    for link in fields.get('issuelinks') or []:
+        link_type = link.get('type') or {}
+        if link.get('outwardIssue'):
+            issue, relation = link['outwardIssue'], link_type.get('outward')
+        elif link.get('inwardIssue'):
+            issue, relation = link['inwardIssue'], link_type.get('inward')
+        else:
+            continue
+        if issue.get('key'):
+            related.append({'key': issue['key'], 'relation': relation or link_type.get('name') or 'relates to'})
+    return related
+
+
+def related_issues_jql(issue_key: str, issue_type: str, related: List[Dict[str, str]]) -> Optional[str]:
+    """JQL fetching every related issue in one search, or None when there are none
+
+    ``parent =`` matches both subtasks and epic children, so epics are
+    searched even when the payload lists no subtasks or links.
+    """
+    linked = [item['key'] for item in related if item['relation'] != 'subtask']
+    clauses = []
+    if issue_type.lower() == 'epic' or len(linked) < len(related):
+        clauses.append(f"parent = {issue_key}")
+    if linked:
+        clauses.append(f"key in ({', '.join(dict.fromkeys(linked))})")
+    if not clauses:
+        return None
+    return f"{' OR '.join(clauses)} ORDER BY key"
+
+
+def build_requirement_context(
+    issue_key: str,
+    details: Dict[str, Any],
+    related: List[Tuple[str, str, Dict[str, Any]]],
+) -> str:
+    """The issue's description followed by one section per related issue
+
+    ``related`` holds (issue_key, relation, details) in the order they should
+    appear. Each related issue becomes a heading so large contexts split per
+    issue when the prompt is budgeted.
+    """
+    parts = [details.get('description') or '']
+    for key, relation, related_details in related:
+        heading = f"## {key} ({relation})"
+        if related_details.get('title'):
+            heading += f": {related_details['title']}"
+        parts.append(f"{heading}\n{related_details.get('description') or '(no description)'}")
+    if len(parts) > 1:
+        parts.insert(1, f"Related issues of {issue_key} (subtasks, epic children and linked issues):")
+    return '\n\n'.join(part.strip() for part in parts if part.strip())
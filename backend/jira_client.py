@@ -0,0 +1,162 @@
+import asyncio
+import base64
+import logging
+import os
+import random
+import time
+from typing import Optional, Dict, Any
+from urllib.parse import urlparse
+
+import httpx
+
+from jira_scheduler import JiraScheduler, INTERACTIVE
+from metrics import JIRA_ERRORS, JIRA_REQUEST_SECONDS, JIRA_RESPONSES, JIRA_RETRIES, JIRA_THROTTLE_WAIT_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Connection pool configuration (shared by every request in the process)
+JIRA_MAX_CONNECTIONS = int(os.getenv("JIRA_MAX_CONNECTIONS", "100"))
+JIRA_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("JIRA_MAX_KEEPALIVE_CONNECTIONS", "20"))
+JIRA_PER_HOST_CONCURRENCY = int(os.getenv("JIRA_PER_HOST_CONCURRENCY", "10"))
+JIRA_TIMEOUT_SECONDS = float(os.getenv("JIRA_TIMEOUT_SECONDS", "10"))
+JIRA_HTTP2 = os.getenv("JIRA_HTTP2", "false").lower() == "true"
+
+# Retries for rate-limited (429), unavailable (5xx) and failed-to-connect requests
+JIRA_MAX_RETRIES = int(os.getenv("JIRA_MAX_RETRIES", "3"))
+JIRA_RETRY_BACKOFF_SECONDS = float(os.getenv("JIRA_RETRY_BACKOFF_SECONDS", "0.5"))
+JIRA_RETRY_MAX_BACKOFF_SECONDS = float(os.getenv("JIRA_RETRY_MAX_BACKOFF_SECONDS", "30"))
+
+RETRYABLE_STATUS_CODES = (429, 502, 503, 504)
+
+# Distinct credentials whose headers are kept (per-user tokens from /parse-with-auth)
+AUTH_HEADER_CACHE_SIZE = 256
+
+
+class JiraClient:
+    """Async Jira REST client backed by one pooled keep-alive session
+
+    Every request takes a token from its host's rate limiter first (in
+    priority order), and rate-limited or unavailable responses are retried
+    with jittered exponential backoff that honours Retry-After.
+    """
+
+    def __init__(
+        self,
+        email: Optional[str] = None,
+        max_connections: int = JIRA_MAX_CONNECTIONS,
+        max_keepalive_connections: int = JIRA_MAX_KEEPALIVE_CONNECTIONS,
+        per_host_concurrency: int = JIRA_PER_HOST_CONCURRENCY,
+        timeout: float = JIRA_TIMEOUT_SECONDS,
+        http2: bool = JIRA_HTTP2,
+        scheduler: Optional[JiraScheduler] = None,
+        max_retries: int = JIRA_MAX_RETRIES,
+        retry_backoff: float = JIRA_RETRY_BACKOFF_SECONDS,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.email = email
+        self.per_host_concurrency = per_host_concurrency
+        self.scheduler = scheduler or JiraScheduler()
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._auth_headers: Dict[Optional[str], Dict[str, str]] = {}
+        self._client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+            ),
+            timeout=timeout,
+            http2=http2,
+            # Benchmarks and tests substitute an in-process Jira
+            transport=transport,
+        )
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        """Get the concurrency limiter for the host of a URL"""
+        host = urlparse(url).netloc
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.per_host_concurrency)
+            self._host_semaphores[host] = semaphore
+        return semaphore
+
+    def auth_headers(self, auth_token: Optional[str] = None) -> Dict[str, str]:
+        """Request headers for a token (Jira uses Basic Auth with email + token)
+
+        Built once per token and shared afterwards, so callers must not mutate them.
+        """
+        headers = self._auth_headers.get(auth_token)
+        if headers is None:
+            headers = {
+                'Accept': 'application/json',
+                'Content-Type': 'application/json'
+            }
+            if auth_token and self.email:
+                credentials = f"{self.email}:{auth_token}"
+                encoded_credentials = base64.b64encode(credentials.encode()).decode()
+                headers['Authorization'] = f'Basic {encoded_credentials}'
+            if len(self._auth_headers) >= AUTH_HEADER_CACHE_SIZE:
+                self._auth_headers.clear()
+            self._auth_headers[auth_token] = headers
+        return headers
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        """Full-jitter exponential backoff, never shorter than Retry-After"""
+        delay = random.uniform(0, min(JIRA_RETRY_MAX_BACKOFF_SECONDS, self.retry_backoff * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, JIRA_RETRY_MAX_BACKOFF_SECONDS))
+        return delay
+
+    async def get(
+        self,
+        url: str,
+        auth_token: Optional[str] = None,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        operation: str = "issue",
+        priority: int = INTERACTIVE,
+    ) -> httpx.Response:
+        """Issue a GET request through the host's rate limiter, retrying 429/5xx responses"""
+        request_headers = self.auth_headers(auth_token)
+        if headers:
+            request_headers = {**request_headers, **headers}
+        limiter = self.scheduler.host(urlparse(url).netloc)
+        attempt = 0
+        while True:
+            wait_start = time.perf_counter()
+            await limiter.acquire(priority)
+            JIRA_THROTTLE_WAIT_SECONDS.observe(time.perf_counter() - wait_start, priority=str(priority))
+            async with self._host_semaphore(url):
+                start = time.perf_counter()
+                try:
+                    response = await self._client.get(url, headers=request_headers, params=params)
+                except httpx.TransportError as e:
+                    JIRA_ERRORS.inc(error_type=type(e).__name__)
+                    if attempt >= self.max_retries:
+                        raise
+                    response = None
+                    retry_reason = type(e).__name__
+                except httpx.HTTPError as e:
+                    JIRA_ERRORS.inc(error_type=type(e).__name__)
+                    raise
+                finally:
+                    JIRA_REQUEST_SECONDS.observe(time.perf_counter() - start, operation=operation)
+
+            retry_after = None
+            if response is not None:
+                JIRA_RESPONSES.inc(operation=operation, status_code=str(response.status_code))
+                retry_after = await limiter.observe(response.status_code, response.headers)
+                if response.status_code not in RETRYABLE_STATUS_CODES or attempt >= self.max_retries:
+                    return response
+                retry_reason = str(response.status_code)
+
+            delay = self._backoff(attempt, retry_after)
+            attempt += 1
+            JIRA_RETRIES.inc(operation=operation, reason=retry_reason)
+            logger.info(f"Retrying Jira {operation} request ({retry_reason}) in {delay:.2f}s, attempt {attempt}/{self.max_retries}")
+            await asyncio.sleep(delay)
+
+    async def aclose(self) -> None:
+        """Close the pooled connections and the shared rate-limit state"""
+        await self._client.aclose()
+        self.scheduler.close()
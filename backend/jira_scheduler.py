@@ -0,0 +1,354 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterator, List, Mapping, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Per-host request rate: starts at the maximum and adapts to Jira's rate-limit headers
+JIRA_RATE_LIMIT_PER_SECOND = float(os.getenv("JIRA_RATE_LIMIT_PER_SECOND", "10"))
+JIRA_RATE_LIMIT_MIN_PER_SECOND = float(os.getenv("JIRA_RATE_LIMIT_MIN_PER_SECOND", "0.5"))
+JIRA_RATE_LIMIT_BURST = float(os.getenv("JIRA_RATE_LIMIT_BURST", "20"))
+# SQLite file holding the budgets so every worker process draws from one per host (empty = per process)
+JIRA_RATE_LIMIT_STATE_PATH = os.getenv("JIRA_RATE_LIMIT_STATE_PATH", "")
+
+# Request priorities; lower runs first
+INTERACTIVE = 0
+BACKGROUND = 1
+
+# Multiplicative decrease on 429, additive increase on success
+RATE_DECREASE_FACTOR = 0.5
+NEAR_LIMIT_FACTOR = 0.8
+RATE_INCREASE_PER_SUCCESS = 0.1
+
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, when.timestamp() - (now if now is not None else time.time()))
+
+
+class SqliteRateLimitStore:
+    """Token bucket state on local disk, shared by every process that opens the same file
+
+    Limiters load and save their bucket inside one short IMMEDIATE
+    transaction per update, so worker processes spend a single budget per
+    host and see each other's backoffs. Times are stored as wall-clock
+    seconds and converted to and from each process's monotonic clock.
+    """
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._offset = time.time() - time.monotonic()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # Budgets are transient, so commits need not be flushed to disk
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jira_rate_limits (
+                host TEXT PRIMARY KEY,
+                rate REAL NOT NULL,
+                burst REAL NOT NULL,
+                tokens REAL NOT NULL,
+                paused_until REAL NOT NULL,
+                updated REAL NOT NULL
+            )
+            """
+        )
+
+    def _load(self, limiter: "HostRateLimiter") -> None:
+        row = self._conn.execute(
+            "SELECT rate, burst, tokens, paused_until, updated FROM jira_rate_limits WHERE host = ?", (limiter.host,)
+        ).fetchone()
+        if row is not None:
+            limiter.rate = max(limiter.min_rate, min(limiter.max_rate, row[0]))
+            limiter.burst = row[1]
+            limiter.tokens = min(row[1], row[2])
+            limiter.paused_until = row[3] - self._offset
+            limiter._updated = row[4] - self._offset
+
+    @contextmanager
+    def transaction(self, limiter: "HostRateLimiter") -> Iterator[None]:
+        """Load the shared bucket into a limiter and save it back afterwards"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._load(limiter)
+                yield
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO jira_rate_limits VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        limiter.host, limiter.rate, limiter.burst, limiter.tokens,
+                        limiter.paused_until + self._offset, limiter._updated + self._offset,
+                    ),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def load(self, limiter: "HostRateLimiter") -> None:
+        """Refresh a limiter from the shared bucket without changing it"""
+        with self._lock:
+            self._load(limiter)
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class HostRateLimiter:
+    """Token bucket for one Jira host with priority-ordered waiters
+
+    Tokens refill at ``rate`` per second up to ``burst``. Waiters are served
+    strictly by priority, then arrival, so interactive requests overtake a
+    queued backfill. The rate is adjusted from response headers: 429s halve
+    it and pause the host for Retry-After, explicit X-RateLimit fill rates
+    are adopted, and successes creep back up towards the configured maximum.
+    With a ``store`` the bucket and adapted rate are shared across processes;
+    waiters stay local to each process, and the store's transactions run in
+    a thread (one dispatch at a time) so a busy database never blocks the
+    event loop.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        rate: float = JIRA_RATE_LIMIT_PER_SECOND,
+        burst: float = JIRA_RATE_LIMIT_BURST,
+        min_rate: float = JIRA_RATE_LIMIT_MIN_PER_SECOND,
+        store: Optional[SqliteRateLimitStore] = None,
+    ):
+        self.host = host
+        self.store = store
+        self.max_rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.tokens = self.burst
+        self.paused_until = 0.0
+        self.throttled = 0
+        self._updated = time.monotonic()
+        self._counter = itertools.count()
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._dispatching: Optional[asyncio.Task] = None
+        self._redispatch = False
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    @contextmanager
+    def _bucket(self) -> Iterator[None]:
+        """Hold the bucket for an update (a shared transaction when there is a store)"""
+        if self.store is None:
+            yield
+        else:
+            with self.store.transaction(self):
+                yield
+
+    def _refill(self, now: float) -> None:
+        # Nothing accrues while paused (_updated sits at the end of the pause)
+        if now > self._updated:
+            self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    async def acquire(self, priority: int = INTERACTIVE) -> None:
+        """Wait for a token, served in priority order"""
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), future))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted just as we were cancelled; hand the token back
+                self._give_back(1)
+            self._waiters = [waiter for waiter in self._waiters if waiter[2] is not future]
+            heapq.heapify(self._waiters)
+            raise
+
+    def _take(self, wanted: int) -> int:
+        """Take up to ``wanted`` tokens from the bucket (in a thread when shared)"""
+        now = time.monotonic()
+        with self._bucket():
+            self._refill(now)
+            if now < self.paused_until:
+                return 0
+            taken = min(wanted, int(self.tokens))
+            self.tokens -= taken
+            return taken
+
+    def _return_tokens(self, count: int) -> None:
+        with self._bucket():
+            self.tokens = min(self.burst, self.tokens + count)
+
+    def _give_back(self, count: int) -> None:
+        if self.store is None:
+            self._return_tokens(count)
+        else:
+            asyncio.get_running_loop().create_task(self._give_back_shared(count))
+
+    async def _give_back_shared(self, count: int) -> None:
+        try:
+            await asyncio.to_thread(self._return_tokens, count)
+        except sqlite3.Error as e:
+            logger.warning(f"Could not return {count} Jira rate limit tokens for {self.host}: {e}")
+
+    def _grant(self, tokens: int) -> int:
+        """Wake up to ``tokens`` waiters in priority order; returns the tokens left unused"""
+        while tokens and self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+            future.set_result(None)
+            tokens -= 1
+        return tokens
+
+    def _schedule(self, min_delay: float = 0.001) -> None:
+        """Dispatch again once the next token is due"""
+        if self._waiters and self._timer is None:
+            delay = max(self.paused_until - time.monotonic(), (1 - self.tokens) / self.rate, min_delay)
+            self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self.store is None:
+            unused = self._grant(self._take(len(self._waiters)))
+            if unused:
+                self._return_tokens(unused)
+            self._schedule()
+        elif self._dispatching is None:
+            self._dispatching = asyncio.get_running_loop().create_task(self._dispatch_shared())
+        else:
+            self._redispatch = True
+
+    async def _dispatch_shared(self) -> None:
+        min_delay = 0.001
+        try:
+            while True:
+                self._redispatch = False
+                wanted = sum(1 for waiter in self._waiters if not waiter[2].done())
+                granted = await asyncio.to_thread(self._take, wanted) if wanted else 0
+                unused = self._grant(granted)
+                if unused:
+                    await asyncio.to_thread(self._return_tokens, unused)
+                if not self._redispatch:
+                    break
+        except sqlite3.Error as e:
+            logger.warning(f"Jira rate limit state unavailable for {self.host}, retrying: {e}")
+            min_delay = 0.1
+        finally:
+            self._dispatching = None
+        self._schedule(min_delay)
+
+    async def observe(self, status_code: int, headers: Mapping[str, str]) -> Optional[float]:
+        """Adapt the rate from a response; returns the Retry-After delay for 429/503"""
+        retry_after = None
+        if status_code in (429, 503):
+            retry_after = parse_retry_after(headers.get('Retry-After'))
+        if self.store is None:
+            self._adapt(status_code, headers, retry_after)
+        else:
+            try:
+                await asyncio.to_thread(self._adapt, status_code, headers, retry_after)
+            except sqlite3.Error as e:
+                logger.warning(f"Could not record a Jira response for {self.host}: {e}")
+        if self._waiters:
+            self._dispatch()
+        return retry_after
+
+    def _adapt(self, status_code: int, headers: Mapping[str, str], retry_after: Optional[float]) -> None:
+        with self._bucket():
+            if status_code == 429:
+                self.throttled += 1
+                now = time.monotonic()
+                # 429s for requests already in flight when we backed off belong to the same
+                # congestion event; halving for each of them would collapse the rate
+                if now >= self.paused_until:
+                    self.rate = max(self.min_rate, self.rate * RATE_DECREASE_FACTOR)
+                pause = retry_after if retry_after is not None else 1 / self.rate
+                self.paused_until = max(self.paused_until, now + pause)
+                self.tokens = 0
+                self._updated = self.paused_until
+                logger.warning(f"Jira host {self.host} rate limited, pausing {pause:.1f}s at {self.rate:.2f} req/s")
+            else:
+                fill_rate = headers.get('X-RateLimit-FillRate')
+                interval = headers.get('X-RateLimit-Interval-Seconds')
+                limit = headers.get('X-RateLimit-Limit')
+                if fill_rate and interval:
+                    try:
+                        advertised = float(fill_rate) / max(float(interval), 1e-3)
+                        self.rate = max(self.min_rate, min(self.max_rate, advertised))
+                        if limit:
+                            self.burst = max(1.0, float(limit))
+                    except ValueError:
+                        pass
+                elif status_code < 500:
+                    self.rate = min(self.max_rate, self.rate + RATE_INCREASE_PER_SUCCESS)
+                if headers.get('X-RateLimit-NearLimit', '').lower() == 'true':
+                    self.rate = max(self.min_rate, self.rate * NEAR_LIMIT_FACTOR)
+
+    def stats(self) -> Dict[str, float]:
+        if self.store is not None:
+            self.store.load(self)
+        return {
+            "rate_per_second": round(self.rate, 3),
+            "tokens": round(self.tokens, 2),
+            "waiting": self.waiting,
+            "throttled": self.throttled,
+            "paused_for_seconds": round(max(0.0, self.paused_until - time.monotonic()), 2),
+        }
+
+
+class JiraScheduler:
+    """Rate limiters for every Jira host the backend talks to"""
+
+    def __init__(
+        self,
+        rate: float = JIRA_RATE_LIMIT_PER_SECOND,
+        burst: float = JIRA_RATE_LIMIT_BURST,
+        min_rate: float = JIRA_RATE_LIMIT_MIN_PER_SECOND,
+        path: str = JIRA_RATE_LIMIT_STATE_PATH,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.store = SqliteRateLimitStore(path) if path else None
+        self._hosts: Dict[str, HostRateLimiter] = {}
+
+    def host(self, host: str) -> HostRateLimiter:
+        limiter = self._hosts.get(host)
+        if limiter is None:
+            limiter = self._hosts[host] = HostRateLimiter(host, self.rate, self.burst, self.min_rate, self.store)
+        return limiter
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {host: limiter.stats() for host, limiter in self._hosts.items()}
+
+    def close(self) -> None:
+        if self.store is not None:
+            self.store.close()
@@ -0,0 +1,415 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, Iterator, List, Callable, Awaitable, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Job queue configuration
+JOB_STORE_PATH = os.getenv("JOB_STORE_PATH", "jobs.db")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_BACKOFF_SECONDS = float(os.getenv("JOB_RETRY_BACKOFF_SECONDS", "2"))
+JOB_POLL_INTERVAL_SECONDS = float(os.getenv("JOB_POLL_INTERVAL_SECONDS", "1"))
+# A running job whose worker stops renewing its lease for this long is run again elsewhere
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+# Succeeded and failed jobs (and their results) are deleted this long after they finish (0 = keep forever)
+JOB_RETENTION_DAYS = float(os.getenv("JOB_RETENTION_DAYS", "7"))
+JOB_SWEEP_INTERVAL_SECONDS = 3600
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class TransientJobError(Exception):
+    """A failure worth retrying (rate limits, timeouts, upstream 5xx)"""
+
+
+@dataclass
+class Job:
+    id: str
+    dedup_key: str
+    status: str
+    request: Dict[str, Any]
+    progress: Optional[str]
+    result: Optional[Dict[str, Any]]
+    error: Optional[str]
+    attempts: int
+    created_at: float
+    updated_at: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "progress": self.progress,
+            "attempts": self.attempts,
+            "error": self.error,
+            "result": self.result,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+
+
+def make_dedup_key(request: Dict[str, Any]) -> str:
+    """Identical requests share one in-flight job"""
+    return hashlib.sha256(json.dumps(request, sort_keys=True).encode()).hexdigest()
+
+
+class JobStore:
+    """Durable SQLite-backed job store"""
+
+    def __init__(self, path: str = JOB_STORE_PATH):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                dedup_key TEXT NOT NULL,
+                status TEXT NOT NULL,
+                request TEXT NOT NULL,
+                progress TEXT,
+                result TEXT,
+                error TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for column, definition in (("owner", "TEXT"), ("lease_until", "REAL")):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {definition}")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, next_attempt_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_dedup ON jobs (dedup_key, status)")
+
+    @staticmethod
+    def _row_to_job(row) -> Job:
+        return Job(
+            id=row[0],
+            dedup_key=row[1],
+            status=row[2],
+            request=json.loads(row[3]),
+            progress=row[4],
+            result=json.loads(row[5]) if row[5] else None,
+            error=row[6],
+            attempts=row[7],
+            created_at=row[8],
+            updated_at=row[9],
+        )
+
+    _COLUMNS = "id, dedup_key, status, request, progress, result, error, attempts, created_at, updated_at"
+
+    def create(self, request: Dict[str, Any]) -> Tuple[Job, bool]:
+        """Create a job, or return the identical queued/running one and True"""
+        dedup_key = make_dedup_key(request)
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    f"SELECT {self._COLUMNS} FROM jobs WHERE dedup_key = ? AND status IN (?, ?) LIMIT 1",
+                    (dedup_key, QUEUED, RUNNING),
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute("COMMIT")
+                    return self._row_to_job(row), True
+                job_id = uuid.uuid4().hex
+                self._conn.execute(
+                    "INSERT INTO jobs (id, dedup_key, status, request, attempts, next_attempt_at, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, 0, ?, ?, ?)",
+                    (job_id, dedup_key, QUEUED, json.dumps(request), now, now, now),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return self.get(job_id), False
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._conn.execute(f"SELECT {self._COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def claim_next(self, owner: str = "", lease_seconds: float = JOB_LEASE_SECONDS) -> Optional[Job]:
+        """Atomically move the oldest due queued job (or abandoned running job) to running under a lease"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT id FROM jobs WHERE (status = ? AND next_attempt_at <= ?) "
+                    "OR (status = ? AND COALESCE(lease_until, 0) < ?) ORDER BY created_at LIMIT 1",
+                    (QUEUED, now, RUNNING, now),
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, attempts = attempts + 1, owner = ?, lease_until = ?, updated_at = ? "
+                    "WHERE id = ?",
+                    (RUNNING, owner, now + lease_seconds, now, row[0]),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return self.get(row[0])
+
+    def update(self, job_id: str, **fields: Any) -> None:
+        if fields.get("result") is not None:
+            fields["result"] = json.dumps(fields["result"])
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def renew_lease(self, job_id: str, owner: str, lease_seconds: float = JOB_LEASE_SECONDS) -> None:
+        """Keep a running job claimed by its worker"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET lease_until = ? WHERE id = ? AND status = ? AND owner = ?",
+                (time.time() + lease_seconds, job_id, RUNNING, owner),
+            )
+
+    def requeue_interrupted(self, owner: Optional[str] = None) -> int:
+        """Put running jobs back on the queue: an owner's jobs, or those whose lease expired
+
+        Jobs other live workers are running keep their leases and are left alone.
+        """
+        now = time.time()
+        with self._lock:
+            if owner is not None:
+                condition, params = "owner = ?", (owner,)
+            else:
+                condition, params = "COALESCE(lease_until, 0) < ?", (now,)
+            return self._conn.execute(
+                f"UPDATE jobs SET status = ?, progress = NULL, owner = NULL, lease_until = NULL, updated_at = ? "
+                f"WHERE status = ? AND {condition}",
+                (QUEUED, now, RUNNING, *params),
+            ).rowcount
+
+    def delete_finished(self, older_than: float) -> int:
+        """Delete succeeded and failed jobs that finished before a timestamp"""
+        with self._lock:
+            return self._conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?", (SUCCEEDED, FAILED, older_than)
+            ).rowcount
+
+    def iter_results(self, job_ids: Optional[List[str]] = None, page_size: int = 100) -> Iterator[Job]:
+        """Yield succeeded jobs in submission order, reading one page at a time"""
+        condition = "status = ?"
+        params: List[Any] = [SUCCEEDED]
+        if job_ids:
+            condition += f" AND id IN ({', '.join('?' for _ in job_ids)})"
+            params.extend(job_ids)
+        last_rowid = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT rowid, {self._COLUMNS} FROM jobs WHERE rowid > ? AND {condition} ORDER BY rowid LIMIT ?",
+                    (last_rowid, *params, page_size),
+                ).fetchall()
+            for row in rows:
+                yield self._row_to_job(row[1:])
+            if len(rows) < page_size:
+                return
+            last_rowid = rows[-1][0]
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+JobHandler = Callable[[Job, Callable[[str], None]], Awaitable[Dict[str, Any]]]
+
+
+class JobQueue:
+    """Local worker pool processing jobs from the durable store
+
+    Several processes can run queues on the same store: each claims jobs
+    under a lease it renews while they run, so a crashed process's jobs are
+    picked up once the lease expires. Store calls run in threads, since
+    SQLite waits up to its busy timeout while another process holds the
+    write lock, and store errors are logged and retried rather than ending
+    a worker.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        handler: JobHandler,
+        workers: int = JOB_WORKERS,
+        max_attempts: int = JOB_MAX_ATTEMPTS,
+        retry_backoff: float = JOB_RETRY_BACKOFF_SECONDS,
+        poll_interval: float = JOB_POLL_INTERVAL_SECONDS,
+        lease_seconds: float = JOB_LEASE_SECONDS,
+        retention_seconds: float = JOB_RETENTION_DAYS * 24 * 3600,
+    ):
+        self.store = store
+        self.handler = handler
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.retention_seconds = retention_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._wakeup = asyncio.Event()
+        self._changed = asyncio.Condition()
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        requeued = self.store.requeue_interrupted()
+        if requeued:
+            logger.info(f"Requeued {requeued} interrupted jobs")
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._sweep()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # Hand interrupted jobs straight back instead of waiting for their leases to expire
+        requeued = await asyncio.to_thread(self.store.requeue_interrupted, self.owner)
+        if requeued:
+            logger.info(f"Returned {requeued} interrupted jobs to the queue")
+
+    @property
+    def alive_workers(self) -> int:
+        return sum(1 for task in self._tasks[:self.workers] if not task.done())
+
+    async def submit(self, request: Dict[str, Any]) -> Tuple[Job, bool]:
+        """Queue a job, deduplicating against identical in-flight jobs"""
+        job, deduplicated = await asyncio.to_thread(self.store.create, request)
+        if not deduplicated:
+            self._wakeup.set()
+        return job, deduplicated
+
+    async def _notify(self) -> None:
+        async with self._changed:
+            self._changed.notify_all()
+
+    async def wait_for_change(self, timeout: float) -> None:
+        """Wait until any job changes state, or the timeout passes"""
+        async with self._changed:
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _worker(self, number: int) -> None:
+        failures = 0
+        while True:
+            try:
+                job = await asyncio.to_thread(self.store.claim_next, self.owner, self.lease_seconds)
+            except sqlite3.Error as e:
+                failures += 1
+                delay = min(self.poll_interval * (2 ** failures), 30) * (0.5 + random.random())
+                logger.warning(f"Job worker {number} could not claim a job, retrying in {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
+                continue
+            failures = 0
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job)
+
+    async def _sweep(self) -> None:
+        """Requeue jobs whose leases expired and delete finished jobs past the retention period"""
+        while True:
+            try:
+                requeued = await asyncio.to_thread(self.store.requeue_interrupted)
+                deleted = 0
+                if self.retention_seconds > 0:
+                    deleted = await asyncio.to_thread(self.store.delete_finished, time.time() - self.retention_seconds)
+                if requeued or deleted:
+                    logger.info(f"Job sweep requeued {requeued} jobs with expired leases and deleted {deleted} finished jobs")
+                    self._wakeup.set()
+            except sqlite3.Error as e:
+                logger.warning(f"Job sweep failed: {e}")
+            await asyncio.sleep(JOB_SWEEP_INTERVAL_SECONDS)
+
+    async def _update(self, job_id: str, **fields: Any) -> None:
+        """Write job fields from a thread; a failed write leaves the job to be reclaimed when its lease expires"""
+        try:
+            await asyncio.to_thread(self.store.update, job_id, **fields)
+        except sqlite3.Error as e:
+            logger.error(f"Could not update job {job_id}: {e}")
+
+    async def _renew_lease(self, job: Job) -> None:
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                await asyncio.to_thread(self.store.renew_lease, job.id, self.owner, self.lease_seconds)
+            except sqlite3.Error as e:
+                logger.warning(f"Could not renew the lease of job {job.id}: {e}")
+
+    async def _run(self, job: Job) -> None:
+        logger.info(f"Running job {job.id} (attempt {job.attempts})")
+        await self._notify()
+        loop = asyncio.get_running_loop()
+        heartbeat = loop.create_task(self._renew_lease(job))
+        # Progress writes are chained so they land in order, and before the final status
+        last_write: Optional[asyncio.Task] = None
+
+        async def write_progress(previous: Optional[asyncio.Task], progress: str) -> None:
+            if previous is not None:
+                await previous
+            await self._update(job.id, progress=progress)
+            await self._notify()
+
+        def report_progress(progress: str) -> None:
+            nonlocal last_write
+            last_write = loop.create_task(write_progress(last_write, progress))
+
+        try:
+            try:
+                result = await self.handler(job, report_progress)
+            finally:
+                if last_write is not None:
+                    await last_write
+            await self._update(job.id, status=SUCCEEDED, result=result, error=None, progress="done")
+        except TransientJobError as e:
+            if job.attempts < self.max_attempts:
+                delay = self.retry_backoff * (2 ** (job.attempts - 1)) * (0.5 + random.random())
+                logger.warning(f"Job {job.id} failed transiently, retrying in {delay:.1f}s: {e}")
+                await self._update(
+                    job.id, status=QUEUED, error=str(e), progress=f"retrying in {delay:.1f}s",
+                    next_attempt_at=time.time() + delay,
+                )
+            else:
+                await self._update(job.id, status=FAILED, error=str(e), progress=None)
+        except asyncio.CancelledError:
+            # Shutting down: stop() puts the job back on the queue
+            raise
+        except Exception as e:
+            logger.error(f"Job {job.id} failed: {e}")
+            await self._update(job.id, status=FAILED, error=str(e), progress=None)
+        finally:
+            heartbeat.cancel()
+        await self._notify()
@@ -1,15 +1,58 @@
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, HttpUrl
-import requests
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field, HttpUrl, ValidationError
+import httpx
 import re
 from urllib.parse import urlparse, parse_qs
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, AsyncIterator, Callable, Iterator, Tuple, Type
+import asyncio
 import logging
 import os
 import json
+import sqlite3
+import time
 from dotenv import load_dotenv
-import google.generativeai as genai
+from jira_client import JiraClient
+from jira_scheduler import INTERACTIVE, BACKGROUND
+from generation_limiter import GenerationLimiter, GenerationRejected
+from issue_cache import IssueCache, CachedIssue, make_cache_key
+from issue_context import (
+    JIRA_CONTEXT_MAX_ISSUES, JIRA_RELATION_FIELDS, build_requirement_context, extract_related_issues, related_issues_jql
+)
+from suite_cache import IssueSuite, SuiteCache, content_hash
+from similarity_index import (
+    SimilarityIndex, SimilarSuite, SIMILARITY_ADAPT_THRESHOLD, SIMILARITY_INDEX_ENABLED
+)
+from suite_export import EXPORT_FORMATS
+from prompt_templates import PromptTemplate
+from suite_diff import (
+    DescriptionDiff, diff_descriptions, format_changes, summarize_test_cases, apply_suite_update,
+    INCREMENTAL_MAX_CHANGED_RATIO
+)
+from suite_parser import (
+    TestCaseStreamParser, SuiteExtractionError, ExtractedSuite, extract_suite, extract_json_object, parse_structured_suite
+)
+from schemas import TestSuiteDocument, TestSuiteUpdate
+from jobs import Job, JobQueue, JobStore, TransientJobError, SUCCEEDED, FAILED
+from singleflight import SingleFlight
+from shared_state import use_shared_state
+from webhooks import (
+    JIRA_WEBHOOK_SECRET, WEBHOOK_ALLOWED_BASE_URLS, Debouncer, allowed_base_url, parse_issue_event, skip_reason,
+    verify_signature
+)
+from model_router import ModelRouter, create_router, is_transient_error, is_transient_status
+from metrics import (
+    CACHE_HIT_RATIO, CACHE_LOOKUPS, GEMINI_REQUEST_SECONDS, GEMINI_REQUESTS, HTTP_ERRORS,
+    EVENT_LOOP_LAG, HTTP_REQUEST_SECONDS, IN_FLIGHT, JIRA_RATE_LIMIT, JSON_PARSE_SECONDS, MODEL_CIRCUIT_OPEN, WEBHOOK_EVENTS,
+    GENERATION_TOKENS_SAVED, SIMILAR_SUITES,
+    render_metrics, span
+)
+from prompt_builder import (
+    prepare_description, merge_test_suites, normalize_description, truncate_to_budget, build_repair_instructions, estimate_tokens,
+    PROMPT_SECTION_TOKENS
+)
 
 # Load environment variables from .env file
 load_dotenv()
@@ -24,15 +67,143 @@ JIRA_EMAIL = os.getenv("JIRA_EMAIL")  # Your Jira account email
 JIRA_BASE_URL = os.getenv("JIRA_BASE_URL")
 DEFAULT_PROJECT_KEY = os.getenv("DEFAULT_PROJECT_KEY")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.0-flash-lite")
+
+# Ask Gemini for JSON constrained to the suite schema, and how often to re-request lost test cases
+GEMINI_STRUCTURED_OUTPUT = os.getenv("GEMINI_STRUCTURED_OUTPUT", "true").lower() == "true"
+GEMINI_REPAIR_ATTEMPTS = int(os.getenv("GEMINI_REPAIR_ATTEMPTS", "1"))
+
+# Lower bound of the 10-15 test cases the prompt asks for
+EXPECTED_TEST_CASES = 10
+
+NO_MODEL_BACKEND_ERROR = 'No model backend configured (set GEMINI_API_KEY or MODEL_BACKENDS)'
+
+# Batch generation limits
+BATCH_MAX_ISSUES = int(os.getenv("BATCH_MAX_ISSUES", "500"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+JIRA_SEARCH_PAGE_SIZE = int(os.getenv("JIRA_SEARCH_PAGE_SIZE", "100"))
+
+# Only the issue fields that extract_issue_details reads (Jira returns every field otherwise)
+JIRA_ISSUE_FIELDS = f"summary,description,status,assignee,reporter,priority,issuetype,created,updated,{JIRA_RELATION_FIELDS}"
+
+# Issue key patterns in order of preference, compiled once
+ISSUE_KEY_PATTERNS = tuple(re.compile(pattern) for pattern in (
+    r'/browse/([A-Z]+-\d+)',  # /browse/PROJECT-123
+    r'/issues/([A-Z]+-\d+)',  # /issues/PROJECT-123
+    r'/issue/([A-Z]+-\d+)',   # /issue/PROJECT-123
+    r'([A-Z]+-\d+)',          # Just the issue key
+))
+
+# Prompt templates, loaded at startup and reloaded when the files are edited
+TEST_CASE_PROMPT = PromptTemplate('test_case_prompt.txt')
+UPDATE_PROMPT = PromptTemplate('test_case_update_prompt.txt')
+
+# Worker processes for `python main.py` (gunicorn and the uvicorn CLI read it too)
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+# A worker whose event loop wakes up later than this reports itself not ready
+READINESS_MAX_LOOP_LAG_SECONDS = float(os.getenv("READINESS_MAX_LOOP_LAG_SECONDS", "1"))
+
+# Response models the backends constrain their JSON output to
+SUITE_RESPONSE_MODEL = TestSuiteDocument if GEMINI_STRUCTURED_OUTPUT else None
+UPDATE_RESPONSE_MODEL = TestSuiteUpdate if GEMINI_STRUCTURED_OUTPUT else None
+
+# Shared Jira client and LLM limiter, created with the application lifespan
+jira_client: Optional[JiraClient] = None
+generation_limiter: Optional[GenerationLimiter] = None
+issue_cache: Optional[IssueCache] = None
+suite_cache: Optional[SuiteCache] = None
+similarity_index: Optional[SimilarityIndex] = None
+job_queue: Optional[JobQueue] = None
+model_router: Optional[ModelRouter] = None
+webhook_debouncer: Optional[Debouncer] = None
+
+# This worker process's start time and latest event loop lag, for /ready
+worker_started_at: Optional[float] = None
+event_loop_lag = 0.0
+
+# Concurrent identical Jira fetches and Gemini generations share one upstream call
+jira_flight = SingleFlight("jira")
+gemini_flight = SingleFlight("gemini")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Build shared upstream clients on startup and close them on shutdown"""
+    global jira_client, generation_limiter, issue_cache, suite_cache, job_queue, model_router, webhook_debouncer
+    global similarity_index, worker_started_at
+    worker_started_at = time.time()
+    for template in (TEST_CASE_PROMPT, UPDATE_PROMPT):
+        if not template.load():
+            logger.error(f"Prompt template {template.path} is missing or empty")
+    jira_client = JiraClient(email=JIRA_EMAIL)
+    generation_limiter = GenerationLimiter()
+    model_router = create_router(GEMINI_MODEL, GEMINI_API_KEY)
+    issue_cache = IssueCache()
+    suite_cache = SuiteCache()
+    if SIMILARITY_INDEX_ENABLED:
+        similarity_index = SimilarityIndex()
+        similarity_index.prune()
+        similarity_index.refresh()
+        logger.info(f"Similarity index loaded with {len(similarity_index)} issue suites")
+    job_queue = JobQueue(JobStore(), run_generation_job)
+    job_queue.start()
+    webhook_debouncer = Debouncer(enqueue_prewarm_job)
+    register_metric_callbacks()
+    lag_monitor = asyncio.create_task(monitor_event_loop_lag())
+    try:
+        yield
+    finally:
+        lag_monitor.cancel()
+        dropped = webhook_debouncer.cancel_all()
+        if dropped:
+            logger.warning(f"Dropped {dropped} debounced webhook events on shutdown")
+        await job_queue.stop()
+        job_queue.store.close()
+        await jira_client.aclose()
+        jira_client = None
+        await model_router.aclose()
+        suite_cache.close()
+        if similarity_index is not None:
+            similarity_index.close()
 
-# Configure Gemini AI
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
+async def monitor_event_loop_lag(interval: float = 0.5) -> None:
+    """Measure how late timers fire, a sign of blocking work in this worker"""
+    global event_loop_lag
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        event_loop_lag = max(0.0, loop.time() - start - interval)
+        EVENT_LOOP_LAG.set(round(event_loop_lag, 4))
+
+def register_metric_callbacks() -> None:
+    """Expose cache and in-flight state as gauges read at scrape time"""
+    caches = {'jira_issues': issue_cache, 'generated_suites': suite_cache}
+    CACHE_HIT_RATIO.set_callback(lambda: {
+        (name,): cache.stats()['hit_ratio'] for name, cache in caches.items()
+    })
+    CACHE_LOOKUPS.set_callback(lambda: {
+        (name, result): getattr(cache, result) for name, cache in caches.items() for result in ('hits', 'misses')
+    })
+    IN_FLIGHT.set_callback(lambda: {
+        ('gemini_generation',): generation_limiter.in_flight,
+        ('gemini_queue',): generation_limiter.waiting,
+        ('jira_single_flight',): jira_flight.stats()['in_flight'],
+        ('gemini_single_flight',): gemini_flight.stats()['in_flight'],
+        ('webhook_debounce',): webhook_debouncer.pending,
+        **{('jobs_' + status,): count for status, count in job_queue.store.counts().items()}
+    })
+    JIRA_RATE_LIMIT.set_callback(lambda: {
+        (host,): stats['rate_per_second'] for host, stats in jira_client.scheduler.stats().items()
+    })
+    MODEL_CIRCUIT_OPEN.set_callback(lambda: {
+        (name,): 0 if state == 'closed' else 1 for name, state in model_router.circuit_states().items()
+    })
 
 app = FastAPI(
     title="Jira URL Parser API",
     description="API to extract parameters from Jira URLs",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -44,6 +215,28 @@ app.add_middleware(
     allow_headers=["*"],  # Allow all headers
 )
 
+def route_template(request: Request) -> str:
+    """The matched route's path template (e.g. /jobs/{job_id}), keeping metric label sets bounded"""
+    route = request.scope.get('route')
+    return route.path if route is not None else 'unmatched'
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Record end-to-end latency per endpoint (time to response headers for streams)"""
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    except Exception as e:
+        HTTP_ERRORS.inc(path=route_template(request), error_type=type(e).__name__)
+        raise
+    finally:
+        HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - start, method=request.method, path=route_template(request), status=str(status)
+        )
+
 class JiraUrlRequest(BaseModel):
     url: HttpUrl
 
@@ -63,31 +256,55 @@ class JiraIssueResponse(BaseModel):
     project_key: Optional[str] = None
     created_date: Optional[str] = None
     updated_date: Optional[str] = None
+    # Subtasks and linked issues as [{'key', 'relation'}]
+    related_issues: List[Dict[str, str]] = []
     url: str
     error: Optional[str] = None
 
 class TestCaseGenerationRequest(BaseModel):
     url: HttpUrl
+    force_regenerate: bool = False
+    # Fold subtasks, epic children and linked issues into the requirements
+    include_related: bool = False
+
+class BatchTestCaseGenerationRequest(BaseModel):
+    urls: List[HttpUrl] = []
+    issue_keys: List[str] = []
+    jql: Optional[str] = None
+    base_url: Optional[HttpUrl] = None
+    max_issues: int = BATCH_MAX_ISSUES
+    force_regenerate: bool = False
+
+class JobSubmissionResponse(BaseModel):
+    job_id: str
+    status: str
+    deduplicated: bool = False
+
+class WebhookResponse(BaseModel):
+    accepted: bool
+    issue_key: Optional[str] = None
+    reason: Optional[str] = None
+    run_in_seconds: Optional[float] = None
 
 class TestCaseGenerationResponse(BaseModel):
     issue_key: Optional[str] = None
     title: Optional[str] = None
     description: Optional[str] = None
-    test_cases: Optional[Dict[str, Any]] = None
+    test_cases: Optional[TestSuiteDocument] = None
+    cached: bool = False
+    # Test case IDs added/modified/retired when an edited issue was updated incrementally
+    changes: Optional[Dict[str, List[str]]] = None
+    # Issue whose suite was reused or adapted, and how similar its description was
+    similar_issue: Optional[str] = None
+    similarity: Optional[float] = None
     error: Optional[str] = None
+    # Whether the error is worth retrying later (rate limiting, timeouts, upstream outages); not serialized
+    transient: bool = Field(default=False, exclude=True)
 
 def extract_issue_key_from_url(url: str) -> Optional[str]:
     """Extract Jira issue key from URL"""
-    # Common Jira URL patterns
-    patterns = [
-        r'/browse/([A-Z]+-\d+)',  # /browse/PROJECT-123
-        r'/issues/([A-Z]+-\d+)',  # /issues/PROJECT-123
-        r'/issue/([A-Z]+-\d+)',   # /issue/PROJECT-123
-        r'([A-Z]+-\d+)',          # Just the issue key
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, url)
+    for pattern in ISSUE_KEY_PATTERNS:
+        match = pattern.search(url)
         if match:
             return match.group(1)
     return None
@@ -117,6 +334,8 @@ def parse_jira_url_params(url: str) -> Dict[str, Any]:
 
 def fetch_jira_issue_details(issue_key: str, base_url: str) -> Dict[str, Any]:
     """Fetch detailed issue information from Jira REST API"""
+    # Legacy blocking client, imported on use to keep it out of startup
+    import requests
     try:
         # Construct the REST API URL
         api_url = f"{base_url}/rest/api/2/issue/{issue_key}"
@@ -158,47 +377,88 @@ def fetch_jira_issue_details(issue_key: str, base_url: str) -> Dict[str, Any]:
         logger.error(f"Unexpected error: {e}")
         return {'error': f'Unexpected error: {str(e)}'}
 
-def fetch_jira_issue_details_with_auth(issue_key: str, base_url: str, auth_token: str = None) -> Dict[str, Any]:
+def extract_issue_details(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Extract the fields we use from a Jira issue payload"""
+    fields = data.get('fields', {})
+
+    return {
+        'title': fields.get('summary', ''),
+        'description': fields.get('description', ''),
+        'status': fields.get('status', {}).get('name', ''),
+        'assignee': fields.get('assignee', {}).get('displayName', '') if fields.get('assignee') else '',
+        'reporter': fields.get('reporter', {}).get('displayName', '') if fields.get('reporter') else '',
+        'priority': fields.get('priority', {}).get('name', '') if fields.get('priority') else '',
+        'issue_type': fields.get('issuetype', {}).get('name', ''),
+        'created_date': fields.get('created', ''),
+        'updated_date': fields.get('updated', ''),
+        'related_issues': extract_related_issues(fields)
+    }
+
+async def is_cached_issue_unchanged(
+    issue_key: str, base_url: str, auth_token: str, cached: CachedIssue, priority: int = INTERACTIVE
+) -> bool:
+    """Check the issue's updated timestamp against a cached copy"""
+    try:
+        api_url = f"{base_url}/rest/api/2/issue/{issue_key}"
+        response = await jira_client.get(
+            api_url, auth_token, params={'fields': 'updated'}, operation='revalidate', priority=priority
+        )
+        if response.status_code != 200:
+            return False
+        return response.json().get('fields', {}).get('updated') == cached.updated
+    except httpx.HTTPError as e:
+        logger.warning(f"Could not revalidate cached issue {issue_key}: {e}")
+        return False
+
+async def fetch_jira_issue_details_with_auth(
+    issue_key: str, base_url: str, auth_token: str = None, priority: int = INTERACTIVE
+) -> Dict[str, Any]:
     """Fetch detailed issue information from Jira REST API with authentication"""
+    # Callers asking for the same issue with the same credential at the same time share one fetch
+    cache_key = make_cache_key(base_url, issue_key, auth_token)
+    details = await jira_flight.do(cache_key, lambda: load_jira_issue_details(issue_key, base_url, auth_token, priority))
+    return dict(details)
+
+async def load_jira_issue_details(
+    issue_key: str, base_url: str, auth_token: str = None, priority: int = INTERACTIVE
+) -> Dict[str, Any]:
+    """Load issue details from the cache or the Jira REST API"""
     try:
+        # Serve from cache when the entry is fresh or Jira confirms it has not changed
+        cache_key = make_cache_key(base_url, issue_key, auth_token)
+        cached = await asyncio.to_thread(issue_cache.get, cache_key)
+        conditional_headers = None
+        if cached is not None:
+            if issue_cache.is_fresh(cached):
+                issue_cache.hits += 1
+                return dict(cached.details)
+            issue_cache.revalidations += 1
+            if cached.etag:
+                conditional_headers = {'If-None-Match': cached.etag}
+            elif await is_cached_issue_unchanged(issue_key, base_url, auth_token, cached, priority):
+                await asyncio.to_thread(issue_cache.mark_validated, cache_key, cached)
+                issue_cache.hits += 1
+                return dict(cached.details)
+
         # Construct the REST API URL
         api_url = f"{base_url}/rest/api/2/issue/{issue_key}"
         
-        # Prepare headers
-        headers = {
-            'Accept': 'application/json',
-            'Content-Type': 'application/json'
-        }
-        
-        # Add authentication if provided (Jira uses Basic Auth with email + token)
-        if auth_token and JIRA_EMAIL:
-            import base64
-            credentials = f"{JIRA_EMAIL}:{auth_token}"
-            encoded_credentials = base64.b64encode(credentials.encode()).decode()
-            headers['Authorization'] = f'Basic {encoded_credentials}'
-        
-        # Make request to Jira REST API
+        # Make request to Jira REST API over the shared connection pool
         logger.info(f"Making request to: {api_url}")
-        logger.info(f"Headers: {headers}")
-        response = requests.get(api_url, headers=headers, timeout=10)
+        response = await jira_client.get(
+            api_url, auth_token, params={'fields': JIRA_ISSUE_FIELDS}, headers=conditional_headers, priority=priority
+        )
         logger.info(f"Response status: {response.status_code}")
-        logger.info(f"Response headers: {dict(response.headers)}")
         
-        if response.status_code == 200:
-            data = response.json()
-            fields = data.get('fields', {})
-            
-            return {
-                'title': fields.get('summary', ''),
-                'description': fields.get('description', ''),
-                'status': fields.get('status', {}).get('name', ''),
-                'assignee': fields.get('assignee', {}).get('displayName', '') if fields.get('assignee') else '',
-                'reporter': fields.get('reporter', {}).get('displayName', '') if fields.get('reporter') else '',
-                'priority': fields.get('priority', {}).get('name', '') if fields.get('priority') else '',
-                'issue_type': fields.get('issuetype', {}).get('name', ''),
-                'created_date': fields.get('created', ''),
-                'updated_date': fields.get('updated', '')
-            }
+        if response.status_code == 304 and cached is not None:
+            await asyncio.to_thread(issue_cache.mark_validated, cache_key, cached)
+            issue_cache.hits += 1
+            return dict(cached.details)
+        elif response.status_code == 200:
+            issue_cache.misses += 1
+            details = extract_issue_details(response.json())
+            await asyncio.to_thread(issue_cache.put, cache_key, details, response.headers.get('ETag'))
+            return details
         elif response.status_code == 401:
             logger.warning("Authentication required for Jira API access")
             return {'error': 'Authentication required - Jira instance requires login'}
@@ -208,121 +468,639 @@ def fetch_jira_issue_details_with_auth(issue_key: str, base_url: str, auth_token
         elif response.status_code == 404:
             logger.warning(f"Issue not found or API endpoint not accessible: {response.status_code}")
             return {'error': 'Issue not found or Jira API not accessible (private instance)'}
+        elif response.status_code == 429:
+            logger.warning("Jira rate limit still exceeded after retries")
+            return {
+                'error': f"Jira API rate limit exceeded (status 429), retry after {response.headers.get('Retry-After', 'a while')}",
+                'transient': True
+            }
         else:
             logger.warning(f"Failed to fetch issue details: {response.status_code}")
-            return {'error': f'Jira API returned status {response.status_code}'}
+            return {
+                'error': f'Jira API returned status {response.status_code}',
+                'transient': is_transient_status(response.status_code)
+            }
             
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"Error fetching Jira issue: {e}")
-        return {'error': f'Network error: {str(e)}'}
+        return {'error': f'Network error: {str(e)}', 'transient': is_transient_error(e)}
     except Exception as e:
         logger.error(f"Unexpected error: {e}")
         return {'error': f'Unexpected error: {str(e)}'}
 
+class JiraSearchError(HTTPException):
+    """A Jira search page failed; reported to API clients as a 502"""
+
+    def __init__(self, upstream_status: int):
+        super().__init__(status_code=502, detail=f"Jira search returned status {upstream_status}")
+        self.upstream_status = upstream_status
+
+async def search_jira_issues(
+    jql: str, base_url: str, auth_token: str = None, max_issues: int = BATCH_MAX_ISSUES, priority: int = BACKGROUND
+) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """Page through Jira search results, yielding (issue_key, issue_details) pairs"""
+    api_url = f"{base_url}/rest/api/2/search"
+    start_at = 0
+    while start_at < max_issues:
+        params = {
+            'jql': jql,
+            'startAt': start_at,
+            'maxResults': min(JIRA_SEARCH_PAGE_SIZE, max_issues - start_at),
+            'fields': JIRA_ISSUE_FIELDS
+        }
+        # Batch searches queue behind interactive requests
+        response = await jira_client.get(api_url, auth_token, params=params, operation='search', priority=priority)
+        if response.status_code != 200:
+            raise JiraSearchError(response.status_code)
+        
+        data = response.json()
+        issues = data.get('issues', [])
+        for issue in issues:
+            details = extract_issue_details(issue)
+            # Warm the issue cache so follow-up /parse calls revalidate instead of refetching
+            await asyncio.to_thread(issue_cache.put, make_cache_key(base_url, issue['key'], auth_token), details)
+            yield issue['key'], details
+        
+        start_at += len(issues)
+        if not issues or start_at >= data.get('total', 0):
+            break
+
+async def load_requirement_context(
+    issue_key: str, issue_details: Dict[str, Any], base_url: str, auth_token: str = None, priority: int = INTERACTIVE
+) -> Dict[str, Any]:
+    """Issue details whose description also covers its subtasks, epic children and linked issues
+
+    The related issues come from one paginated search for just the detail
+    fields, rather than a full issue request each.
+    """
+    related = issue_details.get('related_issues') or []
+    jql = related_issues_jql(issue_key, issue_details.get('issue_type', ''), related)
+    if jql is None:
+        return issue_details
+    relations = {item['key']: item['relation'] for item in related}
+    found = []
+    try:
+        with span('fetch_related_issues', issue_key=issue_key):
+            async for key, details in search_jira_issues(jql, base_url, auth_token, JIRA_CONTEXT_MAX_ISSUES, priority):
+                if key != issue_key:
+                    found.append((key, relations.get(key, 'epic child'), details))
+    except JiraSearchError as e:
+        return {'error': e.detail, 'transient': is_transient_status(e.upstream_status)}
+    except httpx.HTTPError as e:
+        logger.error(f"Error fetching issues related to {issue_key}: {e}")
+        return {'error': f'Network error: {str(e)}', 'transient': is_transient_error(e)}
+    
+    # Children first, then linked issues, each in key order
+    found.sort(key=lambda item: item[1] not in ('subtask', 'epic child'))
+    logger.info(f"Including {len(found)} related issues in the requirements for {issue_key}")
+    return {**issue_details, 'description': build_requirement_context(issue_key, issue_details, found)}
+
 def load_test_case_prompt() -> str:
-    """Load the test case generation prompt from file"""
+    """The test case generation prompt (in memory, reloaded when the file changes)"""
+    return TEST_CASE_PROMPT.text
+
+def build_test_case_prompt(description: str) -> Optional[str]:
+    """Fill the prompt template with an issue description"""
+    prompt_template = load_test_case_prompt()
+    if not prompt_template:
+        return None
+    return prompt_template.replace('{description}', description)
+
+def parse_generated_suite(response_text: str) -> ExtractedSuite:
+    """Parse and validate a Gemini response into the suite models, recording parse time"""
+    start = time.perf_counter()
+    result = 'error'
+    try:
+        if GEMINI_STRUCTURED_OUTPUT:
+            extracted = parse_structured_suite(response_text)
+        else:
+            extracted = extract_suite(response_text)
+        result = 'recovered' if extracted.truncated or extracted.dropped else 'ok'
+        return extracted
+    except SuiteExtractionError as e:
+        logger.error(f"Failed to parse JSON response: {e}")
+        logger.error(f"Response length: {len(response_text)}")
+        logger.error(f"Response preview: {response_text[:1000]}...")
+        raise
+    finally:
+        JSON_PARSE_SECONDS.observe(time.perf_counter() - start, result=result)
+
+async def request_generation(
+    prompt: str,
+    mode: str = 'unary',
+    response_model: Optional[Type[BaseModel]] = SUITE_RESPONSE_MODEL,
+    parse: Optional[Callable[[str], Any]] = parse_generated_suite
+) -> Any:
+    """Run one routed generation through the limiter and return its parsed result"""
+    start = time.perf_counter()
     try:
-        with open('test_case_prompt.txt', 'r', encoding='utf-8') as file:
-            return file.read()
-    except FileNotFoundError:
-        logger.error("test_case_prompt.txt file not found")
-        return ""
+        result = await generation_limiter.run(lambda: model_router.generate(prompt, response_model, parse))
+    except GenerationRejected as e:
+        GEMINI_REQUESTS.inc(mode=mode, outcome=f'rejected_{e.status_code}')
+        raise
     except Exception as e:
-        logger.error(f"Error loading prompt file: {e}")
-        return ""
+        GEMINI_REQUESTS.inc(mode=mode, outcome=type(e).__name__)
+        raise
+    GEMINI_REQUEST_SECONDS.observe(time.perf_counter() - start, mode=mode)
+    GEMINI_REQUESTS.inc(mode=mode, outcome='ok')
+    return result
+
+async def repair_missing_test_cases(prompt: str, extracted: ExtractedSuite) -> Dict[str, Any]:
+    """
+    Complete a parsed response that lost test cases
+    
+    When the response lost test cases (truncated output, cases failing
+    validation), only the missing ones are requested again and merged in.
+    """
+    test_cases = extracted.document
+    
+    expected = EXPECTED_TEST_CASES
+    for attempt in range(GEMINI_REPAIR_ATTEMPTS):
+        missing = extracted.missing(expected)
+        if not missing:
+            break
+        logger.info(f"Response lost {missing} test case(s), requesting only those (attempt {attempt + 1})")
+        titles = [test_case.get('title', '') for test_case in test_cases['test_suite']['test_cases']]
+        try:
+            extracted = await request_generation(prompt + build_repair_instructions(titles, missing), mode='repair')
+        except Exception as e:
+            # Keep the test cases we already have rather than failing the section
+            logger.warning(f"Could not repair missing test cases: {e}")
+            break
+        test_cases = merge_test_suites([test_cases, extracted.document])
+        expected = missing
+    
+    return test_cases
 
-def generate_test_cases_with_gemini(description: str) -> Dict[str, Any]:
+async def generate_test_cases_for_section(description: str) -> Dict[str, Any]:
+    """Generate test cases for one prompt-sized part of a description"""
+    # Load the prompt template and replace the placeholder with the actual description
+    prompt = build_test_case_prompt(description)
+    if not prompt:
+        return {'error': 'Could not load test case prompt template'}
+    
+    # Generate test cases without blocking the event loop, bounded by the limiter
+    try:
+        extracted = await request_generation(prompt)
+    except SuiteExtractionError as e:
+        return {'error': f'Invalid JSON response from Gemini: {str(e)}'}
+    return await repair_missing_test_cases(prompt, extracted)
+
+def failed_sections_error(results: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    The error of a sectioned generation in which any section failed
+    
+    A suite merged from the other sections would miss whole parts of the
+    requirements, so it is neither returned nor cached. The error is
+    transient when every failed section failed transiently.
+    """
+    failed = [result for result in results if 'error' in result]
+    if not failed:
+        return None
+    logger.warning(f"{len(failed)} of {len(results)} sections failed to generate")
+    return {
+        'error': f"{len(failed)} of {len(results)} sections failed to generate: {failed[0]['error']}",
+        'transient': all(result.get('transient', False) for result in failed)
+    }
+
+async def generate_test_cases_with_gemini(description: str) -> Dict[str, Any]:
     """Generate test cases using Gemini 2.5 Flash model"""
     try:
-        if not GEMINI_API_KEY:
-            return {'error': 'Gemini API key not configured'}
-        
-        # Load the prompt template
-        prompt_template = load_test_case_prompt()
-        if not prompt_template:
-            return {'error': 'Could not load test case prompt template'}
+        if not model_router.available:
+            return {'error': NO_MODEL_BACKEND_ERROR}
         
-        # Replace the placeholder with the actual description
-        prompt = prompt_template.replace('{description}', description)
-        
-        # Initialize the Gemini model
-        model = genai.GenerativeModel('gemini-2.0-flash-lite')
-        
-        # Generate test cases
-        logger.info("Generating test cases with Gemini...")
-        response = model.generate_content(prompt)
-        
-        if not response.text:
-            return {'error': 'No response from Gemini model'}
+        # Normalize the description and split large requirements into sections
+        parts = prepare_description(description)
+        logger.info(f"Generating test cases with Gemini ({len(parts)} part(s))...")
+        if len(parts) == 1:
+            test_cases = await generate_test_cases_for_section(parts[0])
+        else:
+            # Generate every section in parallel, then merge and deduplicate
+            results = await asyncio.gather(*(generate_test_cases_for_section(part) for part in parts))
+            error = failed_sections_error(results)
+            if error is not None:
+                return error
+            test_cases = merge_test_suites(results)
         
-        # Try to parse the JSON response
-        try:
-            # Extract JSON from the response (in case there's extra text)
-            response_text = response.text.strip()
-            
-            # Find JSON content between ```json and ``` or just parse the whole response
-            if '```json' in response_text:
-                json_start = response_text.find('```json') + 7
-                json_end = response_text.find('```', json_start)
-                if json_end == -1:
-                    # If no closing ``` found, try to find the end of JSON
-                    json_content = response_text[json_start:].strip()
-                else:
-                    json_content = response_text[json_start:json_end].strip()
-            else:
-                json_content = response_text
-            
-            # Try to fix incomplete JSON by finding the last complete object
-            if json_content.count('{') > json_content.count('}'):
-                # JSON is incomplete, try to find the last complete test case
-                last_complete_brace = json_content.rfind('}')
-                if last_complete_brace != -1:
-                    json_content = json_content[:last_complete_brace + 1]
-                    # Add missing closing braces
-                    missing_braces = json_content.count('{') - json_content.count('}')
-                    json_content += '}' * missing_braces
-            
-            test_cases = json.loads(json_content)
+        if 'error' not in test_cases:
             logger.info("Successfully generated test cases")
-            return test_cases
-            
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse JSON response: {e}")
-            logger.error(f"Response length: {len(response.text)}")
-            logger.error(f"Response preview: {response.text[:1000]}...")
-            
-            # Try to extract partial JSON as fallback
-            try:
-                # Look for the test_suite structure
-                if '"test_suite"' in response_text:
-                    suite_start = response_text.find('"test_suite"')
-                    # Find the opening brace for test_suite
-                    brace_start = response_text.find('{', suite_start)
-                    if brace_start != -1:
-                        # Try to find a reasonable end point
-                        brace_count = 0
-                        end_pos = brace_start
-                        for i, char in enumerate(response_text[brace_start:], brace_start):
-                            if char == '{':
-                                brace_count += 1
-                            elif char == '}':
-                                brace_count -= 1
-                                if brace_count == 0:
-                                    end_pos = i + 1
-                                    break
-                        
-                        partial_json = response_text[brace_start:end_pos]
-                        test_cases = json.loads(partial_json)
-                        logger.info("Successfully parsed partial JSON response")
-                        return test_cases
-            except:
-                pass
-            
-            return {'error': f'Invalid JSON response from Gemini: {str(e)}'}
+        return test_cases
             
+    except GenerationRejected:
+        raise
     except Exception as e:
         logger.error(f"Error generating test cases: {e}")
-        return {'error': f'Error generating test cases: {str(e)}'}
+        return {'error': f'Error generating test cases: {str(e)}', 'transient': is_transient_error(e)}
+
+async def update_test_cases_with_gemini(previous_test_cases: Dict[str, Any], diff: DescriptionDiff, description: str) -> Dict[str, Any]:
+    """
+    Ask Gemini only for the test cases affected by a description edit
+    
+    Returns {'test_cases': suite, 'changes': {'added': [...], 'modified': [...], 'retired': [...]}}
+    with unchanged test cases and their IDs kept, or an error dict.
+    """
+    if not model_router.available:
+        return {'error': NO_MODEL_BACKEND_ERROR}
+    
+    prompt_template = UPDATE_PROMPT.text
+    if not prompt_template:
+        return {'error': 'Could not load test case update prompt template'}
+    prompt = (
+        prompt_template
+        .replace('{test_cases}', summarize_test_cases(previous_test_cases))
+        .replace('{changes}', format_changes(diff))
+        .replace('{description}', truncate_to_budget(normalize_description(description), PROMPT_SECTION_TOKENS))
+    )
+    
+    try:
+        update = await request_generation(
+            prompt, mode='update', response_model=UPDATE_RESPONSE_MODEL,
+            parse=lambda text: TestSuiteUpdate.model_validate(extract_json_object(text or ''))
+        )
+    except GenerationRejected:
+        raise
+    except (SuiteExtractionError, ValidationError) as e:
+        return {'error': f'Invalid update response from Gemini: {str(e)}'}
+    except Exception as e:
+        logger.error(f"Error updating test cases: {e}")
+        return {'error': f'Error updating test cases: {str(e)}'}
+    
+    test_cases, changes = apply_suite_update(previous_test_cases, update)
+    return {'test_cases': test_cases, 'changes': changes}
+
+async def stream_test_cases_with_gemini(description: str) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Stream test cases from Gemini as each one is completed
+    
+    Yields ("test_case", test_case) events while the model is still writing,
+    then a final ("suite", test_cases) or ("error", {"error": ...}) event.
+    Large descriptions are split like for /generate-test-cases: the first
+    section is streamed while the others generate in parallel, and the final
+    suite merges every section, so it is the same suite the JSON endpoint
+    would produce.
+    """
+    if not model_router.available:
+        yield 'error', {'error': NO_MODEL_BACKEND_ERROR}
+        return
+    
+    parts = prepare_description(description)
+    prompt = build_test_case_prompt(parts[0])
+    if not prompt:
+        yield 'error', {'error': 'Could not load test case prompt template'}
+        return
+    
+    parser = TestCaseStreamParser()
+    
+    logger.info(f"Streaming test cases from Gemini ({len(parts)} part(s))...")
+    others = [asyncio.ensure_future(generate_test_cases_for_section(part)) for part in parts[1:]]
+    try:
+        start = time.perf_counter()
+        async with generation_limiter.slot():
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + generation_limiter.timeout
+            chunks = model_router.stream(prompt, SUITE_RESPONSE_MODEL)
+            try:
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(chunks.__anext__(), timeout=deadline - loop.time())
+                    except StopAsyncIteration:
+                        break
+                    for test_case in parser.feed(chunk):
+                        yield 'test_case', test_case
+            except asyncio.TimeoutError:
+                GEMINI_REQUESTS.inc(mode='stream', outcome='rejected_504')
+                raise generation_limiter.timed_out()
+            except Exception as e:
+                GEMINI_REQUESTS.inc(mode='stream', outcome=type(e).__name__)
+                raise
+            finally:
+                await chunks.aclose()
+        GEMINI_REQUEST_SECONDS.observe(time.perf_counter() - start, mode='stream')
+        GEMINI_REQUESTS.inc(mode='stream', outcome='ok')
+        
+        # Parse the full text; a truncated stream still yields every completed test case
+        try:
+            extracted = parse_generated_suite(parser.text)
+        except SuiteExtractionError as e:
+            yield 'error', {'error': f'Invalid JSON response from Gemini: {str(e)}'}
+            return
+        test_cases = await repair_missing_test_cases(prompt, extracted)
+        
+        if others:
+            results = [test_cases, *await asyncio.gather(*others)]
+            error = failed_sections_error(results)
+            if error is not None:
+                yield 'error', error
+                return
+            test_cases = merge_test_suites(results)
+    finally:
+        # Only left running when the stream failed or its client went away
+        for task in others:
+            if task.done() and not task.cancelled():
+                task.exception()
+            task.cancel()
+    
+    yield 'suite', test_cases
+
+async def stream_generation(cache_key: str, description: str) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Stream a full generation, shared with identical concurrent requests
+    
+    The stream runs as a gemini_flight call, so /generate-test-cases, jobs and
+    other streams for the same prompt, model and description wait for it
+    instead of starting their own. A request that joins a generation already
+    in flight gets its test cases when that generation completes. Yields the
+    same events as ``stream_test_cases_with_gemini``.
+    """
+    streamed: asyncio.Queue = asyncio.Queue()
+    
+    async def generate() -> Dict[str, Any]:
+        result = {'error': 'Model stream ended without a test suite'}
+        async for kind, data in stream_test_cases_with_gemini(description):
+            if kind == 'test_case':
+                streamed.put_nowait(data)
+            else:
+                result = data
+        return result
+    
+    flight = asyncio.ensure_future(gemini_flight.do(cache_key, generate))
+    next_case: Optional[asyncio.Future] = None
+    sent = 0
+    try:
+        while not flight.done() or not streamed.empty():
+            next_case = asyncio.ensure_future(streamed.get())
+            await asyncio.wait({next_case, flight}, return_when=asyncio.FIRST_COMPLETED)
+            if not next_case.done():
+                next_case.cancel()
+                continue
+            sent += 1
+            yield 'test_case', next_case.result()
+        result = flight.result()
+        if 'error' in result:
+            yield 'error', result
+            return
+        for test_case in result.get('test_suite', {}).get('test_cases', [])[sent:]:
+            yield 'test_case', test_case
+        yield 'suite', result
+    finally:
+        # Only this request stops waiting; the shared generation keeps running for the others
+        flight.cancel()
+        if next_case is not None:
+            next_case.cancel()
+
+def suite_shape_error(test_cases: Dict[str, Any]) -> Optional[str]:
+    """Why a generated suite does not match the response schema, or None when it does"""
+    try:
+        TestSuiteDocument.model_validate(test_cases)
+    except ValidationError as e:
+        return f"Generated suite does not match the test suite schema: {e.error_count()} errors"
+    return None
+
+def update_flight_key(cache_key: str, previous: IssueSuite) -> Tuple[str, str, str]:
+    """Single-flight key of an incremental update, distinct from the full generation of the same description"""
+    return ('update', cache_key, content_hash(previous.description, json.dumps(previous.test_cases, sort_keys=True)))
+
+async def store_issue_suite(
+    issue_id: str, cache_key: str, description: str, updated_date: str, test_cases: Dict[str, Any]
+) -> None:
+    """Cache a suite by content and by issue, and index it for near-duplicate issues"""
+    def store() -> None:
+        suite_cache.put(cache_key, model_router.model_id, test_cases)
+        suite_cache.put_issue_suite(issue_id, model_router.model_id, description, updated_date, test_cases)
+        if similarity_index is not None:
+            similarity_index.add(issue_id, description)
+    await asyncio.to_thread(store)
+
+def find_similar_suite(issue_id: str, description: str) -> Optional[SimilarSuite]:
+    """The stored suite of the most similar other issue, if above SIMILARITY_ADAPT_THRESHOLD"""
+    for similar_id, similarity in similarity_index.query(description, exclude=issue_id):
+        if similarity < SIMILARITY_ADAPT_THRESHOLD:
+            break
+        # Suites generated by another model or prompt version are not served
+        suite = suite_cache.get_issue_suite(similar_id, model_router.model_id)
+        if suite is not None:
+            return SimilarSuite(issue_key=similar_id.rsplit('/', 1)[-1], similarity=similarity, suite=suite)
+    return None
+
+async def match_similar_suite(
+    issue_id: str, issue_key: str, cache_key: str, description: str, updated_date: str
+) -> Optional[SimilarSuite]:
+    """
+    Find a near-duplicate issue's suite for an issue that has none yet
+    
+    A match without any differing description block is stored as this
+    issue's suite and marked reused. Any other match is for the caller to
+    adapt with an incremental update: MinHash similarity alone can round a
+    one-word edit such as "must" to "must not" up to 1.0.
+    """
+    with span('similarity_lookup', issue_key=issue_key):
+        similar = await asyncio.to_thread(find_similar_suite, issue_id, description)
+    if similar is None:
+        SIMILAR_SUITES.inc(outcome='no_match')
+        return None
+    if not diff_descriptions(similar.suite.description, description).has_changes:
+        logger.info(f"Reusing the suite of {similar.issue_key} for {issue_key} (similarity {similar.similarity:.2f})")
+        similar.reused = True
+        await store_issue_suite(issue_id, cache_key, description, updated_date, similar.suite.test_cases)
+        SIMILAR_SUITES.inc(outcome='reused')
+        GENERATION_TOKENS_SAVED.inc(carried_over_tokens(similar.suite.test_cases), mode='reused')
+    return similar
+
+def record_similar_outcome(test_cases: Dict[str, Any], changes: Optional[Dict[str, List[str]]]) -> None:
+    """Count a generation that started from a similar issue's suite as adapted or regenerated"""
+    if changes is None:
+        SIMILAR_SUITES.inc(outcome='generated')
+    else:
+        SIMILAR_SUITES.inc(outcome='adapted')
+        GENERATION_TOKENS_SAVED.inc(carried_over_tokens(test_cases, changes), mode='adapted')
+
+def carried_over_tokens(test_cases: Dict[str, Any], changes: Optional[Dict[str, List[str]]] = None) -> int:
+    """Estimated output tokens of the test cases taken over rather than generated"""
+    regenerated = set(changes['added'] + changes['modified']) if changes else set()
+    kept = [
+        test_case for test_case in test_cases.get('test_suite', {}).get('test_cases', [])
+        if test_case.get('test_case_id') not in regenerated
+    ]
+    return estimate_tokens(json.dumps(kept))
+
+async def lookup_issue_suite(
+    issue_id: str, issue_key: str, description: str, force_regenerate: bool = False
+) -> Tuple[str, Optional[Dict[str, Any]], Optional[IssueSuite]]:
+    """Cache key, cached suite for this exact description, and the issue's previous suite"""
+    def lookup() -> Tuple[str, Optional[Dict[str, Any]], Optional[IssueSuite]]:
+        cache_key = suite_cache.make_key(load_test_case_prompt(), model_router.model_id, description)
+        cached_test_cases = None if force_regenerate else suite_cache.get(cache_key)
+        previous = None
+        if cached_test_cases is None and not force_regenerate:
+            previous = suite_cache.get_issue_suite(issue_id, model_router.model_id)
+            if previous is not None and previous.description == description:
+                cached_test_cases = previous.test_cases
+        return cache_key, cached_test_cases, previous
+    with span('suite_cache_lookup', issue_key=issue_key):
+        return await asyncio.to_thread(lookup)
+
+async def update_previous_suite(
+    issue_key: str, cache_key: str, previous: IssueSuite, description: str, origin: Optional[str] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Update a previous suite to an edited description
+    
+    Returns {'test_cases', 'changes'}, or None when the edit is too large or
+    the update failed and the suite should be regenerated in full.
+    """
+    diff = diff_descriptions(previous.description, description)
+    if not diff.has_changes or diff.changed_ratio > INCREMENTAL_MAX_CHANGED_RATIO:
+        return None
+    if origin is None:
+        origin = f"edited since {previous.updated_date or 'last generation'}"
+    logger.info(
+        f"{issue_key} {origin}: "
+        f"{len(diff.changed)} changed, {len(diff.added)} added, {len(diff.removed)} removed blocks"
+    )
+    with span('incremental_update', issue_key=issue_key):
+        result = await gemini_flight.do(
+            update_flight_key(cache_key, previous),
+            lambda: update_test_cases_with_gemini(previous.test_cases, diff, description)
+        )
+    if 'error' in result:
+        logger.warning(f"Incremental update failed for {issue_key}, regenerating: {result['error']}")
+        return None
+    return result
+
+async def generate_test_cases_for_issue(
+    issue_key: str, issue_details: Dict[str, Any], force_regenerate: bool = False, base_url: str = ''
+) -> TestCaseGenerationResponse:
+    """
+    Generate (or load cached) test cases for fetched Jira issue details
+    
+    When the issue already has a suite generated from an older description,
+    only the test cases affected by the edit are regenerated. A new issue
+    whose description is a near-duplicate of another issue's reuses that
+    suite, or adapts it the same way.
+    """
+    # Get the description for test case generation
+    description = issue_details.get('description', '')
+    title = issue_details.get('title', '')
+    
+    if not description:
+        return TestCaseGenerationResponse(
+            issue_key=issue_key,
+            title=title,
+            description=description,
+            error="No description found in the Jira issue. Cannot generate test cases without requirements."
+        )
+    
+    # Reuse a suite generated from the same prompt, model and description
+    issue_id = f"{base_url}/{issue_key}"
+    cache_key, cached_test_cases, previous = await lookup_issue_suite(issue_id, issue_key, description, force_regenerate)
+    if cached_test_cases is not None:
+        logger.info(f"Serving cached test cases for {issue_key}")
+        return TestCaseGenerationResponse(
+            issue_key=issue_key,
+            title=title,
+            description=description,
+            test_cases=cached_test_cases,
+            cached=True
+        )
+    
+    # Start from the suite of a near-duplicate issue when this one has none
+    similar = None
+    if previous is None and not force_regenerate and similarity_index is not None:
+        similar = await match_similar_suite(issue_id, issue_key, cache_key, description, issue_details.get('updated_date', ''))
+        if similar is not None and similar.reused:
+            return TestCaseGenerationResponse(
+                issue_key=issue_key,
+                title=title,
+                description=description,
+                test_cases=similar.suite.test_cases,
+                cached=True,
+                similar_issue=similar.issue_key,
+                similarity=similar.similarity
+            )
+        if similar is not None:
+            previous = similar.suite
+    
+    # Update the previous suite when only part of the description changed
+    test_cases = None
+    changes = None
+    if previous is not None:
+        origin = f"adapted from {similar.issue_key} (similarity {similar.similarity:.2f})" if similar else None
+        update = await update_previous_suite(issue_key, cache_key, previous, description, origin)
+        if update is not None:
+            test_cases, changes = update['test_cases'], update['changes']
+    
+    if test_cases is None:
+        # Generate test cases using Gemini, sharing the call with identical concurrent requests
+        with span('generate', issue_key=issue_key):
+            test_cases = await gemini_flight.do(cache_key, lambda: generate_test_cases_with_gemini(description))
+    
+    if 'error' in test_cases:
+        return TestCaseGenerationResponse(
+            issue_key=issue_key,
+            title=title,
+            description=description,
+            error=f"Failed to generate test cases: {test_cases['error']}",
+            transient=test_cases.get('transient', False)
+        )
+    shape_error = suite_shape_error(test_cases)
+    if shape_error:
+        logger.error(f"Not storing the suite for {issue_key}: {shape_error}")
+        return TestCaseGenerationResponse(
+            issue_key=issue_key,
+            title=title,
+            description=description,
+            error=f"Failed to generate test cases: {shape_error}"
+        )
+    
+    await store_issue_suite(issue_id, cache_key, description, issue_details.get('updated_date', ''), test_cases)
+    
+    response = TestCaseGenerationResponse(
+        issue_key=issue_key,
+        title=title,
+        description=description,
+        test_cases=test_cases,
+        changes=changes
+    )
+    if similar is not None:
+        record_similar_outcome(test_cases, changes)
+        if changes is not None:
+            response.similar_issue, response.similarity = similar.issue_key, similar.similarity
+    return response
+
+async def run_generation_job(job: Job, report_progress) -> Dict[str, Any]:
+    """Job handler: fetch the issue and generate its test cases"""
+    url = job.request['url']
+    url_info = parse_jira_url_params(url)
+    if not url_info['issue_key']:
+        raise ValueError("Could not extract issue key from URL. Please provide a valid Jira issue URL.")
+    
+    parsed_url = urlparse(url)
+    base_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
+    
+    report_progress('fetching_issue')
+    issue_details = await fetch_jira_issue_details_with_auth(url_info['issue_key'], base_url, JIRA_API_TOKEN, BACKGROUND)
+    if 'error' in issue_details:
+        message = f"Could not fetch Jira issue details: {issue_details['error']}"
+        raise TransientJobError(message) if issue_details.get('transient') else ValueError(message)
+    
+    if job.request.get('include_related'):
+        report_progress('fetching_related_issues')
+        issue_details = await load_requirement_context(url_info['issue_key'], issue_details, base_url, JIRA_API_TOKEN, BACKGROUND)
+        if 'error' in issue_details:
+            message = f"Could not fetch related Jira issues: {issue_details['error']}"
+            raise TransientJobError(message) if issue_details.get('transient') else ValueError(message)
+    
+    report_progress('generating_test_cases')
+    try:
+        response = await generate_test_cases_for_issue(
+            url_info['issue_key'], issue_details, job.request.get('force_regenerate', False), base_url=base_url
+        )
+    except GenerationRejected as e:
+        raise TransientJobError(str(e))
+    if response.error:
+        raise TransientJobError(response.error) if response.transient else ValueError(response.error)
+    
+    return response.model_dump()
 
 @app.get("/")
 async def root():
@@ -334,15 +1112,61 @@ async def root():
             "/parse": "POST - Parse Jira URL and extract parameters (uses env auth)",
             "/parse-with-auth": "POST - Parse Jira URL with optional authentication",
             "/generate-test-cases": "POST - Generate test cases from Jira URL using Gemini AI",
+            "/generate-test-cases/stream": "POST - Stream generated test cases as Server-Sent Events",
+            "/generate-test-cases/batch": "POST - Generate test cases for many issues or a JQL query (streamed NDJSON)",
+            "/jobs": "POST - Queue a background test case generation job",
+            "/jobs/{job_id}": "GET - Job status, progress and result",
             "/health": "GET - Health check",
-            "/config": "GET - Show current configuration"
+            "/ready": "GET - Readiness of the serving worker process",
+            "/config": "GET - Show current configuration",
+            "/cache/stats": "GET - Show Jira issue, generated suite cache and similarity index statistics",
+            "/metrics": "GET - Prometheus metrics"
         }
     }
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy", "service": "jira-url-parser"}
+    return {"status": "healthy", "service": "jira-url-parser", "worker_pid": os.getpid()}
+
+@app.get("/ready")
+async def readiness_check():
+    """
+    Readiness of the worker process that serves the request
+    
+    Checks that startup finished, the shared SQLite stores answer, the prompt
+    template is loaded, the job workers are running and the event loop is
+    keeping up. Model availability is reported but does not fail the check,
+    since an upstream outage affects every worker alike.
+    
+    Returns:
+        Per-check results; status 503 when any check fails
+    """
+    checks: Dict[str, Any] = {'started': jira_client is not None}
+    if checks['started']:
+        for name, probe in (('suite_cache', suite_cache.stats), ('job_store', job_queue.store.counts)):
+            try:
+                await asyncio.to_thread(probe)
+                checks[name] = True
+            except sqlite3.Error as e:
+                logger.error(f"Readiness check {name} failed: {e}")
+                checks[name] = False
+        checks['prompt_template'] = bool(TEST_CASE_PROMPT.text)
+        checks['job_workers'] = job_queue.alive_workers == job_queue.workers
+    checks['event_loop'] = event_loop_lag <= READINESS_MAX_LOOP_LAG_SECONDS
+    ready = all(checks.values())
+    body = {
+        "ready": ready,
+        "worker": {
+            "pid": os.getpid(),
+            "uptime_seconds": round(time.time() - worker_started_at, 1) if worker_started_at else 0.0,
+            "event_loop_lag_seconds": round(event_loop_lag, 4),
+            "in_flight_generations": generation_limiter.in_flight if generation_limiter else 0,
+            "model_backend_available": bool(model_router and model_router.available),
+        },
+        "checks": checks,
+    }
+    return JSONResponse(body, status_code=200 if ready else 503)
 
 @app.get("/config")
 async def get_config():
@@ -354,9 +1178,36 @@ async def get_config():
         "auth_token_length": len(JIRA_API_TOKEN) if JIRA_API_TOKEN else 0,
         "jira_email_configured": bool(JIRA_EMAIL),
         "authentication_ready": bool(JIRA_API_TOKEN and JIRA_EMAIL),
-        "gemini_api_configured": bool(GEMINI_API_KEY)
+        "gemini_api_configured": bool(GEMINI_API_KEY),
+        "gemini_structured_output": GEMINI_STRUCTURED_OUTPUT,
+        "model_backends": model_router.order
     }
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus metrics: latencies, upstream status codes, cache hit ratios and in-flight gauges"""
+    # Gauge callbacks query the SQLite stores
+    body = await asyncio.to_thread(render_metrics)
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
+@app.get("/cache/stats")
+async def get_cache_stats():
+    """Get cache hit/miss and request coalescing counters"""
+    def collect() -> Dict[str, Any]:
+        return {
+            "jira_issues": issue_cache.stats(),
+            "generated_suites": suite_cache.stats(),
+            "similarity_index": similarity_index.stats() if similarity_index is not None else None,
+            "single_flight": {"jira": jira_flight.stats(), "gemini": gemini_flight.stats()},
+            "jira_rate_limits": jira_client.scheduler.stats()
+        }
+    return await asyncio.to_thread(collect)
+
+@app.get("/models/stats")
+async def get_model_stats():
+    """Get per-backend circuit state, call counts, hedge wins and latency percentiles"""
+    return model_router.stats()
+
 @app.get("/test-jira")
 async def test_jira_connection():
     """Test Jira API connection"""
@@ -367,16 +1218,7 @@ async def test_jira_connection():
         # Test with a simple API call to get server info
         test_url = "https://infoedge.atlassian.net/rest/api/2/myself"
         
-        import base64
-        credentials = f"{JIRA_EMAIL}:{JIRA_API_TOKEN}"
-        encoded_credentials = base64.b64encode(credentials.encode()).decode()
-        
-        headers = {
-            'Accept': 'application/json',
-            'Authorization': f'Basic {encoded_credentials}'
-        }
-        
-        response = requests.get(test_url, headers=headers, timeout=10)
+        response = await jira_client.get(test_url, JIRA_API_TOKEN, operation='myself')
         
         return {
             "status_code": response.status_code,
@@ -418,7 +1260,7 @@ async def parse_jira_url(request: JiraUrlRequest):
         # Try to fetch detailed information from Jira REST API
         # Use environment auth token if available
         auth_token = JIRA_API_TOKEN
-        issue_details = fetch_jira_issue_details_with_auth(url_info['issue_key'], base_url, auth_token)
+        issue_details = await fetch_jira_issue_details_with_auth(url_info['issue_key'], base_url, auth_token)
         
         # Combine URL parsing results with API results
         response_data = {
@@ -468,7 +1310,7 @@ async def parse_jira_url_with_auth(request: JiraUrlRequestWithAuth):
         base_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
         
         # Try to fetch detailed information from Jira REST API with auth
-        issue_details = fetch_jira_issue_details_with_auth(url_info['issue_key'], base_url, auth_token)
+        issue_details = await fetch_jira_issue_details_with_auth(url_info['issue_key'], base_url, auth_token)
         
         # Combine URL parsing results with API results
         response_data = {
@@ -516,7 +1358,8 @@ async def generate_test_cases(request: TestCaseGenerationRequest):
         
         # Try to fetch detailed information from Jira REST API
         auth_token = JIRA_API_TOKEN
-        issue_details = fetch_jira_issue_details_with_auth(url_info['issue_key'], base_url, auth_token)
+        with span('fetch_issue', issue_key=url_info['issue_key']):
+            issue_details = await fetch_jira_issue_details_with_auth(url_info['issue_key'], base_url, auth_token)
         
         # Check if we got the issue details
         if 'error' in issue_details:
@@ -525,36 +1368,24 @@ async def generate_test_cases(request: TestCaseGenerationRequest):
                 error=f"Could not fetch Jira issue details: {issue_details['error']}"
             )
         
-        # Get the description for test case generation
-        description = issue_details.get('description', '')
-        title = issue_details.get('title', '')
-        
-        if not description:
-            return TestCaseGenerationResponse(
-                issue_key=url_info['issue_key'],
-                title=title,
-                description=description,
-                error="No description found in the Jira issue. Cannot generate test cases without requirements."
-            )
-        
-        # Generate test cases using Gemini
-        test_cases = generate_test_cases_with_gemini(description)
-        
-        if 'error' in test_cases:
-            return TestCaseGenerationResponse(
-                issue_key=url_info['issue_key'],
-                title=title,
-                description=description,
-                error=f"Failed to generate test cases: {test_cases['error']}"
-            )
+        if request.include_related:
+            issue_details = await load_requirement_context(url_info['issue_key'], issue_details, base_url, auth_token)
+            if 'error' in issue_details:
+                return TestCaseGenerationResponse(
+                    issue_key=url_info['issue_key'],
+                    error=f"Could not fetch related Jira issues: {issue_details['error']}"
+                )
         
-        return TestCaseGenerationResponse(
-            issue_key=url_info['issue_key'],
-            title=title,
-            description=description,
-            test_cases=test_cases
+        return await generate_test_cases_for_issue(
+            url_info['issue_key'], issue_details, request.force_regenerate, base_url=base_url
         )
         
+    except GenerationRejected as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
     except Exception as e:
         logger.error(f"Error generating test cases: {e}")
         raise HTTPException(
@@ -562,6 +1393,428 @@ async def generate_test_cases(request: TestCaseGenerationRequest):
             detail=f"Error processing request: {str(e)}"
         )
 
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/generate-test-cases/stream")
+async def generate_test_cases_stream(request: TestCaseGenerationRequest):
+    """
+    Generate test cases from a Jira URL, streaming each test case as it is produced
+    
+    Emits Server-Sent Events: "issue" with the issue details, one "test_case"
+    per completed test case, then "complete" with the full suite, or "error".
+    
+    Args:
+        request: TestCaseGenerationRequest containing the Jira URL
+        
+    Returns:
+        StreamingResponse of text/event-stream events
+    """
+    url = str(request.url)
+    logger.info(f"Streaming test cases for Jira URL: {url}")
+    
+    async def events():
+        try:
+            url_info = parse_jira_url_params(url)
+            if not url_info['issue_key']:
+                yield format_sse('error', {'error': "Could not extract issue key from URL. Please provide a valid Jira issue URL."})
+                return
+            
+            parsed_url = urlparse(url)
+            base_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
+            issue_key = url_info['issue_key']
+            issue_details = await fetch_jira_issue_details_with_auth(issue_key, base_url, JIRA_API_TOKEN)
+            if 'error' in issue_details:
+                yield format_sse('error', {'error': f"Could not fetch Jira issue details: {issue_details['error']}"})
+                return
+            
+            description = issue_details.get('description', '')
+            yield format_sse('issue', {'issue_key': issue_key, 'project_key': url_info['project_key'], 'url': url, **issue_details})
+            if request.include_related:
+                context = await load_requirement_context(issue_key, issue_details, base_url, JIRA_API_TOKEN)
+                if 'error' in context:
+                    yield format_sse('error', {'error': f"Could not fetch related Jira issues: {context['error']}"})
+                    return
+                description = context.get('description', '')
+            if not description:
+                yield format_sse('error', {'error': "No description found in the Jira issue. Cannot generate test cases without requirements."})
+                return
+            
+            issue_id = f"{base_url}/{issue_key}"
+            cache_key, cached_test_cases, previous = await lookup_issue_suite(
+                issue_id, issue_key, description, request.force_regenerate
+            )
+            if cached_test_cases is not None:
+                for test_case in cached_test_cases.get('test_suite', {}).get('test_cases', []):
+                    yield format_sse('test_case', test_case)
+                yield format_sse('complete', {'test_cases': cached_test_cases, 'cached': True})
+                return
+            
+            # A new issue can start from the suite of a near-duplicate issue
+            similar = None
+            if previous is None and not request.force_regenerate and similarity_index is not None:
+                similar = await match_similar_suite(issue_id, issue_key, cache_key, description, issue_details.get('updated_date', ''))
+                if similar is not None:
+                    previous = similar.suite
+            source = {'similar_issue': similar.issue_key, 'similarity': similar.similarity} if similar else {}
+            if similar is not None and similar.reused:
+                for test_case in previous.test_cases.get('test_suite', {}).get('test_cases', []):
+                    yield format_sse('test_case', test_case)
+                yield format_sse('complete', {'test_cases': previous.test_cases, 'cached': True, **source})
+                return
+            
+            # An edited issue gets its previous suite updated rather than streamed from scratch
+            update = None
+            if previous is not None:
+                origin = f"adapted from {similar.issue_key} (similarity {similar.similarity:.2f})" if similar else None
+                update = await update_previous_suite(issue_key, cache_key, previous, description, origin)
+            if update is not None:
+                test_cases, changes = update['test_cases'], update['changes']
+                shape_error = suite_shape_error(test_cases)
+                if shape_error:
+                    yield format_sse('error', {'error': f"Failed to generate test cases: {shape_error}"})
+                    return
+                await store_issue_suite(issue_id, cache_key, description, issue_details.get('updated_date', ''), test_cases)
+                if similar is not None:
+                    record_similar_outcome(test_cases, changes)
+                yield format_sse('changes', changes)
+                for test_case in test_cases.get('test_suite', {}).get('test_cases', []):
+                    yield format_sse('test_case', test_case)
+                yield format_sse('complete', {'test_cases': test_cases, 'cached': False, 'changes': changes, **source})
+                return
+            
+            async for kind, data in stream_generation(cache_key, description):
+                if kind == 'test_case':
+                    yield format_sse('test_case', data)
+                elif kind == 'suite':
+                    shape_error = suite_shape_error(data)
+                    if shape_error:
+                        yield format_sse('error', {'error': f"Failed to generate test cases: {shape_error}"})
+                        return
+                    await store_issue_suite(issue_id, cache_key, description, issue_details.get('updated_date', ''), data)
+                    if similar is not None:
+                        record_similar_outcome(data, None)
+                    yield format_sse('complete', {'test_cases': data, 'cached': False})
+                else:
+                    yield format_sse('error', {'error': f"Failed to generate test cases: {data['error']}"})
+        except GenerationRejected as e:
+            yield format_sse('error', {'error': str(e), 'retry_after': e.retry_after})
+        except Exception as e:
+            logger.error(f"Error streaming test cases: {e}")
+            yield format_sse('error', {'error': f"Error processing request: {str(e)}"})
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/generate-test-cases/batch")
+async def generate_test_cases_batch(request: BatchTestCaseGenerationRequest):
+    """
+    Generate test cases for many Jira issues (URLs, issue keys or a JQL query)
+    
+    Results are streamed as newline-delimited JSON in completion order, one
+    {"event": "result", ...} line per issue followed by a final summary line.
+    A failure on one issue is reported in its own result and does not stop the batch.
+    
+    Args:
+        request: BatchTestCaseGenerationRequest with the issues to cover
+        
+    Returns:
+        StreamingResponse of application/x-ndjson lines
+    """
+    auth_token = JIRA_API_TOKEN
+    max_issues = max(1, min(request.max_issues, BATCH_MAX_ISSUES))
+    default_base_url = str(request.base_url).rstrip('/') if request.base_url else JIRA_BASE_URL
+    
+    if not (request.urls or request.issue_keys or request.jql):
+        raise HTTPException(status_code=400, detail="Provide urls, issue_keys or jql")
+    if (request.issue_keys or request.jql) and not default_base_url:
+        raise HTTPException(status_code=400, detail="base_url is required when JIRA_BASE_URL is not configured")
+    
+    async def iterate_issues() -> AsyncIterator[Tuple[str, Optional[str], Optional[Dict[str, Any]]]]:
+        """Yield (issue_key, base_url, prefetched details) once for every requested issue"""
+        seen = set()
+        
+        def first_time(issue_key: str, base_url: Optional[str]) -> bool:
+            if (base_url, issue_key) in seen:
+                return False
+            seen.add((base_url, issue_key))
+            return True
+        
+        for url in request.urls:
+            url = str(url)
+            issue_key = parse_jira_url_params(url)['issue_key']
+            parsed_url = urlparse(url)
+            base_url = f"{parsed_url.scheme}://{parsed_url.netloc}" if issue_key else None
+            if first_time(issue_key or url, base_url):
+                yield issue_key or url, base_url, None
+        for issue_key in request.issue_keys:
+            if first_time(issue_key, default_base_url):
+                yield issue_key, default_base_url, None
+        if request.jql:
+            async for issue_key, details in search_jira_issues(request.jql, default_base_url, auth_token, max_issues):
+                if first_time(issue_key, default_base_url):
+                    yield issue_key, default_base_url, details
+    
+    async def process_issue(issue_key: str, base_url: Optional[str], details: Optional[Dict[str, Any]]) -> TestCaseGenerationResponse:
+        if base_url is None:
+            return TestCaseGenerationResponse(error=f"Could not extract issue key from URL: {issue_key}")
+        try:
+            if details is None:
+                details = await fetch_jira_issue_details_with_auth(issue_key, base_url, auth_token, BACKGROUND)
+                if 'error' in details:
+                    return TestCaseGenerationResponse(
+                        issue_key=issue_key,
+                        error=f"Could not fetch Jira issue details: {details['error']}"
+                    )
+            return await generate_test_cases_for_issue(issue_key, details, request.force_regenerate, base_url=base_url)
+        except GenerationRejected as e:
+            return TestCaseGenerationResponse(issue_key=issue_key, error=str(e))
+        except Exception as e:
+            logger.error(f"Error generating test cases for {issue_key}: {e}")
+            return TestCaseGenerationResponse(issue_key=issue_key, error=f"Error processing issue: {str(e)}")
+    
+    async def stream_results():
+        results: asyncio.Queue = asyncio.Queue()
+        slots = asyncio.Semaphore(BATCH_CONCURRENCY)
+        
+        async def worker(issue_key, base_url, details):
+            try:
+                await results.put(await process_issue(issue_key, base_url, details))
+            finally:
+                slots.release()
+        
+        async def produce():
+            tasks = []
+            try:
+                count = 0
+                async for item in iterate_issues():
+                    if count >= max_issues:
+                        break
+                    count += 1
+                    # Wait for a free slot so hundreds of issues never become hundreds of tasks at once
+                    await slots.acquire()
+                    tasks.append(asyncio.create_task(worker(*item)))
+                await asyncio.gather(*tasks)
+            except asyncio.CancelledError:
+                for task in tasks:
+                    task.cancel()
+                raise
+            except Exception as e:
+                logger.error(f"Batch generation aborted: {e.detail if isinstance(e, HTTPException) else e}")
+                await results.put(e)
+                # Issues already started still report their results before the summary
+                await asyncio.gather(*tasks, return_exceptions=True)
+            finally:
+                await results.put(None)
+        
+        producer = asyncio.create_task(produce())
+        total = succeeded = 0
+        try:
+            while True:
+                result = await results.get()
+                if result is None:
+                    break
+                if isinstance(result, Exception):
+                    detail = result.detail if isinstance(result, HTTPException) else str(result)
+                    yield json.dumps({"event": "error", "error": detail}) + "\n"
+                    continue
+                total += 1
+                succeeded += 0 if result.error else 1
+                yield json.dumps({"event": "result", **result.model_dump()}) + "\n"
+            yield json.dumps({"event": "summary", "total": total, "succeeded": succeeded, "failed": total - succeeded}) + "\n"
+        finally:
+            producer.cancel()
+    
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+@app.post("/jobs", response_model=JobSubmissionResponse, status_code=202)
+async def submit_generation_job(request: TestCaseGenerationRequest):
+    """
+    Queue a background test case generation job
+    
+    Identical requests that are still queued or running share the same job.
+    
+    Args:
+        request: TestCaseGenerationRequest containing the Jira URL
+        
+    Returns:
+        JobSubmissionResponse with the job id to poll or subscribe to
+    """
+    job, deduplicated = await job_queue.submit({
+        'url': str(request.url),
+        'force_regenerate': request.force_regenerate,
+        'include_related': request.include_related
+    })
+    return JobSubmissionResponse(job_id=job.id, status=job.status, deduplicated=deduplicated)
+
+async def get_job_or_404(job_id: str) -> Job:
+    job = await asyncio.to_thread(job_queue.store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+@app.get("/jobs/{job_id}")
+async def get_generation_job(job_id: str):
+    """Get a job's status, progress and (once finished) result"""
+    return (await get_job_or_404(job_id)).to_dict()
+
+@app.get("/jobs/{job_id}/events")
+async def stream_generation_job(job_id: str):
+    """Subscribe to a job's status changes as Server-Sent Events until it finishes"""
+    await get_job_or_404(job_id)
+    
+    async def events():
+        last_seen = None
+        while True:
+            job = await asyncio.to_thread(job_queue.store.get, job_id)
+            state = (job.status, job.progress, job.attempts)
+            if state != last_seen:
+                last_seen = state
+                yield format_sse('status', job.to_dict())
+            if job.status in (SUCCEEDED, FAILED):
+                return
+            await job_queue.wait_for_change(timeout=5)
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.get("/jobs/{job_id}/result")
+async def download_generation_job_result(job_id: str):
+    """Download the generated test cases of a completed job"""
+    job = await get_job_or_404(job_id)
+    if job.status != SUCCEEDED:
+        raise HTTPException(status_code=409, detail=f"Job {job_id} is {job.status}")
+    filename = f"test_cases_{job.result.get('issue_key') or job.id}.json"
+    return JSONResponse(job.result, headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+async def enqueue_prewarm_job(issue_key: str, request: Dict[str, Any]) -> None:
+    """Debouncer callback: queue background generation for an edited issue"""
+    job, deduplicated = await job_queue.submit(request)
+    logger.info(f"Pre-warming {issue_key}: job {job.id}{' (already queued)' if deduplicated else ''}")
+
+@app.post("/webhooks/jira", response_model=WebhookResponse, status_code=202)
+async def receive_jira_webhook(request: Request):
+    """
+    Receive Jira issue_created/issue_updated webhooks and pre-generate suites
+    
+    Events for watched projects and issue types are debounced per issue and
+    then queued as background jobs, so the suite is already cached when
+    someone opens the issue. Updates that do not touch the description or
+    summary are ignored.
+    
+    Args:
+        request: Raw Jira webhook delivery, signed with X-Hub-Signature using JIRA_WEBHOOK_SECRET
+        
+    Returns:
+        WebhookResponse saying whether generation was scheduled
+    """
+    if not JIRA_WEBHOOK_SECRET:
+        # Unsigned deliveries could queue generations for any issue
+        WEBHOOK_EVENTS.inc(event='unknown', outcome='rejected')
+        raise HTTPException(status_code=503, detail="Webhook receiver is disabled until JIRA_WEBHOOK_SECRET is set")
+    body = await request.body()
+    if not verify_signature(body, request.headers.get('X-Hub-Signature'), JIRA_WEBHOOK_SECRET):
+        WEBHOOK_EVENTS.inc(event='unknown', outcome='rejected')
+        raise HTTPException(status_code=401, detail="Invalid webhook signature")
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Webhook body is not JSON")
+    
+    event = payload.get('webhookEvent', 'unknown') if isinstance(payload, dict) else 'unknown'
+    issue = parse_issue_event(payload) if isinstance(payload, dict) else None
+    if issue is None:
+        WEBHOOK_EVENTS.inc(event=event, outcome='ignored')
+        return WebhookResponse(accepted=False, reason=f"Unsupported event {event}")
+    
+    reason = skip_reason(issue)
+    base_url = JIRA_BASE_URL
+    if issue.base_url:
+        # The job sends JIRA_API_TOKEN to this site, so the payload's issue URL must name a configured one
+        base_url = allowed_base_url(issue.base_url, [JIRA_BASE_URL, *WEBHOOK_ALLOWED_BASE_URLS])
+        if reason is None and base_url is None:
+            reason = f"Jira site {issue.base_url} is not JIRA_BASE_URL or listed in WEBHOOK_ALLOWED_BASE_URLS"
+    if reason is None and not base_url:
+        reason = "no Jira base URL in the payload and JIRA_BASE_URL is not set"
+    if reason is not None:
+        WEBHOOK_EVENTS.inc(event=event, outcome='skipped')
+        logger.info(f"Skipping webhook for {issue.issue_key}: {reason}")
+        return WebhookResponse(accepted=False, issue_key=issue.issue_key, reason=reason)
+    
+    # The pre-warm job must not be served the pre-edit copy from the fresh window
+    await asyncio.to_thread(issue_cache.invalidate, make_cache_key(base_url, issue.issue_key, JIRA_API_TOKEN))
+    # The updated timestamp keeps a later edit from being deduplicated into a job for the old description
+    run_in = webhook_debouncer.schedule(issue.issue_key, {
+        'url': f"{base_url}/browse/{issue.issue_key}",
+        'force_regenerate': False,
+        'updated': issue.updated
+    })
+    WEBHOOK_EVENTS.inc(event=event, outcome='scheduled')
+    return WebhookResponse(accepted=True, issue_key=issue.issue_key, run_in_seconds=round(run_in, 1))
+
+@app.get("/export")
+def export_test_suites(
+    format: str = 'csv',
+    source: str = 'cache',
+    project: Optional[str] = None,
+    issue_keys: Optional[str] = None,
+    job_ids: Optional[str] = None
+):
+    """
+    Stream generated suites as a file download
+    
+    Suites are read from the suite cache (latest suite per issue) or from
+    completed jobs a page at a time and serialized as they are read, so the
+    download starts immediately and memory stays flat however many suites match.
+    
+    Args:
+        format: csv, jsonl, xray, zephyr or testrail
+        source: cache or jobs
+        project: Only export issues of this project key
+        issue_keys: Comma-separated issue keys to export
+        job_ids: Comma-separated job ids (jobs source only)
+        
+    Returns:
+        StreamingResponse with the export file
+    """
+    export_format = EXPORT_FORMATS.get(format)
+    if export_format is None:
+        raise HTTPException(status_code=400, detail=f"Unknown format {format!r}, use one of: {', '.join(EXPORT_FORMATS)}")
+    if source not in ('cache', 'jobs'):
+        raise HTTPException(status_code=400, detail="source must be 'cache' or 'jobs'")
+    keys = [key.strip() for key in issue_keys.split(',') if key.strip()] if issue_keys else None
+    
+    def suites() -> Iterator[Tuple[str, Dict[str, Any]]]:
+        if source == 'cache':
+            for issue_id, test_cases in suite_cache.iter_issue_suites(project, keys):
+                yield issue_id.rsplit('/', 1)[-1], test_cases
+            return
+        ids = [job_id.strip() for job_id in job_ids.split(',') if job_id.strip()] if job_ids else None
+        for job in job_queue.store.iter_results(ids):
+            issue_key = job.result.get('issue_key') or ''
+            if project and not issue_key.startswith(f"{project}-"):
+                continue
+            if keys and issue_key not in keys:
+                continue
+            if job.result.get('test_cases'):
+                yield issue_key, job.result['test_cases']
+    
+    filename = f"test_cases_{project or 'export'}.{export_format.extension}"
+    # A sync generator is iterated in the threadpool, keeping SQLite reads off the event loop
+    return StreamingResponse(
+        export_format.serialize(suites()),
+        media_type=export_format.media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    if WEB_CONCURRENCY > 1:
+        # Worker processes import the app themselves and share state through local SQLite files
+        use_shared_state()
+        uvicorn.run("main:app", host="0.0.0.0", port=8000, workers=WEB_CONCURRENCY)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,268 @@
+import abc
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds, from fast cache reads up to slow LLM calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], *extra: str) -> str:
+    pairs = [f'{name}="{str(value)}"' for name, value in zip(names, values)]
+    pairs.extend(label for label in extra if label)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric(abc.ABC):
+    """Base class for a metric family with optional labels"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    @abc.abstractmethod
+    def render(self, const_labels: str = "") -> List[str]:
+        """Sample lines, each also carrying ``const_labels`` (pre-formatted ``name="value"`` pairs)"""
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self, const_labels: str = "") -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key, const_labels)} {value}" for key, value in items]
+
+
+class Gauge(Metric):
+    """Gauge whose values are either set directly or read from a callback at scrape time"""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        callback: Optional[Callable[[], Dict[LabelValues, float]]] = None,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._callback = callback
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def set_callback(self, callback: Callable[[], Dict[LabelValues, float]]) -> None:
+        self._callback = callback
+
+    def render(self, const_labels: str = "") -> List[str]:
+        if self._callback is not None:
+            try:
+                items = list(self._callback().items())
+            except Exception as e:
+                logger.warning(f"Could not collect gauge {self.name}: {e}")
+                items = []
+        else:
+            with self._lock:
+                items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key, const_labels)} {value}" for key, value in items]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        # Per label set: bucket counts, sum, count
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self, const_labels: str = "") -> List[str]:
+        with self._lock:
+            items = [(key, list(state)) for key, state in self._values.items()]
+        lines = []
+        for key, state in items:
+            for bound, count in zip(self.buckets, state):
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, const_labels, le)} {count}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, const_labels, le)} {state[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key, const_labels)} {state[-2]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key, const_labels)} {state[-1]}")
+        return lines
+
+
+class Registry:
+    """Metrics of this process; every sample is labelled with the worker's pid
+
+    Each worker process keeps its own values, so a scrape through a load
+    balancer sees one worker at a time. Scrape every worker, or aggregate by
+    dropping the ``worker`` label (``sum without (worker)``).
+    """
+
+    def __init__(self):
+        self._metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        # Read at scrape time: gunicorn and uvicorn workers import this module after forking or spawning
+        worker = f'worker="{os.getpid()}"'
+        for metric in self._metrics:
+            lines.extend(metric.header())
+            lines.extend(metric.render(worker))
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# HTTP endpoints
+HTTP_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "End-to-end latency per endpoint", ("method", "path", "status")
+))
+HTTP_ERRORS = REGISTRY.register(Counter(
+    "http_errors_total", "Unhandled errors per endpoint by exception type", ("path", "error_type")
+))
+
+# Upstream calls
+JIRA_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "jira_request_duration_seconds", "Jira REST API call latency", ("operation",)
+))
+JIRA_RESPONSES = REGISTRY.register(Counter(
+    "jira_responses_total", "Jira REST API responses by status code", ("operation", "status_code")
+))
+JIRA_ERRORS = REGISTRY.register(Counter(
+    "jira_errors_total", "Jira calls that failed without a response, by error type", ("error_type",)
+))
+JIRA_RETRIES = REGISTRY.register(Counter(
+    "jira_retries_total", "Jira requests retried, by status code or error type", ("operation", "reason")
+))
+JIRA_THROTTLE_WAIT_SECONDS = REGISTRY.register(Histogram(
+    "jira_throttle_wait_seconds", "Time spent waiting for a Jira rate-limit token", ("priority",),
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+))
+JIRA_RATE_LIMIT = REGISTRY.register(Gauge(
+    "jira_rate_limit_per_second", "Current adaptive request rate per Jira host", ("host",)
+))
+GEMINI_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "gemini_request_duration_seconds", "Gemini generation latency", ("mode",)
+))
+GEMINI_REQUESTS = REGISTRY.register(Counter(
+    "gemini_requests_total", "Gemini generations by outcome", ("mode", "outcome")
+))
+MODEL_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "model_backend_request_duration_seconds", "Generation latency per model backend", ("backend",)
+))
+MODEL_REQUESTS = REGISTRY.register(Counter(
+    "model_backend_requests_total", "Generations per model backend by outcome", ("backend", "outcome")
+))
+MODEL_HEDGES = REGISTRY.register(Counter(
+    "model_hedges_total", "Hedged generations fired on, and won by, each backend", ("backend", "result")
+))
+WEBHOOK_EVENTS = REGISTRY.register(Counter(
+    "webhook_events_total", "Jira webhook deliveries by event and outcome", ("event", "outcome")
+))
+MODEL_CIRCUIT_OPEN = REGISTRY.register(Gauge(
+    "model_circuit_open", "1 when a model backend's circuit breaker is open or half-open", ("backend",)
+))
+SIMILAR_SUITES = REGISTRY.register(Counter(
+    "similar_suite_lookups_total", "Similarity index lookups on a suite cache miss by outcome", ("outcome",)
+))
+GENERATION_TOKENS_SAVED = REGISTRY.register(Counter(
+    "generation_tokens_saved_total", "Estimated output tokens not generated thanks to a similar issue's suite", ("mode",)
+))
+SINGLEFLIGHT_COALESCED = REGISTRY.register(Counter(
+    "singleflight_coalesced_total", "Calls that joined an identical call already in flight", ("flight",)
+))
+
+# Pipeline stages and parsing
+PIPELINE_STAGE_SECONDS = REGISTRY.register(Histogram(
+    "pipeline_stage_duration_seconds", "Latency of each /generate-test-cases pipeline stage", ("stage",)
+))
+JSON_PARSE_SECONDS = REGISTRY.register(Histogram(
+    "json_parse_duration_seconds", "Time spent parsing and repairing model output", ("result",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+))
+
+# Caches and in-flight work (filled by callbacks registered at startup)
+CACHE_HIT_RATIO = REGISTRY.register(Gauge("cache_hit_ratio", "Cache hit ratio since startup", ("cache",)))
+CACHE_LOOKUPS = REGISTRY.register(Gauge("cache_lookups", "Cache lookups since startup by result", ("cache", "result")))
+IN_FLIGHT = REGISTRY.register(Gauge("in_flight", "Operations currently in flight", ("operation",)))
+EVENT_LOOP_LAG = REGISTRY.register(Gauge(
+    "event_loop_lag_seconds", "How late this worker's event loop last woke from a timer"
+))
+
+
+@contextmanager
+def span(stage: str, **fields: str) -> Iterator[None]:
+    """Time one pipeline stage, recording a histogram sample and a structured log line"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        PIPELINE_STAGE_SECONDS.observe(elapsed, stage=stage)
+        details = " ".join(f"{key}={value}" for key, value in fields.items())
+        logger.info(f"span stage={stage} duration_ms={elapsed * 1000:.1f} {details}".rstrip())
+
+
+def render_metrics() -> str:
+    """Render every registered metric in the Prometheus text exposition format"""
+    return REGISTRY.render()
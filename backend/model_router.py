@@ -0,0 +1,540 @@
+import abc
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, Type, TypeVar
+
+import httpx
+from pydantic import BaseModel
+
+from metrics import MODEL_HEDGES, MODEL_REQUEST_SECONDS, MODEL_REQUESTS
+from prompt_builder import estimate_tokens
+from schemas import response_schema
+
+logger = logging.getLogger(__name__)
+
+# Backends in priority order, as "kind:model" entries (kinds: gemini, openai, fake)
+MODEL_BACKENDS = os.getenv("MODEL_BACKENDS", "")
+# Optional separate order for prompts above MODEL_LARGE_PROMPT_TOKENS
+MODEL_LARGE_BACKENDS = os.getenv("MODEL_LARGE_BACKENDS", "")
+MODEL_LARGE_PROMPT_TOKENS = int(os.getenv("MODEL_LARGE_PROMPT_TOKENS", "4000"))
+
+# Hedging: fire the next backend when the first is slower than its recent latency percentile
+MODEL_HEDGE = os.getenv("MODEL_HEDGE", "true").lower() == "true"
+MODEL_HEDGE_PERCENTILE = float(os.getenv("MODEL_HEDGE_PERCENTILE", "0.95"))
+MODEL_HEDGE_MIN_SECONDS = float(os.getenv("MODEL_HEDGE_MIN_SECONDS", "2"))
+
+# Circuit breakers: open when the recent failure ratio is too high, probe again after a cooldown
+MODEL_BREAKER_WINDOW = int(os.getenv("MODEL_BREAKER_WINDOW", "20"))
+MODEL_BREAKER_MIN_REQUESTS = int(os.getenv("MODEL_BREAKER_MIN_REQUESTS", "5"))
+MODEL_BREAKER_FAILURE_RATIO = float(os.getenv("MODEL_BREAKER_FAILURE_RATIO", "0.5"))
+MODEL_BREAKER_COOLDOWN_SECONDS = float(os.getenv("MODEL_BREAKER_COOLDOWN_SECONDS", "30"))
+
+# OpenAI-compatible chat completions endpoint for "openai:<model>" backends
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
+
+# Samples kept per backend for latency percentiles
+LATENCY_WINDOW = 100
+
+T = TypeVar("T")
+
+
+class ModelBackend(abc.ABC):
+    """A text generation backend; instances are long-lived and reuse their clients"""
+
+    kind = "base"
+
+    def __init__(self, model: str):
+        self.model = model
+        self.name = f"{self.kind}:{model}"
+
+    @abc.abstractmethod
+    async def generate(self, prompt: str, response_model: Optional[Type[BaseModel]] = None) -> str:
+        """The full response text, as JSON matching ``response_model`` when one is given"""
+
+    async def stream(self, prompt: str, response_model: Optional[Type[BaseModel]] = None) -> AsyncIterator[str]:
+        """Stream the response text; backends without streaming yield it in one chunk"""
+        yield await self.generate(prompt, response_model)
+
+    async def aclose(self) -> None:
+        pass
+
+
+class GeminiBackend(ModelBackend):
+    """Google Gemini via google-generativeai, one GenerativeModel per response schema"""
+
+    kind = "gemini"
+
+    def __init__(self, model: str, api_key: str):
+        super().__init__(model)
+        import google.generativeai as genai
+
+        genai.configure(api_key=api_key)
+        self._genai = genai
+        self._models: Dict[Optional[Type[BaseModel]], Any] = {}
+
+    def _model(self, response_model: Optional[Type[BaseModel]]):
+        model = self._models.get(response_model)
+        if model is None:
+            genai = self._genai
+            generation_config = None
+            if response_model is not None:
+                generation_config = genai.GenerationConfig(
+                    response_mime_type="application/json",
+                    response_schema=response_schema(response_model)
+                )
+            model = self._models[response_model] = genai.GenerativeModel(self.model, generation_config=generation_config)
+        return model
+
+    async def generate(self, prompt: str, response_model: Optional[Type[BaseModel]] = None) -> str:
+        response = await self._model(response_model).generate_content_async(prompt)
+        return response.text
+
+    async def stream(self, prompt: str, response_model: Optional[Type[BaseModel]] = None) -> AsyncIterator[str]:
+        response = await self._model(response_model).generate_content_async(prompt, stream=True)
+        async for chunk in response:
+            yield chunk.text
+
+
+class OpenAICompatibleBackend(ModelBackend):
+    """Any OpenAI-compatible /chat/completions endpoint, over a pooled httpx client"""
+
+    kind = "openai"
+
+    def __init__(self, model: str, api_key: Optional[str] = OPENAI_API_KEY, base_url: str = OPENAI_BASE_URL, timeout: float = 120):
+        super().__init__(model)
+        self.base_url = base_url.rstrip('/')
+        self._client = httpx.AsyncClient(timeout=timeout, headers={"Authorization": f"Bearer {api_key}"})
+
+    async def generate(self, prompt: str, response_model: Optional[Type[BaseModel]] = None) -> str:
+        body: Dict[str, Any] = {"model": self.model, "messages": [{"role": "user", "content": prompt}]}
+        if response_model is not None:
+            body["response_format"] = {"type": "json_object"}
+        response = await self._client.post(f"{self.base_url}/chat/completions", json=body)
+        response.raise_for_status()
+        return response.json()["choices"][0]["message"]["content"]
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+class FakeBackend(ModelBackend):
+    """Local stand-in that returns a deterministic suite after a configurable delay
+
+    Used by benchmarks and local testing: ``latency`` and ``jitter`` are in
+    seconds and ``error_rate`` is the share of calls that raise.
+    """
+
+    kind = "fake"
+
+    def __init__(self, model: str = "default", latency: float = 0.2, jitter: float = 0.0, error_rate: float = 0.0, test_cases: int = 5):
+        super().__init__(model)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.test_cases = test_cases
+
+    def response_text(self, prompt: str, response_model: Optional[Type[BaseModel]] = None) -> str:
+        if response_model is not None and response_model.__name__ == 'TestSuiteUpdate':
+            return json.dumps({"added": [], "modified": [], "retired": []})
+        seed = hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:8]
+        test_cases = [
+            {
+                "test_case_id": f"TC_{number:03d}",
+                "title": f"Verify scenario {number} ({seed})",
+                "description": f"Generated by the fake backend for prompt {seed}",
+                "preconditions": ["System is available"],
+                "test_steps": [
+                    {"step_number": 1, "step_description": "Perform the action", "expected_result": "Action succeeds"}
+                ],
+                "test_data": {"input_data": "sample", "expected_output": "ok"},
+                "priority": ("High", "Medium", "Low")[number % 3],
+                "test_type": "Functional",
+                "estimated_duration": "5 minutes",
+            }
+            for number in range(1, self.test_cases + 1)
+        ]
+        return json.dumps({"test_suite": {
+            "suite_name": f"Fake suite {seed}",
+            "suite_description": "Deterministic suite from the fake model backend",
+            "total_test_cases": len(test_cases),
+            "test_cases": test_cases,
+        }})
+
+    async def _delay(self) -> None:
+        await asyncio.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+        if self.error_rate and random.random() < self.error_rate:
+            raise RuntimeError(f"{self.name} injected failure")
+
+    async def generate(self, prompt: str, response_model: Optional[Type[BaseModel]] = None) -> str:
+        await self._delay()
+        return self.response_text(prompt, response_model)
+
+    async def stream(self, prompt: str, response_model: Optional[Type[BaseModel]] = None) -> AsyncIterator[str]:
+        await self._delay()
+        text = self.response_text(prompt, response_model)
+        for start in range(0, len(text), 256):
+            await asyncio.sleep(0)
+            yield text[start:start + 256]
+
+
+class NoBackendAvailable(Exception):
+    """Raised when every backend's circuit is open or none is configured"""
+
+
+class CircuitOpen(NoBackendAvailable):
+    """Raised by ``CircuitBreaker.begin`` when the circuit turns a call away"""
+
+
+class CircuitBreaker:
+    """Failure-ratio circuit breaker over a sliding window of calls
+
+    Closed: calls pass. Open: calls are skipped until the cooldown elapses.
+    Half-open: one probe call is let through; success closes the circuit,
+    failure opens it again. The router checks ``allow`` when choosing
+    backends and calls ``begin`` only for the ones it actually tries;
+    ``begin`` claims the probe, so of several requests that saw the cooldown
+    elapse only the first one gets through.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(
+        self,
+        window: int = MODEL_BREAKER_WINDOW,
+        min_requests: int = MODEL_BREAKER_MIN_REQUESTS,
+        failure_ratio: float = MODEL_BREAKER_FAILURE_RATIO,
+        cooldown: float = MODEL_BREAKER_COOLDOWN_SECONDS,
+    ):
+        self.min_requests = min_requests
+        self.failure_ratio = failure_ratio
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self._results: Deque[bool] = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._probing = False
+
+    def allow(self) -> bool:
+        """Whether a call may be attempted now"""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            return time.monotonic() - self._opened_at >= self.cooldown
+        return not self._probing
+
+    def begin(self) -> bool:
+        """Start a call and return whether it is the half-open probe
+
+        Raises CircuitOpen while the circuit is open or another probe is running.
+        """
+        if self.state == self.OPEN:
+            if time.monotonic() - self._opened_at < self.cooldown:
+                raise CircuitOpen("circuit open")
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN:
+            if self._probing:
+                raise CircuitOpen("circuit half-open, probe in flight")
+            self._probing = True
+            return True
+        return False
+
+    def abandon(self, probe: bool) -> None:
+        """A call was cancelled before it could count as success or failure"""
+        if probe:
+            self._probing = False
+
+    def record(self, success: bool, probe: bool = False) -> None:
+        if probe:
+            self._probing = False
+            if success:
+                self.state = self.CLOSED
+                self._results.clear()
+            else:
+                self._open()
+            return
+        if self.state != self.CLOSED:
+            # Started before the circuit opened; the probe decides when it closes
+            return
+        self._results.append(success)
+        failures = self._results.count(False)
+        if len(self._results) >= self.min_requests and failures / len(self._results) >= self.failure_ratio:
+            self._open()
+
+    def _open(self) -> None:
+        self.state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._results.clear()
+
+
+class _BackendState:
+    """Router bookkeeping for one backend"""
+
+    def __init__(self, backend: ModelBackend):
+        self.backend = backend
+        self.breaker = CircuitBreaker()
+        self.latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self.calls = 0
+        self.failures = 0
+        self.hedges_won = 0
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def is_transient_status(status_code: int) -> bool:
+    """Whether an upstream HTTP status is worth retrying later (timeouts, rate limiting, server errors)"""
+    return status_code in (408, 429) or 500 <= status_code < 600
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """Whether a failed model or HTTP call is worth retrying later, judged by its type and status"""
+    if isinstance(error, NoBackendAvailable):
+        return True
+    if isinstance(error, httpx.HTTPStatusError):
+        return is_transient_status(error.response.status_code)
+    if isinstance(error, (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError, asyncio.TimeoutError)):
+        return True
+    try:
+        from google.api_core import exceptions as google_exceptions
+    except ImportError:
+        return False
+    # ResourceExhausted, ServiceUnavailable, DeadlineExceeded, ... carry their HTTP status as ``code``
+    return isinstance(error, google_exceptions.GoogleAPICallError) and is_transient_status(int(error.code or 0))
+
+
+class ModelRouter:
+    """
+    Route generations across model backends
+
+    Prompts are routed by size to an ordered list of backends, skipping any
+    whose circuit breaker is open. When hedging is on and the first backend
+    takes longer than its recent latency percentile, the next backend is
+    started as well and the first valid result wins. A backend that fails
+    (or returns output the caller's parser rejects) falls back to the next.
+    """
+
+    def __init__(
+        self,
+        backends: List[ModelBackend],
+        large_backends: Optional[List[ModelBackend]] = None,
+        large_prompt_tokens: int = MODEL_LARGE_PROMPT_TOKENS,
+        hedge: bool = MODEL_HEDGE,
+        hedge_percentile: float = MODEL_HEDGE_PERCENTILE,
+        hedge_min_seconds: float = MODEL_HEDGE_MIN_SECONDS,
+    ):
+        self._states: Dict[str, _BackendState] = {}
+        for backend in list(backends) + list(large_backends or []):
+            self._states.setdefault(backend.name, _BackendState(backend))
+        self.order = [backend.name for backend in backends]
+        self.large_order = [backend.name for backend in large_backends] if large_backends else self.order
+        self.large_prompt_tokens = large_prompt_tokens
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_seconds = hedge_min_seconds
+
+    @property
+    def available(self) -> bool:
+        return bool(self.order)
+
+    @property
+    def model_id(self) -> str:
+        """Identifies the configured backends, e.g. for cache keys"""
+        return ",".join(self.order)
+
+    def candidates(self, prompt: str) -> List[_BackendState]:
+        """Backends to try for a prompt, in order, skipping open circuits"""
+        order = self.large_order if estimate_tokens(prompt) > self.large_prompt_tokens else self.order
+        return [self._states[name] for name in order if self._states[name].breaker.allow()]
+
+    def hedge_delay(self, state: _BackendState) -> float:
+        observed = state.percentile(self.hedge_percentile)
+        return max(self.hedge_min_seconds, observed or 0.0)
+
+    async def _call(self, state: _BackendState, call: Callable[[], Awaitable[T]]) -> T:
+        # Raises CircuitOpen (the caller falls back) when another request is already probing
+        probe = state.breaker.begin()
+        state.calls += 1
+        start = time.perf_counter()
+        try:
+            result = await call()
+        except asyncio.CancelledError:
+            # Lost a hedge race; not the backend's fault
+            state.breaker.abandon(probe)
+            MODEL_REQUESTS.inc(backend=state.backend.name, outcome='cancelled')
+            raise
+        except Exception as e:
+            state.failures += 1
+            state.breaker.record(False, probe)
+            MODEL_REQUESTS.inc(backend=state.backend.name, outcome=type(e).__name__)
+            raise
+        elapsed = time.perf_counter() - start
+        state.latencies.append(elapsed)
+        state.breaker.record(True, probe)
+        MODEL_REQUEST_SECONDS.observe(elapsed, backend=state.backend.name)
+        MODEL_REQUESTS.inc(backend=state.backend.name, outcome='ok')
+        return result
+
+    async def generate(
+        self,
+        prompt: str,
+        response_model: Optional[Type[BaseModel]] = None,
+        parse: Optional[Callable[[str], T]] = None,
+    ) -> T:
+        """Generate with fallback and hedging, returning parse(text) (or the text)"""
+        candidates = self.candidates(prompt)
+        if not candidates:
+            raise NoBackendAvailable("No model backend available (all circuits open or none configured)")
+        parse = parse or (lambda text: text)
+
+        def attempt(state: _BackendState) -> "asyncio.Task[T]":
+            async def run() -> T:
+                text = await state.backend.generate(prompt, response_model)
+                return parse(text)
+            return asyncio.ensure_future(self._call(state, run))
+
+        pending: Dict["asyncio.Task[T]", _BackendState] = {}
+        remaining = list(candidates)
+        last_error: Optional[BaseException] = None
+        try:
+            state = remaining.pop(0)
+            pending[attempt(state)] = state
+            while pending:
+                timeout = None
+                if self.hedge and remaining and len(pending) == 1:
+                    timeout = self.hedge_delay(next(iter(pending.values())))
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # The running backend is slower than usual: hedge with the next one
+                    state = remaining.pop(0)
+                    MODEL_HEDGES.inc(backend=state.backend.name, result='fired')
+                    logger.info(f"Hedging generation on {state.backend.name}")
+                    pending[attempt(state)] = state
+                    continue
+                for task in done:
+                    finished = pending.pop(task)
+                    if task.exception() is None:
+                        if pending:
+                            finished.hedges_won += 1
+                            MODEL_HEDGES.inc(backend=finished.backend.name, result='won')
+                        return task.result()
+                    last_error = task.exception()
+                    if isinstance(last_error, CircuitOpen):
+                        logger.info(f"Skipping model backend {finished.backend.name}: {last_error}")
+                    else:
+                        logger.warning(f"Model backend {finished.backend.name} failed: {last_error}")
+                if not pending and remaining:
+                    # Fall back to the next backend
+                    state = remaining.pop(0)
+                    pending[attempt(state)] = state
+            raise last_error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def stream(self, prompt: str, response_model: Optional[Type[BaseModel]] = None) -> AsyncIterator[str]:
+        """
+        Stream from the first available backend
+
+        Streams are not hedged; a backend that fails before producing any
+        text falls back to the next one.
+        """
+        candidates = self.candidates(prompt)
+        if not candidates:
+            raise NoBackendAvailable("No model backend available (all circuits open or none configured)")
+        for index, state in enumerate(candidates):
+            try:
+                probe = state.breaker.begin()
+            except CircuitOpen:
+                if index == len(candidates) - 1:
+                    raise
+                continue
+            started = False
+            state.calls += 1
+            start = time.perf_counter()
+            try:
+                async for chunk in state.backend.stream(prompt, response_model):
+                    started = True
+                    yield chunk
+            except (asyncio.CancelledError, GeneratorExit):
+                # The consumer went away; a probe must not hold the half-open circuit
+                state.breaker.abandon(probe)
+                raise
+            except Exception as e:
+                state.failures += 1
+                state.breaker.record(False, probe)
+                MODEL_REQUESTS.inc(backend=state.backend.name, outcome=type(e).__name__)
+                if started or index == len(candidates) - 1:
+                    raise
+                logger.warning(f"Model backend {state.backend.name} failed before streaming, falling back: {e}")
+                continue
+            elapsed = time.perf_counter() - start
+            state.latencies.append(elapsed)
+            state.breaker.record(True, probe)
+            MODEL_REQUEST_SECONDS.observe(elapsed, backend=state.backend.name)
+            MODEL_REQUESTS.inc(backend=state.backend.name, outcome='ok')
+            return
+
+    def circuit_states(self) -> Dict[str, str]:
+        return {name: state.breaker.state for name, state in self._states.items()}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            name: {
+                "circuit": state.breaker.state,
+                "calls": state.calls,
+                "failures": state.failures,
+                "hedges_won": state.hedges_won,
+                "p50_seconds": state.percentile(0.5),
+                "p95_seconds": state.percentile(0.95),
+            }
+            for name, state in self._states.items()
+        }
+
+    async def aclose(self) -> None:
+        for state in self._states.values():
+            await state.backend.aclose()
+
+
+def create_backend(spec: str, gemini_api_key: Optional[str] = None) -> Optional[ModelBackend]:
+    """Build a backend from a "kind:model" spec, or None if it is not usable"""
+    kind, _, model = spec.strip().partition(':')
+    if kind == 'gemini':
+        if not gemini_api_key:
+            logger.warning(f"Skipping model backend {spec}: GEMINI_API_KEY is not set")
+            return None
+        return GeminiBackend(model or "gemini-2.0-flash-lite", gemini_api_key)
+    if kind == 'openai':
+        if not OPENAI_API_KEY:
+            logger.warning(f"Skipping model backend {spec}: OPENAI_API_KEY is not set")
+            return None
+        return OpenAICompatibleBackend(model or "gpt-4o-mini")
+    if kind == 'fake':
+        # fake[:latency_ms[:error_rate]]
+        parts = model.split(':') if model else []
+        latency = float(parts[0]) / 1000 if parts and parts[0] else 0.2
+        error_rate = float(parts[1]) if len(parts) > 1 else 0.0
+        return FakeBackend(f"{int(latency * 1000)}ms", latency=latency, error_rate=error_rate)
+    logger.warning(f"Unknown model backend kind in {spec!r}")
+    return None
+
+
+def create_router(default_model: str, gemini_api_key: Optional[str] = None) -> ModelRouter:
+    """Build the router from MODEL_BACKENDS/MODEL_LARGE_BACKENDS, defaulting to one Gemini model"""
+    def build(specs: str) -> List[ModelBackend]:
+        backends = [create_backend(spec, gemini_api_key) for spec in specs.split(',') if spec.strip()]
+        return [backend for backend in backends if backend is not None]
+
+    backends = build(MODEL_BACKENDS or f"gemini:{default_model}")
+    large_backends = build(MODEL_LARGE_BACKENDS) if MODEL_LARGE_BACKENDS else None
+    router = ModelRouter(backends, large_backends)
+    logger.info(f"Model backends: {router.order or 'none'}")
+    return router
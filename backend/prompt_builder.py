@@ -0,0 +1,189 @@
+import logging
+import os
+import re
+from typing import Optional, Dict, Any, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Prompt budget configuration (tokens are estimated, see estimate_tokens)
+PROMPT_SECTION_TOKENS = int(os.getenv("PROMPT_SECTION_TOKENS", "3000"))
+PROMPT_MAX_INPUT_TOKENS = int(os.getenv("PROMPT_MAX_INPUT_TOKENS", "12000"))
+PROMPT_MAX_SECTIONS = int(os.getenv("PROMPT_MAX_SECTIONS", "4"))
+PROMPT_MAX_BLOCK_LINES = int(os.getenv("PROMPT_MAX_BLOCK_LINES", "15"))
+
+# Roughly four characters per token for English prose and markup
+CHARS_PER_TOKEN = 4
+
+_BLOCK_PATTERN = re.compile(r'\{(code|noformat)(?::[^}]*)?\}(.*?)\{\1\}', re.DOTALL)
+_HEADING_PATTERN = re.compile(r'^\s*(?:h[1-6]\.|#{1,6})\s+(.+?)\s*$', re.MULTILINE)
+_LINK_PATTERN = re.compile(r'\[([^|\]]+)\|[^\]]+\]')
+_BARE_LINK_PATTERN = re.compile(r'\[(https?://[^\]]+)\]')
+# Jira image embeds (!screen.png!, !https://host/a.jpg|thumbnail!): a file name with an image extension,
+# so "a != b and c != d" or "Done! Ship it!" are kept
+_IMAGE_PATTERN = re.compile(r'![^!\s|][^!\n|]*\.(?:png|jpe?g|gif|bmp|svg|webp)(?:\|[^!\n]*)?!', re.IGNORECASE)
+_MACRO_PATTERN = re.compile(r'\{(?:color|panel|quote|expand|anchor|status)(?::[^}]*)?\}')
+_EMPHASIS_PATTERN = re.compile(r'(?<![\w*_])([*_+\-^~])(\S(?:.*?\S)?)\1(?![\w*_])')
+_MENTION_PATTERN = re.compile(r'\[~(?:accountid:)?[^\]]+\]')
+_TABLE_HEADER_PATTERN = re.compile(r'\|\|')
+_BLANK_LINES_PATTERN = re.compile(r'\n{3,}')
+_SPACES_PATTERN = re.compile(r'[ \t]+')
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate used for budgeting"""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _shorten_block(match: re.Match) -> str:
+    """Keep the head of pasted code/log blocks and drop the rest"""
+    lines = match.group(2).strip('\n').splitlines()
+    if len(lines) <= PROMPT_MAX_BLOCK_LINES:
+        return '\n'.join(lines)
+    kept = '\n'.join(lines[:PROMPT_MAX_BLOCK_LINES])
+    return f"{kept}\n[... {len(lines) - PROMPT_MAX_BLOCK_LINES} more lines omitted]"
+
+
+def normalize_description(description: str) -> str:
+    """Strip Jira wiki markup and noise, keeping the requirement text and headings"""
+    text = description.replace('\r\n', '\n')
+    text = _BLOCK_PATTERN.sub(_shorten_block, text)
+    text = _HEADING_PATTERN.sub(lambda m: f"## {m.group(1)}", text)
+    text = _LINK_PATTERN.sub(r'\1', text)
+    text = _BARE_LINK_PATTERN.sub(r'\1', text)
+    text = _IMAGE_PATTERN.sub('', text)
+    text = _MENTION_PATTERN.sub('', text)
+    text = _MACRO_PATTERN.sub('', text)
+    text = _EMPHASIS_PATTERN.sub(r'\2', text)
+    text = _TABLE_HEADER_PATTERN.sub('|', text)
+    text = _SPACES_PATTERN.sub(' ', text)
+    text = '\n'.join(line.strip() for line in text.split('\n'))
+    text = _BLANK_LINES_PATTERN.sub('\n\n', text)
+    return text.strip()
+
+
+def truncate_to_budget(text: str, max_tokens: int) -> str:
+    """Cut text to a token budget at a paragraph or line boundary"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    limit = max_tokens * CHARS_PER_TOKEN
+    cut = text.rfind('\n', 0, limit)
+    if cut < limit // 2:
+        cut = limit
+    return text[:cut].rstrip() + "\n[... truncated to fit the prompt budget]"
+
+
+def split_sections(text: str) -> List[Tuple[Optional[str], str]]:
+    """Split normalized text into (heading, body) sections"""
+    sections: List[Tuple[Optional[str], str]] = []
+    heading: Optional[str] = None
+    lines: List[str] = []
+    for line in text.split('\n'):
+        if line.startswith('## '):
+            if heading is not None or any(lines):
+                sections.append((heading, '\n'.join(lines).strip()))
+            heading, lines = line[3:], []
+        else:
+            lines.append(line)
+    if heading is not None or any(lines):
+        sections.append((heading, '\n'.join(lines).strip()))
+    return sections
+
+
+def _split_paragraphs(text: str, max_tokens: int) -> List[str]:
+    """Split a heading-less text into paragraph groups under a budget"""
+    chunks: List[str] = []
+    current: List[str] = []
+    for paragraph in text.split('\n\n'):
+        if current and estimate_tokens('\n\n'.join(current + [paragraph])) > max_tokens:
+            chunks.append('\n\n'.join(current))
+            current = []
+        current.append(paragraph)
+    if current:
+        chunks.append('\n\n'.join(current))
+    return chunks
+
+
+def prepare_description(
+    description: str,
+    section_tokens: int = PROMPT_SECTION_TOKENS,
+    max_input_tokens: int = PROMPT_MAX_INPUT_TOKENS,
+    max_sections: int = PROMPT_MAX_SECTIONS,
+) -> List[str]:
+    """
+    Normalize a description and split it into prompt-sized parts
+
+    Small descriptions come back as a single part. Large ones are split on
+    headings (or paragraphs when there are none) and packed into at most
+    ``max_sections`` parts of about ``section_tokens`` each, so every part
+    can be generated in parallel.
+    """
+    text = truncate_to_budget(normalize_description(description), max_input_tokens)
+    if estimate_tokens(text) <= section_tokens:
+        return [text]
+
+    sections = split_sections(text)
+    if len(sections) <= 1:
+        blocks = _split_paragraphs(text, section_tokens)
+    else:
+        blocks = [f"## {heading}\n{body}" if heading else body for heading, body in sections]
+
+    # Pack consecutive sections into parts under the per-part budget
+    parts: List[str] = []
+    for block in blocks:
+        block = truncate_to_budget(block, section_tokens)
+        if parts and estimate_tokens(parts[-1] + '\n\n' + block) <= section_tokens:
+            parts[-1] = parts[-1] + '\n\n' + block
+        else:
+            parts.append(block)
+
+    # Fold any overflow into the last allowed part
+    if len(parts) > max_sections:
+        overflow = '\n\n'.join(parts[max_sections - 1:])
+        parts = parts[:max_sections - 1] + [truncate_to_budget(overflow, section_tokens)]
+
+    logger.info(f"Split description (~{estimate_tokens(text)} tokens) into {len(parts)} parts")
+    return parts
+
+
+def build_repair_instructions(existing_titles: List[str], missing: int) -> str:
+    """Prompt suffix asking only for the test cases a previous response lost"""
+    listed = '\n'.join(f"- {title}" for title in existing_titles)
+    return (
+        f"\n\n**Test cases already written (do not repeat them):**\n{listed}\n\n"
+        f"Generate only {missing} additional test case(s) covering scenarios not listed above, "
+        f"in the same JSON format."
+    )
+
+
+def _dedup_key(test_case: Dict[str, Any]) -> str:
+    return re.sub(r'[^a-z0-9]+', ' ', str(test_case.get('title', '')).lower()).strip()
+
+
+def merge_test_suites(suites: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Merge per-section suites, dropping duplicate test cases and renumbering IDs"""
+    merged_cases: List[Dict[str, Any]] = []
+    seen = set()
+    suite_name = None
+    suite_description = None
+    for suite in suites:
+        test_suite = suite.get('test_suite', {})
+        suite_name = suite_name or test_suite.get('suite_name')
+        suite_description = suite_description or test_suite.get('suite_description')
+        for test_case in test_suite.get('test_cases', []):
+            key = _dedup_key(test_case)
+            if key and key in seen:
+                continue
+            seen.add(key)
+            merged_cases.append(test_case)
+
+    for number, test_case in enumerate(merged_cases, 1):
+        test_case['test_case_id'] = f"TC_{number:03d}"
+
+    return {
+        'test_suite': {
+            'suite_name': suite_name,
+            'suite_description': suite_description,
+            'total_test_cases': len(merged_cases),
+            'test_cases': merged_cases
+        }
+    }
@@ -0,0 +1,70 @@
+import logging
+import os
+import threading
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# How often a template checks its file for edits
+PROMPT_RELOAD_CHECK_SECONDS = float(os.getenv("PROMPT_RELOAD_CHECK_SECONDS", "2"))
+
+# Templates live next to the code, whatever the working directory
+PROMPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class PromptTemplate:
+    """A prompt template file kept in memory and reloaded when it changes
+
+    The file is read once; afterwards its mtime and size are checked at most
+    every ``check_interval`` seconds and the text is reread only when they
+    change. ``text`` returns the same string object until a reload, so callers
+    can memoize work derived from it by identity. A file that goes missing
+    keeps serving the last good text.
+    """
+
+    def __init__(self, filename: str, check_interval: float = PROMPT_RELOAD_CHECK_SECONDS):
+        self.path = filename if os.path.isabs(filename) else os.path.join(PROMPT_DIR, filename)
+        self.check_interval = check_interval
+        self.reloads = 0
+        self._text = ""
+        self._signature: Optional[tuple] = None
+        self._checked_at = float('-inf')
+        self._lock = threading.Lock()
+
+    @property
+    def text(self) -> str:
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_interval:
+            with self._lock:
+                if now - self._checked_at >= self.check_interval:
+                    self._refresh()
+                    self._checked_at = now
+        return self._text
+
+    def _refresh(self) -> None:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            if self._signature is not None or not self._text:
+                logger.error(f"{self.path} file not found")
+            self._signature = None
+            return
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature == self._signature:
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                self._text = file.read()
+        except Exception as e:
+            logger.error(f"Error loading prompt file: {e}")
+            return
+        if self._signature is not None:
+            logger.info(f"Reloaded prompt template {os.path.basename(self.path)}")
+        self._signature = signature
+        self.reloads += 1
+
+    def load(self) -> bool:
+        """Read the file now (at startup); returns whether a template is available"""
+        self._checked_at = float('-inf')
+        return bool(self.text)
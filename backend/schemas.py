@@ -0,0 +1,117 @@
+from typing import Any, Dict, Optional, List, Type, Union
+
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+
+# Values the prompt asks for; used as enums in the generation schema
+PRIORITIES = ("High", "Medium", "Low")
+TEST_TYPES = ("Functional", "Integration", "Performance", "Security", "UI")
+
+
+class TestStep(BaseModel):
+    model_config = ConfigDict(extra='allow')
+
+    step_number: Optional[int] = None
+    step_description: str = ""
+    expected_result: str = ""
+
+
+class TestData(BaseModel):
+    model_config = ConfigDict(extra='allow')
+
+    input_data: Optional[Union[str, dict, list]] = None
+    expected_output: Optional[Union[str, dict, list]] = None
+
+
+class TestCase(BaseModel):
+    model_config = ConfigDict(extra='allow')
+
+    test_case_id: str = ""
+    title: str = ""
+    description: str = ""
+    preconditions: List[str] = []
+    test_steps: List[TestStep] = []
+    test_data: Optional[TestData] = None
+    priority: str = Field("Medium", json_schema_extra={"enum": list(PRIORITIES)})
+    test_type: str = Field("Functional", json_schema_extra={"enum": list(TEST_TYPES)})
+    estimated_duration: Optional[str] = None
+
+    @field_validator('preconditions', mode='before')
+    @classmethod
+    def coerce_preconditions(cls, value):
+        """Models sometimes return a single precondition as a string"""
+        if value is None:
+            return []
+        if isinstance(value, str):
+            return [value] if value else []
+        return [str(item) for item in value]
+
+    @field_validator('test_steps', mode='before')
+    @classmethod
+    def coerce_test_steps(cls, value):
+        """Accept plain-string steps and number them"""
+        if value is None:
+            return []
+        return [
+            {'step_number': number, 'step_description': step} if isinstance(step, str) else step
+            for number, step in enumerate(value, 1)
+        ]
+
+
+class TestSuite(BaseModel):
+    model_config = ConfigDict(extra='allow')
+
+    suite_name: Optional[str] = None
+    suite_description: Optional[str] = None
+    total_test_cases: int = 0
+    test_cases: List[TestCase] = []
+
+
+class TestSuiteDocument(BaseModel):
+    """Top-level object the prompt asks the model to return"""
+
+    test_suite: TestSuite
+
+
+class TestSuiteUpdate(BaseModel):
+    """Changes the update prompt asks for when an issue description is edited"""
+
+    added: List[TestCase] = []
+    modified: List[TestCase] = []
+    retired: List[str] = []
+
+
+def _to_response_schema(node: Dict[str, Any], defs: Dict[str, Any]) -> Dict[str, Any]:
+    if '$ref' in node:
+        node = defs[node['$ref'].rsplit('/', 1)[-1]]
+    if 'anyOf' in node:
+        variants = [variant for variant in node['anyOf'] if variant.get('type') != 'null']
+        # Only Optional[...] is expressible; wider unions are requested as strings
+        schema = _to_response_schema(variants[0], defs) if len(variants) == 1 else {'type': 'string'}
+        if len(variants) < len(node['anyOf']):
+            schema['nullable'] = True
+        return schema
+
+    schema: Dict[str, Any] = {'type': node.get('type', 'string')}
+    if 'description' in node:
+        schema['description'] = node['description']
+    if 'enum' in node:
+        schema['format'] = 'enum'
+        schema['enum'] = node['enum']
+    if schema['type'] == 'array':
+        schema['items'] = _to_response_schema(node.get('items') or {}, defs)
+    if 'properties' in node:
+        schema['properties'] = {name: _to_response_schema(value, defs) for name, value in node['properties'].items()}
+        schema['required'] = [name for name, value in schema['properties'].items() if not value.get('nullable')]
+    return schema
+
+
+def response_schema(model: Type[BaseModel]) -> Dict[str, Any]:
+    """
+    Gemini response schema for a model
+
+    Converts the model's JSON schema to the OpenAPI subset Gemini accepts:
+    references are inlined, titles and defaults dropped, Optional fields
+    become nullable and every other field is required.
+    """
+    json_schema = model.model_json_schema()
+    return _to_response_schema(json_schema, json_schema.get('$defs', {}))
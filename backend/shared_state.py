@@ -0,0 +1,18 @@
+import os
+
+# Local SQLite files every worker process opens, so the Jira issue cache and
+# rate-limit budgets are shared (the suite cache and job store are files already)
+SHARED_STATE_DEFAULTS = {
+    "JIRA_ISSUE_CACHE_PATH": "jira_issue_cache.db",
+    "JIRA_RATE_LIMIT_STATE_PATH": "jira_rate_limits.db",
+}
+
+
+def use_shared_state() -> None:
+    """Point per-process state at the shared files unless configured otherwise
+
+    Call before worker processes import the app; explicit settings win.
+    """
+    for name, default in SHARED_STATE_DEFAULTS.items():
+        if not os.getenv(name):
+            os.environ[name] = default
@@ -0,0 +1,255 @@
+import argparse
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import zlib
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from prompt_builder import normalize_description
+from suite_cache import IssueSuite
+
+logger = logging.getLogger(__name__)
+
+# Reuse suites of near-duplicate issues (similarity is the estimated Jaccard index of word shingles)
+SIMILARITY_INDEX_ENABLED = os.getenv("SIMILARITY_INDEX_ENABLED", "true").lower() == "true"
+# Adapt the closest suite to the edit from this similarity (it is reused as is only when no block differs)
+SIMILARITY_ADAPT_THRESHOLD = float(os.getenv("SIMILARITY_ADAPT_THRESHOLD", "0.7"))
+# Signatures live next to the issue suites they describe
+SIMILARITY_INDEX_PATH = os.getenv("SIMILARITY_INDEX_PATH") or os.getenv("SUITE_CACHE_PATH", "suite_cache.db")
+
+SHINGLE_WORDS = 3
+NUM_PERMUTATIONS = 128
+# 16 bands of 8 rows: pairs above ~0.7 similarity share a band with high probability
+BANDS = 16
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+# Rows added or replaced since the band keys were last sorted are scanned; re-sort past this many
+REINDEX_MIN_ROWS = 1024
+
+_WORD_PATTERN = re.compile(r'\w+')
+# Smallest prime above 2**32, for the (a * x + b) mod p permutations of 32-bit shingle hashes
+_PRIME = np.uint64(4294967311)
+
+
+@dataclass
+class SimilarSuite:
+    """The stored suite of another issue with a similar description"""
+
+    issue_key: str
+    similarity: float
+    suite: IssueSuite
+    # Returned unchanged rather than adapted to the new description
+    reused: bool = False
+
+
+def _coefficients(label: str, count: int, bits: int) -> np.ndarray:
+    """Fixed pseudo-random coefficients; signatures are stored and compared across processes"""
+    return np.array([
+        int.from_bytes(hashlib.blake2b(f"{label}{i}".encode(), digest_size=8).digest(), 'little') >> (64 - bits)
+        for i in range(count)
+    ], dtype=np.uint64)
+
+
+# a < 2**31 and x < 2**32 keep a * x + b inside uint64
+_A = _coefficients('a', NUM_PERMUTATIONS, 31) | np.uint64(1)
+_B = _coefficients('b', NUM_PERMUTATIONS, 32)
+_BAND_WEIGHTS = _coefficients('w', ROWS_PER_BAND, 63) | np.uint64(1)
+
+
+def shingle_hashes(description: str) -> np.ndarray:
+    """32-bit hashes of the distinct word 3-grams of a normalized description"""
+    words = _WORD_PATTERN.findall(normalize_description(description).lower())
+    if len(words) < SHINGLE_WORDS:
+        grams = {' '.join(words)} if words else set()
+    else:
+        grams = {' '.join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+    return np.fromiter((zlib.crc32(gram.encode()) for gram in grams), dtype=np.uint64, count=len(grams))
+
+
+def minhash(description: str) -> Optional[np.ndarray]:
+    """MinHash signature of a description, or None when it has no words"""
+    hashes = shingle_hashes(description)
+    if hashes.size == 0:
+        return None
+    values = (np.outer(_A, hashes) + _B[:, None]) % _PRIME
+    return (values.min(axis=1) & np.uint64(0xFFFFFFFF)).astype(np.uint32)
+
+
+def band_keys(signatures: np.ndarray) -> np.ndarray:
+    """One 64-bit key per LSH band for each signature row"""
+    rows = signatures.reshape(-1, BANDS, ROWS_PER_BAND).astype(np.uint64)
+    return (rows * _BAND_WEIGHTS).sum(axis=2, dtype=np.uint64)
+
+
+class SimilarityIndex:
+    """MinHash/LSH index over the descriptions behind stored issue suites
+
+    Signatures are kept in SQLite, so every worker process sees suites the
+    others generate, and in NumPy arrays for lookups. Each band's keys are
+    kept sorted, so a query finds the rows sharing a band with 2 binary
+    searches per band (plus a scan of rows added since the last sort), then
+    ranks those candidates by the share of matching signature values.
+    """
+
+    def __init__(self, path: str = SIMILARITY_INDEX_PATH):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS suite_signatures (
+                issue_id TEXT PRIMARY KEY,
+                signature BLOB NOT NULL
+            )
+            """
+        )
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._signatures = np.empty((0, NUM_PERMUTATIONS), dtype=np.uint32)
+        self._bands = np.empty((0, BANDS), dtype=np.uint64)
+        self._sorted_keys = np.empty((BANDS, 0), dtype=np.uint64)
+        self._sorted_rows = np.empty((BANDS, 0), dtype=np.int64)
+        self._pending = np.empty(0, dtype=np.int64)
+        self._last_rowid = 0
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def add(self, issue_id: str, description: str) -> None:
+        """Index (or re-index) the description an issue's suite was generated from"""
+        self.add_many([(issue_id, description)])
+
+    def add_many(self, items: Iterable[Tuple[str, str]]) -> int:
+        """Index many (issue_id, description) pairs in one transaction"""
+        rows = []
+        for issue_id, description in items:
+            signature = minhash(description)
+            if signature is not None:
+                rows.append((issue_id, signature.tobytes()))
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany("INSERT OR REPLACE INTO suite_signatures VALUES (?, ?)", rows)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(rows)
+
+    def prune(self) -> int:
+        """Drop signatures whose issue suite is gone (when stored with the suite cache)"""
+        with self._lock:
+            if self._conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'issue_suites'").fetchone() is None:
+                return 0
+            return self._conn.execute(
+                "DELETE FROM suite_signatures WHERE issue_id NOT IN (SELECT issue_id FROM issue_suites)"
+            ).rowcount
+
+    def _reserve(self, size: int, used: int) -> None:
+        """Grow the arrays (doubling) to hold ``size`` rows, keeping the first ``used``"""
+        if size <= len(self._signatures):
+            return
+        capacity = max(size, 2 * len(self._signatures), 1024)
+        signatures = np.empty((capacity, NUM_PERMUTATIONS), dtype=np.uint32)
+        bands = np.empty((capacity, BANDS), dtype=np.uint64)
+        signatures[:used] = self._signatures[:used]
+        bands[:used] = self._bands[:used]
+        self._signatures, self._bands = signatures, bands
+
+    def refresh(self) -> int:
+        """Load signatures stored since the last refresh, by this or any other process"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT rowid, issue_id, signature FROM suite_signatures WHERE rowid > ? ORDER BY rowid",
+                (self._last_rowid,),
+            ).fetchall()
+            if not rows:
+                return 0
+            self._last_rowid = rows[-1][0]
+            signatures = np.frombuffer(b''.join(row[2] for row in rows), dtype=np.uint32).reshape(-1, NUM_PERMUTATIONS)
+            used = len(self._ids)
+            positions = []
+            for _, issue_id, _ in rows:
+                position = self._rows.get(issue_id)
+                if position is None:
+                    position = self._rows[issue_id] = len(self._ids)
+                    self._ids.append(issue_id)
+                positions.append(position)
+            self._reserve(len(self._ids), used)
+            self._signatures[positions] = signatures
+            self._bands[positions] = band_keys(signatures)
+            self._pending = np.union1d(self._pending, positions)
+            if len(self._pending) > max(REINDEX_MIN_ROWS, len(self._ids) // 8):
+                self._reindex()
+        return len(rows)
+
+    def _reindex(self) -> None:
+        """Sort every band's keys (with their rows) for binary search"""
+        bands = self._bands[:len(self._ids)]
+        order = np.argsort(bands, axis=0, kind='stable')
+        self._sorted_rows = np.ascontiguousarray(order.T)
+        self._sorted_keys = np.ascontiguousarray(np.take_along_axis(bands, order, axis=0).T)
+        self._pending = np.empty(0, dtype=np.int64)
+
+    def query(self, description: str, exclude: Optional[str] = None, limit: int = 5) -> List[Tuple[str, float]]:
+        """The indexed issues most similar to a description, as (issue_id, similarity), best first"""
+        self.refresh()
+        signature = minhash(description)
+        if signature is None:
+            return []
+        bands = band_keys(signature)[0]
+        with self._lock:
+            # Replaced rows keep their old keys in the sorted bands too; ranking drops those
+            found = [self._pending[(self._bands[self._pending] == bands).any(axis=1)]]
+            for keys, rows, key in zip(self._sorted_keys, self._sorted_rows, bands):
+                found.append(rows[keys.searchsorted(key, 'left'):keys.searchsorted(key, 'right')])
+            candidates = np.unique(np.concatenate(found))
+            if candidates.size == 0:
+                return []
+            similarities = (self._signatures[candidates] == signature).mean(axis=1)
+            order = np.argsort(-similarities, kind='stable')
+            matches = [(self._ids[candidates[i]], float(similarities[i])) for i in order[:limit + 1]]
+        return [match for match in matches if match[0] != exclude][:limit]
+
+    def stats(self) -> Dict[str, float]:
+        self.refresh()
+        return {
+            'entries': len(self._ids),
+            'memory_bytes': sum(array.nbytes for array in (
+                self._signatures, self._bands, self._sorted_keys, self._sorted_rows
+            )),
+            'adapt_threshold': SIMILARITY_ADAPT_THRESHOLD,
+        }
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def rebuild(suite_cache_path: str, index_path: str = SIMILARITY_INDEX_PATH) -> int:
+    """Index every stored issue suite (run offline after enabling the index on an existing cache)"""
+    source = sqlite3.connect(suite_cache_path)
+    index = SimilarityIndex(index_path)
+    try:
+        total = 0
+        cursor = source.execute("SELECT issue_id, description FROM issue_suites")
+        while True:
+            rows = cursor.fetchmany(1000)
+            if not rows:
+                return total
+            total += index.add_many(rows)
+    finally:
+        index.close()
+        source.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the similarity index from the stored issue suites")
+    parser.add_argument("--suite-cache", default=os.getenv("SUITE_CACHE_PATH", "suite_cache.db"))
+    parser.add_argument("--index", default=SIMILARITY_INDEX_PATH)
+    args = parser.parse_args()
+    print(f"Indexed {rebuild(args.suite_cache, args.index)} issue suites")
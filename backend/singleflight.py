@@ -0,0 +1,52 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar, Any
+
+from metrics import SINGLEFLIGHT_COALESCED
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Coalesce concurrent identical calls into one upstream call
+
+    The first caller for a key starts the call; callers arriving while it is
+    in flight wait for and share its result (or exception). The call runs as
+    its own task, so a leader whose client disconnects does not cancel it for
+    everyone else.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.executions = 0
+        self.coalesced = 0
+        self._in_flight: Dict[Hashable, "asyncio.Task[Any]"] = {}
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            SINGLEFLIGHT_COALESCED.inc(flight=self.name)
+            logger.info(f"Coalesced {self.name} call for {key}")
+        else:
+            self.executions += 1
+            task = asyncio.ensure_future(call())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: "asyncio.Task[Any]") -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Mark the exception as retrieved when every waiter has gone away
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._in_flight),
+        }
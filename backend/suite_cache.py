@@ -0,0 +1,222 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, Iterator, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Generated suite cache configuration
+SUITE_CACHE_PATH = os.getenv("SUITE_CACHE_PATH", "suite_cache.db")
+SUITE_CACHE_MAX_ENTRIES = int(os.getenv("SUITE_CACHE_MAX_ENTRIES", "5000"))
+SUITE_CACHE_MAX_AGE_SECONDS = float(os.getenv("SUITE_CACHE_MAX_AGE_SECONDS", str(30 * 24 * 3600)))
+
+
+def content_hash(*parts: str) -> str:
+    """Hash a sequence of strings into a stable hex digest"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def _escape_like(value: str) -> str:
+    """Escape LIKE wildcards; project keys may contain underscores"""
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+@dataclass
+class IssueSuite:
+    """The latest suite generated for an issue and the description it came from"""
+
+    description: str
+    updated_date: str
+    test_cases: Dict[str, Any]
+
+
+class SuiteCache:
+    """Persistent content-addressed cache of generated test suites
+
+    Suites are keyed by a hash of (prompt template, model name, description).
+    Editing the prompt template changes every key, and the first lookup that
+    sees a new template purges suites generated from the old one.
+
+    It also keeps the latest suite per issue together with its description,
+    so an edited issue can be updated incrementally instead of regenerated.
+    """
+
+    def __init__(
+        self,
+        path: str = SUITE_CACHE_PATH,
+        max_entries: int = SUITE_CACHE_MAX_ENTRIES,
+        max_age_seconds: float = SUITE_CACHE_MAX_AGE_SECONDS,
+    ):
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_seconds
+        self.hits = 0
+        self.misses = 0
+        self._prompt_hash: Optional[str] = None
+        self._prompt_template: Optional[str] = None
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS generated_suites (
+                cache_key TEXT PRIMARY KEY,
+                prompt_hash TEXT NOT NULL,
+                model TEXT NOT NULL,
+                test_cases TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS generated_suites_accessed ON generated_suites (accessed_at)")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS issue_suites (
+                issue_id TEXT PRIMARY KEY,
+                prompt_hash TEXT NOT NULL,
+                model TEXT NOT NULL,
+                description TEXT NOT NULL,
+                updated_date TEXT NOT NULL,
+                test_cases TEXT NOT NULL,
+                stored_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS issue_suites_stored ON issue_suites (stored_at)")
+
+    def make_key(self, prompt_template: str, model: str, description: str) -> str:
+        """Build the cache key, purging suites generated from an older prompt"""
+        # The template is the same string object until its file is reloaded, so hash it once
+        if prompt_template is self._prompt_template:
+            return content_hash(self._prompt_hash, model, description)
+        prompt_hash = content_hash(prompt_template)
+        if prompt_hash != self._prompt_hash:
+            with self._lock:
+                deleted = self._conn.execute(
+                    "DELETE FROM generated_suites WHERE prompt_hash != ?", (prompt_hash,)
+                ).rowcount
+                self._conn.execute("DELETE FROM issue_suites WHERE prompt_hash != ?", (prompt_hash,))
+            if deleted:
+                logger.info(f"Prompt template changed, invalidated {deleted} cached suites")
+            self._prompt_hash = prompt_hash
+        self._prompt_template = prompt_template
+        return content_hash(prompt_hash, model, description)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get a cached suite that has not outlived the max age"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT test_cases FROM generated_suites WHERE cache_key = ? AND created_at >= ?",
+                (key, now - self.max_age_seconds),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE generated_suites SET accessed_at = ? WHERE cache_key = ?", (now, key))
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key: str, model: str, test_cases: Dict[str, Any]) -> None:
+        """Store a suite and evict entries beyond the age and size bounds"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO generated_suites VALUES (?, ?, ?, ?, ?, ?)",
+                (key, self._prompt_hash, model, json.dumps(test_cases), now, now),
+            )
+            self._conn.execute(
+                "DELETE FROM generated_suites WHERE created_at < ?", (now - self.max_age_seconds,)
+            )
+            self._conn.execute(
+                """
+                DELETE FROM generated_suites WHERE cache_key IN (
+                    SELECT cache_key FROM generated_suites ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            )
+
+    def get_issue_suite(self, issue_id: str, model: str) -> Optional[IssueSuite]:
+        """Get the latest suite generated for an issue with the current prompt and model"""
+        with self._lock:
+            row = self._conn.execute(
+                """
+                SELECT description, updated_date, test_cases FROM issue_suites
+                WHERE issue_id = ? AND prompt_hash = ? AND model = ? AND stored_at >= ?
+                """,
+                (issue_id, self._prompt_hash, model, time.time() - self.max_age_seconds),
+            ).fetchone()
+        if row is None:
+            return None
+        return IssueSuite(description=row[0], updated_date=row[1], test_cases=json.loads(row[2]))
+
+    def put_issue_suite(self, issue_id: str, model: str, description: str, updated_date: str, test_cases: Dict[str, Any]) -> None:
+        """Record the suite an issue now has and the description it was generated from"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO issue_suites VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (issue_id, self._prompt_hash, model, description, updated_date or '', json.dumps(test_cases), now),
+            )
+            self._conn.execute(
+                """
+                DELETE FROM issue_suites WHERE issue_id IN (
+                    SELECT issue_id FROM issue_suites ORDER BY stored_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            )
+
+    def iter_issue_suites(
+        self, project: Optional[str] = None, issue_keys: Optional[List[str]] = None, page_size: int = 100
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Yield (issue_id, test_cases) for stored issue suites, a page at a time
+
+        Pages are read by keyset on issue_id so the lock is only held per page
+        and memory stays bounded however many suites are stored.
+        """
+        conditions = ["stored_at >= ?"]
+        params: List[Any] = [time.time() - self.max_age_seconds]
+        if project:
+            conditions.append("issue_id LIKE ? ESCAPE '\\'")
+            params.append(f"%/{_escape_like(project)}-%")
+        if issue_keys:
+            conditions.append("(" + " OR ".join("issue_id LIKE ? ESCAPE '\\'" for _ in issue_keys) + ")")
+            params.extend(f"%/{_escape_like(issue_key)}" for issue_key in issue_keys)
+        where = " AND ".join(conditions)
+        last_id = ''
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT issue_id, test_cases FROM issue_suites WHERE issue_id > ? AND {where} ORDER BY issue_id LIMIT ?",
+                    (last_id, *params, page_size),
+                ).fetchall()
+            for issue_id, test_cases in rows:
+                yield issue_id, json.loads(test_cases)
+            if len(rows) < page_size:
+                return
+            last_id = rows[-1][0]
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM generated_suites").fetchone()[0]
+        return {
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def close(self) -> None:
+        self._conn.close()
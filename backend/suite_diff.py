@@ -0,0 +1,145 @@
+import difflib
+import json
+import logging
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Tuple
+
+from prompt_builder import normalize_description, split_sections
+from schemas import TestSuiteUpdate
+
+logger = logging.getLogger(__name__)
+
+# Above this share of changed requirement blocks a full regeneration is cheaper than an update
+INCREMENTAL_MAX_CHANGED_RATIO = float(os.getenv("INCREMENTAL_MAX_CHANGED_RATIO", "0.5"))
+
+_CASE_NUMBER = re.compile(r'(\d+)$')
+
+
+@dataclass
+class DescriptionDiff:
+    """Requirement blocks added, changed and removed between two descriptions"""
+
+    added: List[str] = field(default_factory=list)
+    changed: List[Tuple[str, str]] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    unchanged: int = 0
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+    @property
+    def changed_ratio(self) -> float:
+        """Share of blocks touched by the edit"""
+        touched = len(self.added) + len(self.changed) + len(self.removed)
+        total = touched + self.unchanged
+        return touched / total if total else 0.0
+
+
+def description_blocks(description: str) -> List[str]:
+    """Split a description into comparable blocks: heading sections, or paragraphs when there are none"""
+    text = normalize_description(description)
+    sections = split_sections(text)
+    if any(heading for heading, _ in sections):
+        return [f"## {heading}\n{body}" if heading else body for heading, body in sections if heading or body]
+    return [paragraph.strip() for paragraph in text.split('\n\n') if paragraph.strip()]
+
+
+def diff_descriptions(old: str, new: str) -> DescriptionDiff:
+    """Diff two descriptions block by block"""
+    old_blocks = description_blocks(old)
+    new_blocks = description_blocks(new)
+    diff = DescriptionDiff()
+    matcher = difflib.SequenceMatcher(None, old_blocks, new_blocks, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            diff.unchanged += i2 - i1
+        elif tag == 'insert':
+            diff.added.extend(new_blocks[j1:j2])
+        elif tag == 'delete':
+            diff.removed.extend(old_blocks[i1:i2])
+        else:
+            old_text = '\n\n'.join(old_blocks[i1:i2])
+            new_text = '\n\n'.join(new_blocks[j1:j2])
+            diff.changed.append((old_text, new_text))
+    return diff
+
+
+def format_changes(diff: DescriptionDiff) -> str:
+    """Render a description diff for the update prompt"""
+    parts: List[str] = []
+    for old_text, new_text in diff.changed:
+        parts.append(f"### Changed requirement\nBefore:\n{old_text}\n\nAfter:\n{new_text}")
+    for text in diff.added:
+        parts.append(f"### New requirement\n{text}")
+    for text in diff.removed:
+        parts.append(f"### Removed requirement\n{text}")
+    return '\n\n'.join(parts)
+
+
+def summarize_test_cases(test_cases: Dict[str, Any]) -> str:
+    """Compact listing of existing test cases (ID, title, description) for the update prompt"""
+    summary = [
+        {
+            'test_case_id': test_case.get('test_case_id'),
+            'title': test_case.get('title'),
+            'description': test_case.get('description'),
+        }
+        for test_case in test_cases.get('test_suite', {}).get('test_cases', [])
+    ]
+    return json.dumps(summary, indent=1)
+
+
+def _case_number(test_case_id: str) -> int:
+    match = _CASE_NUMBER.search(test_case_id or '')
+    return int(match.group(1)) if match else 0
+
+
+def apply_suite_update(
+    test_cases: Dict[str, Any], update: TestSuiteUpdate
+) -> Tuple[Dict[str, Any], Dict[str, List[str]]]:
+    """
+    Apply added/modified/retired test cases to a suite, keeping existing IDs
+
+    Modified cases replace the case with the same ID in place, retired IDs
+    are dropped, and added cases get new IDs after the highest existing one,
+    so no surviving case is ever renumbered.
+    """
+    suite = test_cases.get('test_suite', {})
+    existing = [dict(test_case) for test_case in suite.get('test_cases', [])]
+    known_ids = {test_case.get('test_case_id') for test_case in existing}
+    retired = [test_case_id for test_case_id in update.retired if test_case_id in known_ids]
+    next_number = max((_case_number(test_case_id) for test_case_id in known_ids), default=0) + 1
+
+    by_id = {test_case.get('test_case_id'): i for i, test_case in enumerate(existing)}
+    modified: List[str] = []
+    added_cases = list(update.added)
+    for test_case in update.modified:
+        index = by_id.get(test_case.test_case_id)
+        if index is None or test_case.test_case_id in retired:
+            # The model modified a case we never had; keep it as a new one
+            added_cases.append(test_case)
+            continue
+        existing[index] = test_case.model_dump(exclude_none=True)
+        modified.append(test_case.test_case_id)
+
+    retired_set = set(retired)
+    updated_cases = [test_case for test_case in existing if test_case.get('test_case_id') not in retired_set]
+    added: List[str] = []
+    for test_case in added_cases:
+        test_case_id = f"TC_{next_number:03d}"
+        next_number += 1
+        updated_cases.append({**test_case.model_dump(exclude_none=True), 'test_case_id': test_case_id})
+        added.append(test_case_id)
+
+    updated = {
+        'test_suite': {
+            **{key: value for key, value in suite.items() if key != 'test_cases'},
+            'total_test_cases': len(updated_cases),
+            'test_cases': updated_cases,
+        }
+    }
+    logger.info(f"Applied suite update: {len(added)} added, {len(modified)} modified, {len(retired)} retired")
+    return updated, {'added': added, 'modified': modified, 'retired': retired}
@@ -0,0 +1,195 @@
+import csv
+import io
+import json
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from xml.sax.saxutils import escape
+
+CSV_COLUMNS = (
+    "issue_key", "suite_name", "test_case_id", "title", "description", "preconditions",
+    "step_number", "step_description", "expected_result", "input_data", "expected_output",
+    "priority", "test_type", "estimated_duration",
+)
+
+
+class ExportFormat(NamedTuple):
+    """How one export format is served"""
+
+    media_type: str
+    extension: str
+    serialize: Callable[[Iterable[Tuple[str, Dict[str, Any]]]], Iterator[str]]
+
+
+def _test_cases(test_cases: Dict[str, Any]) -> Tuple[str, List[Dict[str, Any]]]:
+    suite = test_cases.get('test_suite') or {}
+    return suite.get('suite_name') or '', suite.get('test_cases') or []
+
+
+def _preconditions(test_case: Dict[str, Any]) -> str:
+    return '\n'.join(test_case.get('preconditions') or [])
+
+
+def _test_data(test_case: Dict[str, Any]) -> Dict[str, Any]:
+    return test_case.get('test_data') or {}
+
+
+def _data_text(value: Any) -> str:
+    """Test data as text; structured values are written as JSON, not as Python reprs"""
+    if value is None:
+        return ''
+    return value if isinstance(value, str) else json.dumps(value)
+
+
+def _project_key(issue_key: str) -> str:
+    return issue_key.rsplit('-', 1)[0]
+
+
+def export_csv(suites: Iterable[Tuple[str, Dict[str, Any]]]) -> Iterator[str]:
+    """One row per test step (one row for cases without steps), chunked per suite"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    for issue_key, test_cases in suites:
+        suite_name, cases = _test_cases(test_cases)
+        for test_case in cases:
+            test_data = _test_data(test_case)
+            for step in test_case.get('test_steps') or [{}]:
+                writer.writerow((
+                    issue_key, suite_name, test_case.get('test_case_id'), test_case.get('title'),
+                    test_case.get('description'), _preconditions(test_case),
+                    step.get('step_number'), step.get('step_description'), step.get('expected_result'),
+                    _data_text(test_data.get('input_data')), _data_text(test_data.get('expected_output')),
+                    test_case.get('priority'), test_case.get('test_type'), test_case.get('estimated_duration'),
+                ))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def export_jsonl(suites: Iterable[Tuple[str, Dict[str, Any]]]) -> Iterator[str]:
+    """One JSON object per test case"""
+    for issue_key, test_cases in suites:
+        suite_name, cases = _test_cases(test_cases)
+        yield ''.join(
+            json.dumps({'issue_key': issue_key, 'suite_name': suite_name, **test_case}) + '\n'
+            for test_case in cases
+        )
+
+
+def _json_array(batches: Iterator[List[Dict[str, Any]]]) -> Iterator[str]:
+    """Stream a JSON array without building it, one chunk per batch of items"""
+    yield '['
+    separator = '\n'
+    for items in batches:
+        if items:
+            yield separator + ',\n'.join(json.dumps(item) for item in items)
+            separator = ',\n'
+    yield '\n]\n'
+
+
+def _xray_test(issue_key: str, test_case: Dict[str, Any]) -> Dict[str, Any]:
+    test_data = _test_data(test_case)
+    description = test_case.get('description') or ''
+    if test_case.get('preconditions'):
+        description += "\n\nPreconditions:\n" + '\n'.join(f"* {item}" for item in test_case['preconditions'])
+    return {
+        "testtype": "Manual",
+        "fields": {
+            "summary": test_case.get('title') or test_case.get('test_case_id'),
+            "project": {"key": _project_key(issue_key)},
+            "description": description,
+            "priority": {"name": test_case.get('priority') or "Medium"},
+            "labels": [label for label in ("generated", test_case.get('test_type')) if label],
+        },
+        "update": {
+            "issuelinks": [{"add": {"type": {"name": "Test"}, "outwardIssue": {"key": issue_key}}}]
+        },
+        "steps": [
+            {
+                "action": step.get('step_description') or '',
+                "data": _data_text(test_data.get('input_data')) if i == 0 else '',
+                "result": step.get('expected_result') or '',
+            }
+            for i, step in enumerate(test_case.get('test_steps') or [])
+        ],
+    }
+
+
+def export_xray(suites: Iterable[Tuple[str, Dict[str, Any]]]) -> Iterator[str]:
+    """Xray bulk test import JSON, each test linked to its requirement issue"""
+    return _json_array(
+        [_xray_test(issue_key, test_case) for test_case in _test_cases(test_cases)[1]]
+        for issue_key, test_cases in suites
+    )
+
+
+# Zephyr Scale's default priorities are High/Normal/Low
+ZEPHYR_PRIORITIES = {'High': 'High', 'Medium': 'Normal', 'Low': 'Low'}
+
+
+def _zephyr_test(issue_key: str, test_case: Dict[str, Any]) -> Dict[str, Any]:
+    test_data = _test_data(test_case)
+    return {
+        "projectKey": _project_key(issue_key),
+        "name": test_case.get('title') or test_case.get('test_case_id'),
+        "objective": test_case.get('description') or '',
+        "precondition": _preconditions(test_case),
+        "priority": ZEPHYR_PRIORITIES.get(test_case.get('priority'), "Normal"),
+        "labels": [label for label in ("generated", test_case.get('test_type')) if label],
+        "issueLinks": [issue_key],
+        "testScript": {
+            "type": "STEP_BY_STEP",
+            "steps": [
+                {
+                    "description": step.get('step_description') or '',
+                    "testData": _data_text(test_data.get('input_data')) if i == 0 else '',
+                    "expectedResult": step.get('expected_result') or '',
+                }
+                for i, step in enumerate(test_case.get('test_steps') or [])
+            ],
+        },
+    }
+
+
+def export_zephyr(suites: Iterable[Tuple[str, Dict[str, Any]]]) -> Iterator[str]:
+    """Zephyr Scale test cases (REST create payloads) as a JSON array"""
+    return _json_array(
+        [_zephyr_test(issue_key, test_case) for test_case in _test_cases(test_cases)[1]]
+        for issue_key, test_cases in suites
+    )
+
+
+def _element(tag: str, value: Optional[Any]) -> str:
+    return f"<{tag}>{escape(str(value))}</{tag}>" if value not in (None, '') else f"<{tag}/>"
+
+
+def export_testrail(suites: Iterable[Tuple[str, Dict[str, Any]]]) -> Iterator[str]:
+    """TestRail suite XML, one section per issue with separated steps"""
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n<suite>\n<name>Generated test cases</name>\n<sections>\n'
+    for issue_key, test_cases in suites:
+        suite_name, cases = _test_cases(test_cases)
+        parts = [f"<section>{_element('name', f'{issue_key}: {suite_name}' if suite_name else issue_key)}<cases>\n"]
+        for test_case in cases:
+            steps = ''.join(
+                f"<step>{_element('index', step.get('step_number'))}{_element('content', step.get('step_description'))}"
+                f"{_element('expected', step.get('expected_result'))}</step>"
+                for step in test_case.get('test_steps') or []
+            )
+            parts.append(
+                f"<case>{_element('title', test_case.get('title'))}{_element('type', test_case.get('test_type'))}"
+                f"{_element('priority', test_case.get('priority'))}{_element('estimate', test_case.get('estimated_duration'))}"
+                f"{_element('references', issue_key)}<custom>{_element('preconds', _preconditions(test_case))}"
+                f"<steps_separated>{steps}</steps_separated></custom></case>\n"
+            )
+        parts.append("</cases></section>\n")
+        yield ''.join(parts)
+    yield '</sections>\n</suite>\n'
+
+
+EXPORT_FORMATS: Dict[str, ExportFormat] = {
+    'csv': ExportFormat('text/csv', 'csv', export_csv),
+    'jsonl': ExportFormat('application/x-ndjson', 'jsonl', export_jsonl),
+    'xray': ExportFormat('application/json', 'json', export_xray),
+    'zephyr': ExportFormat('application/json', 'json', export_zephyr),
+    'testrail': ExportFormat('application/xml', 'xml', export_testrail),
+}
@@ -0,0 +1,345 @@
+import json
+import logging
+import re
+from typing import Optional, Dict, Any, List, NamedTuple, Tuple
+
+from pydantic import ValidationError
+
+from schemas import TestCase, TestSuite, TestSuiteDocument
+
+logger = logging.getLogger(__name__)
+
+# Scalar suite fields captured while streaming
+SUITE_METADATA_FIELDS = ("suite_name", "suite_description")
+
+# Characters that matter outside and inside JSON strings; everything else is skipped in C
+_STRUCTURAL = re.compile(r'["{}\[\]:,]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+_FENCE = re.compile(r'```(?:json)?', re.IGNORECASE)
+_DECLARED_TOTAL = re.compile(r'"total_test_cases"\s*:\s*(\d+)')
+
+_decoder = json.JSONDecoder()
+
+
+class _Frame:
+    """An open JSON object or array"""
+
+    __slots__ = ("kind", "name", "key", "after_colon")
+
+    def __init__(self, kind: str, name: Optional[str]):
+        self.kind = kind
+        # Key this container is the value of in its parent object
+        self.name = name
+        # Most recent key seen in this object, and whether its value is being read
+        self.key: Optional[str] = None
+        self.after_colon = False
+
+
+class TestCaseStreamParser:
+    """Incremental parser that emits each test case as soon as its object closes
+
+    Text is fed in arbitrary chunks as it arrives from the model. A single
+    pass tracks strings, escapes and nesting, so braces inside string values
+    never confuse it, and each character is scanned at most once. Anything
+    before the first ``{`` (prose, markdown fences) is ignored.
+    """
+
+    def __init__(self):
+        self.metadata: Dict[str, Any] = {}
+        self.test_cases: List[Dict[str, Any]] = []
+        self._chunks: List[str] = []
+        # Unconsumed tail of the stream, starting at absolute offset _base
+        self._buffer = ""
+        self._base = 0
+        self._pos = 0
+        self._stack: List[_Frame] = []
+        self._started = False
+        self._finished = False
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._case_start: Optional[int] = None
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far"""
+        return "".join(self._chunks)
+
+    @property
+    def finished(self) -> bool:
+        """Whether the root JSON object has closed"""
+        return self._finished
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """Consume a chunk and return the test cases it completed"""
+        self._chunks.append(chunk)
+        if self._finished:
+            return []
+
+        self._buffer += chunk
+        buffer, base = self._buffer, self._base
+        completed: List[Dict[str, Any]] = []
+
+        i = self._pos - base
+        length = len(buffer)
+        while i < length:
+            if self._in_string:
+                if self._escape:
+                    # Escape sequence split across chunks
+                    self._escape = False
+                    i += 1
+                    continue
+                match = _STRING_SPECIAL.search(buffer, i)
+                if match is None:
+                    i = length
+                    break
+                i = match.start()
+                if buffer[i] == '\\':
+                    if i + 1 >= length:
+                        self._escape = True
+                        i = length
+                        break
+                    i += 2
+                    continue
+                self._in_string = False
+                self._on_string(buffer[self._string_start - base:i + 1])
+                i += 1
+                continue
+
+            if not self._started:
+                i = buffer.find('{', i)
+                if i == -1:
+                    i = length
+                    break
+                self._started = True
+                self._stack.append(_Frame('{', None))
+                i += 1
+                continue
+
+            match = _STRUCTURAL.search(buffer, i)
+            if match is None:
+                i = length
+                break
+            i = match.start()
+            char = buffer[i]
+            if char == '"':
+                self._in_string = True
+                self._string_start = base + i
+            elif char == '{' or char == '[':
+                self._open(char, base + i)
+            elif char == '}' or char == ']':
+                test_case = self._close(buffer, base, i)
+                if test_case is not None:
+                    completed.append(test_case)
+                if not self._stack:
+                    self._finished = True
+                    i += 1
+                    break
+            elif char == ':':
+                self._stack[-1].after_colon = True
+            else:
+                self._stack[-1].after_colon = False
+            i += 1
+
+        self._pos = base + i
+        # Drop text no longer needed to slice an open test case or string
+        keep_from = self._pos
+        if self._case_start is not None:
+            keep_from = min(keep_from, self._case_start)
+        if self._in_string:
+            keep_from = min(keep_from, self._string_start)
+        self._buffer = buffer[keep_from - base:]
+        self._base = keep_from
+
+        self.test_cases.extend(completed)
+        return completed
+
+    def _on_string(self, raw: str) -> None:
+        frame = self._stack[-1] if self._stack else None
+        if frame is None or frame.kind != '{':
+            return
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            return
+        if not frame.after_colon:
+            frame.key = value
+        elif frame.name in ('test_suite', None) and frame.key in SUITE_METADATA_FIELDS:
+            self.metadata[frame.key] = value
+
+    def _open(self, kind: str, offset: int) -> None:
+        parent = self._stack[-1] if self._stack else None
+        name = parent.key if parent is not None and parent.kind == '{' and parent.after_colon else None
+        if kind == '{' and parent is not None and parent.kind == '[' and parent.name == 'test_cases':
+            self._case_start = offset
+        self._stack.append(_Frame(kind, name))
+
+    def _close(self, buffer: str, base: int, i: int) -> Optional[Dict[str, Any]]:
+        frame = self._stack.pop()
+        parent = self._stack[-1] if self._stack else None
+        if (
+            frame.kind == '{'
+            and self._case_start is not None
+            and parent is not None
+            and parent.kind == '['
+            and parent.name == 'test_cases'
+        ):
+            raw = buffer[self._case_start - base:i + 1]
+            self._case_start = None
+            try:
+                return json.loads(raw)
+            except ValueError as e:
+                logger.warning(f"Skipping unparseable test case: {e}")
+        return None
+
+    def assembled_suite(self) -> Dict[str, Any]:
+        """Build a suite from the metadata and test cases seen so far"""
+        return {
+            "test_suite": {
+                **self.metadata,
+                "total_test_cases": len(self.test_cases),
+                "test_cases": list(self.test_cases),
+            }
+        }
+
+
+class SuiteExtractionError(ValueError):
+    """Raised when no test suite can be recovered from model output"""
+
+
+def _json_start(text: str) -> int:
+    """Offset of the first '{' after an opening ```json fence, or in the text"""
+    fence = _FENCE.search(text)
+    if fence is not None:
+        start = text.find('{', fence.end())
+        if start != -1:
+            return start
+    return text.find('{')
+
+
+class ExtractedSuite(NamedTuple):
+    """A validated suite and how much of the model's output was lost getting it"""
+
+    document: Dict[str, Any]
+    # The response was cut off or malformed and only complete cases were kept
+    truncated: bool = False
+    # Test cases dropped because they failed validation
+    dropped: int = 0
+    # total_test_cases as written by the model, if it got that far
+    declared: Optional[int] = None
+
+    @property
+    def count(self) -> int:
+        return self.document['test_suite']['total_test_cases']
+
+    def missing(self, expected: int) -> int:
+        """How many test cases were lost, given how many were asked for"""
+        if self.declared is not None and self.declared > self.count:
+            return self.declared - self.count
+        if self.truncated:
+            return max(expected - self.count, 0)
+        return self.dropped
+
+
+def _validate(document: Dict[str, Any]) -> Tuple[Dict[str, Any], int, Optional[int]]:
+    suite = document.get('test_suite', document if 'test_cases' in document else None)
+    if not isinstance(suite, dict):
+        raise SuiteExtractionError("Response does not contain a test_suite object")
+
+    test_cases = []
+    raw_cases = suite.get('test_cases') or []
+    for raw_case in raw_cases:
+        try:
+            test_cases.append(TestCase.model_validate(raw_case))
+        except ValidationError as e:
+            logger.warning(f"Dropping invalid test case: {e.errors()[0]['msg']}")
+
+    fields = {key: value for key, value in suite.items() if key != 'test_cases'}
+    declared = fields.get('total_test_cases')
+    try:
+        validated = TestSuite.model_validate({**fields, 'test_cases': []})
+    except ValidationError:
+        validated = TestSuite()
+    validated.test_cases = test_cases
+    validated.total_test_cases = len(test_cases)
+    dropped = len(raw_cases) - len(test_cases)
+    return {'test_suite': validated.model_dump(exclude_none=True)}, dropped, declared if isinstance(declared, int) else None
+
+
+def validate_test_suite(document: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate a parsed document against the typed suite schema
+
+    Individual test cases that fail validation are dropped rather than
+    failing the whole suite.
+    """
+    return _validate(document)[0]
+
+
+def extract_json_object(text: str) -> Dict[str, Any]:
+    """Decode the first complete JSON object in model output"""
+    start = _json_start(text)
+    if start == -1:
+        raise SuiteExtractionError("No JSON object found in response")
+    try:
+        document, _ = _decoder.raw_decode(text, start)
+    except ValueError as e:
+        raise SuiteExtractionError(f"Response is not complete JSON: {e}")
+    if not isinstance(document, dict):
+        raise SuiteExtractionError("Response is not a JSON object")
+    return document
+
+
+def extract_suite(text: str) -> ExtractedSuite:
+    """
+    Extract and validate the test suite from raw model output
+
+    Tries a strict decode of the first JSON object (skipping markdown fences
+    and surrounding prose). If the object is truncated or malformed, a
+    string-aware scan recovers every test case that was completely written.
+    Both passes are linear in the length of the text.
+    """
+    start = _json_start(text)
+    if start == -1:
+        raise SuiteExtractionError("No JSON object found in response")
+
+    try:
+        document, _ = _decoder.raw_decode(text, start)
+        if isinstance(document, dict):
+            document, dropped, declared = _validate(document)
+            return ExtractedSuite(document, dropped=dropped, declared=declared)
+    except ValueError as e:
+        logger.warning(f"Response is not complete JSON ({e}), recovering complete test cases")
+
+    parser = TestCaseStreamParser()
+    parser.feed(text[start:])
+    if not parser.test_cases:
+        raise SuiteExtractionError("No complete test cases found in response")
+    logger.info(f"Recovered {len(parser.test_cases)} complete test cases from a partial response")
+    document, dropped, _ = _validate(parser.assembled_suite())
+    # The total is written before the test cases, so a truncated response usually still has it
+    declared = _DECLARED_TOTAL.search(text, start)
+    return ExtractedSuite(document, truncated=True, dropped=dropped, declared=int(declared.group(1)) if declared else None)
+
+
+def extract_test_suite(text: str) -> Dict[str, Any]:
+    """Extract and validate the test suite from raw model output"""
+    return extract_suite(text).document
+
+
+def parse_structured_suite(text: str) -> ExtractedSuite:
+    """
+    Validate schema-constrained JSON output straight into the suite models
+
+    Responses generated with a response schema are plain JSON, so the fast
+    path is a single validating parse with no extraction. Anything that does
+    not validate as a whole (a truncated response, one bad test case) falls
+    back to extract_suite, which keeps every valid case.
+    """
+    try:
+        document = TestSuiteDocument.model_validate_json(text)
+    except ValidationError:
+        return extract_suite(text)
+    suite = document.test_suite
+    declared = suite.total_test_cases
+    suite.total_test_cases = len(suite.test_cases)
+    return ExtractedSuite(document.model_dump(exclude_none=True), declared=declared)
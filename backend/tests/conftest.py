@@ -0,0 +1,37 @@
+"""Shared test setup: import the backend modules and keep their state out of the working tree
+
+Run from the backend directory:
+    pip install -r requirements-dev.txt
+    python -m pytest
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+from fastapi.testclient import TestClient
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# Read when the modules are imported, so set before any test imports them
+STATE_DIR = tempfile.mkdtemp(prefix="test-caser-tests-")
+os.environ["SUITE_CACHE_PATH"] = os.path.join(STATE_DIR, "suite_cache.db")
+os.environ["SIMILARITY_INDEX_PATH"] = os.path.join(STATE_DIR, "suite_cache.db")
+os.environ["JOB_STORE_PATH"] = os.path.join(STATE_DIR, "jobs.db")
+os.environ["JIRA_ISSUE_CACHE_PATH"] = ""
+os.environ["JIRA_ISSUE_CACHE_FRESH_SECONDS"] = "0"
+os.environ["JIRA_RATE_LIMIT_STATE_PATH"] = ""
+# Deterministic local model with no delay
+os.environ["MODEL_BACKENDS"] = "fake:0"
+os.environ["MODEL_LARGE_BACKENDS"] = ""
+os.environ["JOB_WORKERS"] = "1"
+
+
+@pytest.fixture(scope="session")
+def app_client():
+    """The FastAPI app with its lifespan running (stores, model router, job workers)"""
+    import main
+
+    with TestClient(main.app) as client:
+        yield client
@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+import main
+
+BASE_URL = "https://jira.example.com"
+
+
+@pytest.fixture
+def client(app_client):
+    return app_client
+
+
+@pytest.fixture
+def fetched(monkeypatch):
+    """Serve issues from memory instead of Jira, recording every fetch"""
+    calls = []
+
+    async def fetch(issue_key, base_url, auth_token=None, priority=main.INTERACTIVE):
+        calls.append((base_url, issue_key))
+        if issue_key == "P-404":
+            return {'error': 'Issue not found or Jira API not accessible (private instance)'}
+        return {'title': issue_key, 'description': f"As a user I want feature {issue_key} so that it works."}
+
+    monkeypatch.setattr(main, "fetch_jira_issue_details_with_auth", fetch)
+    return calls
+
+
+def run_batch(client, **body):
+    response = client.post("/generate-test-cases/batch", json={"base_url": BASE_URL, **body})
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_batch_generates_each_issue_once(client, fetched):
+    lines = run_batch(
+        client,
+        urls=[f"{BASE_URL}/browse/P-1", f"{BASE_URL}/browse/P-1?focusedCommentId=3", f"{BASE_URL}/browse/P-2"],
+        issue_keys=["P-1", "P-2", "P-3", "P-3"],
+    )
+    results = [line for line in lines if line["event"] == "result"]
+    assert sorted(result["issue_key"] for result in results) == ["P-1", "P-2", "P-3"]
+    assert sorted(fetched) == [(BASE_URL, "P-1"), (BASE_URL, "P-2"), (BASE_URL, "P-3")]
+    assert all(result["test_cases"] and not result["error"] for result in results)
+    assert lines[-1] == {"event": "summary", "total": 3, "succeeded": 3, "failed": 0}
+
+
+def test_batch_summary_counts_failures(client, fetched):
+    lines = run_batch(client, urls=["https://example.com/not-an-issue"], issue_keys=["P-10", "P-404"])
+    errors = {line["issue_key"]: line["error"] for line in lines if line["event"] == "result"}
+    assert errors["P-10"] is None
+    assert "Issue not found" in errors["P-404"]
+    assert "Could not extract issue key" in errors[None]
+    assert lines[-1] == {"event": "summary", "total": 3, "succeeded": 1, "failed": 2}
+
+
+def test_batch_reports_issues_started_before_a_search_failure(client, fetched, monkeypatch):
+    async def search(jql, base_url, auth_token=None, max_issues=100, priority=main.BACKGROUND):
+        yield "P-20", {'title': "P-20", 'description': "As an admin I want audit logs of sign-ins."}
+        yield "P-20", {'title': "P-20", 'description': "As an admin I want audit logs of sign-ins."}
+        raise main.JiraSearchError(503)
+
+    monkeypatch.setattr(main, "search_jira_issues", search)
+    lines = run_batch(client, jql="project = P")
+    assert {"event": "error", "error": "Jira search returned status 503"} in lines
+    assert [line["issue_key"] for line in lines if line["event"] == "result"] == ["P-20"]
+    assert lines[-1] == {"event": "summary", "total": 1, "succeeded": 1, "failed": 0}
+    assert fetched == []
+
+
+def test_batch_requires_issues(client):
+    response = client.post("/generate-test-cases/batch", json={"base_url": BASE_URL})
+    assert response.status_code == 400
+
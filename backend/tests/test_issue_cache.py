@@ -0,0 +1,108 @@
+import time
+
+import httpx
+import pytest
+
+import main
+from issue_cache import IssueCache, make_cache_key
+from jira_client import JiraClient
+from jira_scheduler import JiraScheduler
+
+BASE_URL = "https://jira.example.com"
+KEY = make_cache_key(BASE_URL, "P-1", "token")
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def cache(request, tmp_path):
+    path = str(tmp_path / "issues.db") if request.param == "sqlite" else ""
+    return IssueCache(ttl_seconds=60, fresh_seconds=0, max_entries=2, path=path)
+
+
+def test_entries_are_revalidated_by_default():
+    assert IssueCache().fresh_seconds == 0
+
+
+def test_entry_is_never_fresh_without_an_opt_in(cache):
+    cache.put(KEY, {"title": "Login"}, etag='"v1"')
+    entry = cache.get(KEY)
+    assert entry.details == {"title": "Login"}
+    assert entry.etag == '"v1"'
+    assert not cache.is_fresh(entry)
+
+
+def test_fresh_window_is_opt_in():
+    cache = IssueCache(fresh_seconds=30, path="")
+    cache.put(KEY, {"title": "Login"})
+    assert cache.is_fresh(cache.get(KEY))
+
+
+def test_entries_expire_after_the_ttl(cache):
+    cache.put(KEY, {"title": "Login"})
+    cache.ttl_seconds = 0.01
+    time.sleep(0.02)
+    assert cache.get(KEY) is None
+    assert len(cache.store) == 0
+
+
+def test_least_recently_used_entry_is_evicted(cache):
+    first, second, third = (make_cache_key(BASE_URL, f"P-{n}", "token") for n in (1, 2, 3))
+    cache.put(first, {"n": 1})
+    cache.put(second, {"n": 2})
+    cache.get(first)
+    cache.put(third, {"n": 3})
+    assert cache.get(second) is None
+    assert cache.get(first).details == {"n": 1}
+
+
+def test_entries_are_kept_per_credential(cache):
+    cache.put(KEY, {"title": "visible to token"})
+    assert cache.get(make_cache_key(BASE_URL, "P-1", "other token")) is None
+    assert cache.get(make_cache_key(BASE_URL + "/", "P-1", "token")) is not None
+
+
+def test_invalidated_entry_is_gone(cache):
+    cache.put(KEY, {"title": "Login"})
+    cache.invalidate(KEY)
+    assert cache.get(KEY) is None
+
+
+class EditableIssue:
+    """Jira serving one issue with an ETag, answering conditional requests with 304"""
+
+    def __init__(self):
+        self.summary = "Login"
+        self.version = 1
+        self.statuses = []
+
+    def edit(self, summary):
+        self.summary = summary
+        self.version += 1
+
+    def handle(self, request):
+        etag = f'"v{self.version}"'
+        if request.headers.get("If-None-Match") == etag:
+            self.statuses.append(304)
+            return httpx.Response(304, headers={"ETag": etag})
+        self.statuses.append(200)
+        body = {"key": "P-1", "fields": {"summary": self.summary, "description": "As a user I log in."}}
+        return httpx.Response(200, json=body, headers={"ETag": etag})
+
+
+def test_edit_is_served_on_the_next_request(app_client, monkeypatch):
+    jira = EditableIssue()
+    client = JiraClient(
+        email="qa@example.com", transport=httpx.MockTransport(jira.handle),
+        scheduler=JiraScheduler(rate=1000, burst=1000, path=""),
+    )
+    monkeypatch.setattr(main, "jira_client", client)
+
+    def load():
+        return app_client.portal.call(main.load_jira_issue_details, "P-1", BASE_URL, "cache-test-token")
+
+    assert load()["title"] == "Login"
+    assert load()["title"] == "Login"
+    jira.edit("Login with SSO")
+    assert load()["title"] == "Login with SSO"
+    # Every cached read was revalidated; unchanged copies cost a 304
+    assert jira.statuses == [200, 304, 200]
+    app_client.portal.call(client.aclose)
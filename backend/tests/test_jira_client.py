@@ -0,0 +1,148 @@
+import asyncio
+import base64
+
+import httpx
+import pytest
+
+from jira_client import JiraClient
+from jira_scheduler import JiraScheduler
+
+ISSUE_URL = "https://jira.example.com/rest/api/2/issue/P-1"
+
+
+class FakeJira:
+    """In-process Jira answering from a list of scripted responses (the last one repeats)"""
+
+    def __init__(self, *responses, delay=0.0):
+        self.responses = list(responses) or [httpx.Response(200, json={"key": "P-1"})]
+        self.delay = delay
+        self.requests = []
+        self.active = 0
+        self.max_active = 0
+
+    async def handle(self, request):
+        self.requests.append(request)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            response = self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+            if isinstance(response, Exception):
+                raise response
+            return httpx.Response(response.status_code, headers=response.headers, content=response.content)
+        finally:
+            self.active -= 1
+
+
+def make_client(jira, **options):
+    options.setdefault("scheduler", JiraScheduler(rate=1000, burst=1000, path=""))
+    options.setdefault("retry_backoff", 0.001)
+    return JiraClient(email="qa@example.com", transport=httpx.MockTransport(jira.handle), **options)
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_requests_share_one_pooled_client_and_cached_headers():
+    jira = FakeJira()
+
+    async def scenario():
+        client = make_client(jira)
+        pool = client._client
+        responses = await asyncio.gather(*(client.get(ISSUE_URL, "token") for _ in range(5)))
+        assert client._client is pool
+        assert client.auth_headers("token") is client.auth_headers("token")
+        await client.aclose()
+        return responses
+
+    assert [response.status_code for response in run(scenario())] == [200] * 5
+    expected = "Basic " + base64.b64encode(b"qa@example.com:token").decode()
+    assert {request.headers["Authorization"] for request in jira.requests} == {expected}
+
+
+def test_no_authorization_header_without_a_token():
+    client = JiraClient(email="qa@example.com")
+    assert "Authorization" not in client.auth_headers(None)
+    run(client.aclose())
+
+
+def test_extra_headers_and_params_are_sent_without_touching_the_shared_headers():
+    jira = FakeJira()
+
+    async def scenario():
+        client = make_client(jira)
+        await client.get(ISSUE_URL, "token", params={"fields": "summary"}, headers={"If-None-Match": '"v1"'})
+        assert "If-None-Match" not in client.auth_headers("token")
+        await client.aclose()
+
+    run(scenario())
+    assert jira.requests[0].headers["If-None-Match"] == '"v1"'
+    assert jira.requests[0].url.params["fields"] == "summary"
+
+
+def test_unavailable_responses_are_retried():
+    jira = FakeJira(httpx.Response(503), httpx.Response(502), httpx.Response(200, json={"key": "P-1"}))
+
+    async def scenario():
+        client = make_client(jira)
+        response = await client.get(ISSUE_URL)
+        await client.aclose()
+        return response
+
+    assert run(scenario()).json() == {"key": "P-1"}
+    assert len(jira.requests) == 3
+
+
+def test_last_response_is_returned_when_retries_run_out():
+    jira = FakeJira(httpx.Response(429, headers={"Retry-After": "0"}))
+
+    async def scenario():
+        client = make_client(jira, max_retries=2)
+        response = await client.get(ISSUE_URL)
+        await client.aclose()
+        return response
+
+    assert run(scenario()).status_code == 429
+    assert len(jira.requests) == 3
+
+
+def test_client_errors_are_not_retried():
+    jira = FakeJira(httpx.Response(404))
+
+    async def scenario():
+        client = make_client(jira)
+        response = await client.get(ISSUE_URL)
+        await client.aclose()
+        return response
+
+    assert run(scenario()).status_code == 404
+    assert len(jira.requests) == 1
+
+
+def test_connection_errors_are_retried_then_raised():
+    jira = FakeJira(httpx.ConnectError("refused"))
+
+    async def scenario():
+        client = make_client(jira, max_retries=1)
+        try:
+            with pytest.raises(httpx.ConnectError):
+                await client.get(ISSUE_URL)
+        finally:
+            await client.aclose()
+
+    run(scenario())
+    assert len(jira.requests) == 2
+
+
+def test_concurrency_is_bounded_per_host():
+    jira = FakeJira(delay=0.02)
+
+    async def scenario():
+        client = make_client(jira, per_host_concurrency=2)
+        await asyncio.gather(*(client.get(ISSUE_URL) for _ in range(6)))
+        await client.aclose()
+
+    run(scenario())
+    assert len(jira.requests) == 6
+    assert jira.max_active == 2
@@ -0,0 +1,110 @@
+import asyncio
+import time
+from email.utils import formatdate
+
+import pytest
+
+from jira_scheduler import BACKGROUND, INTERACTIVE, HostRateLimiter, JiraScheduler, parse_retry_after
+
+
+@pytest.mark.parametrize("value, expected", [
+    (None, None), ("", None), ("3", 3.0), (" 1.5 ", 1.5), ("-4", 0.0), ("soon", None),
+])
+def test_retry_after_seconds(value, expected):
+    assert parse_retry_after(value) == expected
+
+
+def test_retry_after_http_date():
+    now = time.time()
+    assert parse_retry_after(formatdate(now + 30, usegmt=True), now=now) == pytest.approx(30, abs=1)
+    assert parse_retry_after(formatdate(now - 30, usegmt=True), now=now) == 0.0
+
+
+def test_interactive_requests_overtake_queued_background_requests():
+    async def scenario():
+        limiter = HostRateLimiter("jira", rate=50, burst=1)
+        await limiter.acquire()
+        order = []
+
+        async def request(name, priority):
+            await limiter.acquire(priority)
+            order.append(name)
+
+        tasks = [asyncio.create_task(request(f"backfill {n}", BACKGROUND)) for n in range(3)]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(request("user", INTERACTIVE)))
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(scenario()) == ["user", "backfill 0", "backfill 1", "backfill 2"]
+
+
+def test_rate_limited_host_halves_its_rate_and_pauses_for_retry_after():
+    async def scenario():
+        limiter = HostRateLimiter("jira", rate=8, burst=4, min_rate=1)
+        retry_after = await limiter.observe(429, {"Retry-After": "0.1"})
+        # A second 429 from a request already in flight is the same congestion event
+        await limiter.observe(429, {"Retry-After": "0.1"})
+        start = time.monotonic()
+        await limiter.acquire()
+        return limiter, retry_after, time.monotonic() - start
+
+    limiter, retry_after, waited = asyncio.run(scenario())
+    assert retry_after == 0.1
+    assert limiter.rate == 4
+    assert limiter.throttled == 2
+    assert waited >= 0.09
+
+
+def test_rate_adapts_to_advertised_limits_and_recovers_after_successes():
+    async def scenario():
+        limiter = HostRateLimiter("jira", rate=10, burst=20, min_rate=0.5)
+        await limiter.observe(200, {"X-RateLimit-FillRate": "5", "X-RateLimit-Interval-Seconds": "1", "X-RateLimit-Limit": "50"})
+        advertised = (limiter.rate, limiter.burst)
+        await limiter.observe(200, {"X-RateLimit-FillRate": "5", "X-RateLimit-Interval-Seconds": "1", "X-RateLimit-NearLimit": "true"})
+        near_limit = limiter.rate
+        for _ in range(100):
+            await limiter.observe(200, {})
+        return advertised, near_limit, limiter.rate
+
+    advertised, near_limit, recovered = asyncio.run(scenario())
+    assert advertised == (5, 50)
+    assert near_limit == pytest.approx(4)
+    assert recovered == 10
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        limiter = HostRateLimiter("jira", rate=1, burst=1)
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        return limiter.waiting
+
+    assert asyncio.run(scenario()) == 0
+
+
+def test_processes_sharing_a_state_file_draw_from_one_budget(tmp_path):
+    path = str(tmp_path / "rate_limits.db")
+    first, second = JiraScheduler(rate=1, burst=2, path=path), JiraScheduler(rate=1, burst=2, path=path)
+
+    async def scenario():
+        await first.host("jira").acquire()
+        await second.host("jira").acquire()
+        # The shared bucket is empty, so the next token is about a second away for either process
+        return await asyncio.wait_for(first.host("jira").acquire(), timeout=0.3)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(scenario())
+
+    async def backoff():
+        await first.host("jira").observe(429, {"Retry-After": "5"})
+
+    asyncio.run(backoff())
+    stats = second.stats()["jira"]
+    assert stats["rate_per_second"] == 0.5
+    assert stats["paused_for_seconds"] > 4
+    first.close()
+    second.close()
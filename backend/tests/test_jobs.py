@@ -0,0 +1,178 @@
+import asyncio
+import time
+
+import pytest
+
+import main
+from jobs import FAILED, QUEUED, RUNNING, SUCCEEDED, JobQueue, JobStore, TransientJobError
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def other_worker(tmp_path, store):
+    other = JobStore(str(tmp_path / "jobs.db"))
+    yield other
+    other.close()
+
+
+def test_identical_requests_share_one_active_job(store):
+    job, deduplicated = store.create({"url": "https://jira/browse/P-1"})
+    again, deduplicated_again = store.create({"url": "https://jira/browse/P-1"})
+    other, _ = store.create({"url": "https://jira/browse/P-2"})
+    assert not deduplicated and deduplicated_again
+    assert again.id == job.id
+    assert other.id != job.id
+
+
+def test_finished_jobs_are_not_deduplicated(store):
+    job, _ = store.create({"url": "https://jira/browse/P-1"})
+    store.update(job.id, status=SUCCEEDED)
+    again, deduplicated = store.create({"url": "https://jira/browse/P-1"})
+    assert not deduplicated
+    assert again.id != job.id
+
+
+def test_claim_is_exclusive_while_the_lease_holds(store, other_worker):
+    job, _ = store.create({"url": "x"})
+    claimed = store.claim_next("A", lease_seconds=60)
+    assert claimed.id == job.id
+    assert claimed.status == RUNNING
+    assert claimed.attempts == 1
+    assert other_worker.claim_next("B") is None
+    # Starting up must not steal jobs a live worker holds
+    assert other_worker.requeue_interrupted() == 0
+
+
+def test_expired_lease_is_claimed_by_another_worker(store, other_worker):
+    job, _ = store.create({"url": "x"})
+    store.claim_next("A", lease_seconds=0.05)
+    time.sleep(0.1)
+    reclaimed = other_worker.claim_next("B", lease_seconds=60)
+    assert reclaimed.id == job.id
+    assert reclaimed.attempts == 2
+    # The first worker's heartbeat no longer extends a lease it lost
+    store.renew_lease(job.id, "A", lease_seconds=0.01)
+    time.sleep(0.05)
+    assert store.claim_next("A") is None
+
+
+def test_renewed_lease_keeps_the_job(store, other_worker):
+    store.create({"url": "x"})
+    job = store.claim_next("A", lease_seconds=0.05)
+    store.renew_lease(job.id, "A", lease_seconds=60)
+    time.sleep(0.1)
+    assert other_worker.claim_next("B") is None
+
+
+def test_shutdown_requeues_only_the_owners_jobs(store, other_worker):
+    first, _ = store.create({"url": "x"})
+    second, _ = store.create({"url": "y"})
+    store.claim_next("A")
+    other_worker.claim_next("B")
+    assert store.requeue_interrupted("A") == 1
+    assert store.get(first.id).status == QUEUED
+    assert store.get(second.id).status == RUNNING
+
+
+def test_retry_waits_for_next_attempt(store):
+    job, _ = store.create({"url": "x"})
+    store.claim_next("A")
+    store.update(job.id, status=QUEUED, next_attempt_at=time.time() + 60)
+    assert store.claim_next("A") is None
+    store.update(job.id, next_attempt_at=time.time() - 1)
+    assert store.claim_next("A").attempts == 2
+
+
+def test_failed_jobs_are_not_claimed(store):
+    job, _ = store.create({"url": "x"})
+    store.update(job.id, status=FAILED)
+    assert store.claim_next("A") is None
+
+
+def test_only_finished_jobs_past_the_retention_are_deleted(store):
+    old_success, _ = store.create({"url": "a"})
+    old_failure, _ = store.create({"url": "b"})
+    queued, _ = store.create({"url": "c"})
+    store.update(old_success.id, status=SUCCEEDED)
+    store.update(old_failure.id, status=FAILED)
+    cutoff = time.time()
+    recent, _ = store.create({"url": "d"})
+    store.update(recent.id, status=SUCCEEDED)
+    assert store.delete_finished(cutoff) == 2
+    assert store.get(old_success.id) is None and store.get(old_failure.id) is None
+    assert store.get(queued.id).status == QUEUED
+    assert store.get(recent.id).status == SUCCEEDED
+
+
+def run_queue(store, handler, job_count=1, **options):
+    """Run a queue until every job has finished, returning the jobs"""
+    async def scenario():
+        queue = JobQueue(store, handler, workers=1, retry_backoff=0.001, poll_interval=0.01, **options)
+        queue.start()
+        jobs = [(await queue.submit({"n": n}))[0] for n in range(job_count)]
+        try:
+            while any(store.get(job.id).status not in (SUCCEEDED, FAILED) for job in jobs):
+                await queue.wait_for_change(timeout=0.05)
+        finally:
+            await queue.stop()
+        return [store.get(job.id) for job in jobs]
+
+    return asyncio.run(scenario())
+
+
+def test_transient_failures_are_retried_up_to_the_limit(store):
+    async def handler(job, report_progress):
+        raise TransientJobError("Jira returned 503")
+
+    [job] = run_queue(store, handler, max_attempts=3)
+    assert (job.status, job.attempts, job.error) == (FAILED, 3, "Jira returned 503")
+
+
+def test_permanent_failures_are_not_retried(store):
+    async def handler(job, report_progress):
+        raise ValueError(main.NO_MODEL_BACKEND_ERROR)
+
+    [job] = run_queue(store, handler)
+    assert (job.status, job.attempts) == (FAILED, 1)
+
+
+def test_result_and_progress_are_stored(store):
+    async def handler(job, report_progress):
+        report_progress("generating_test_cases")
+        return {"test_cases": {"n": job.request["n"]}}
+
+    [job] = run_queue(store, handler)
+    assert job.status == SUCCEEDED
+    assert job.result == {"test_cases": {"n": 0}}
+    assert job.progress == "done"
+
+
+def test_sweep_deletes_jobs_past_the_retention(store):
+    finished, _ = store.create({"url": "old"})
+    store.update(finished.id, status=SUCCEEDED)
+    time.sleep(0.01)
+
+    async def scenario():
+        queue = JobQueue(store, None, workers=0, retention_seconds=0.005)
+        queue.start()
+        for _ in range(100):
+            if await asyncio.to_thread(store.get, finished.id) is None:
+                break
+            await asyncio.sleep(0.01)
+        await queue.stop()
+
+    asyncio.run(scenario())
+    assert store.get(finished.id) is None
+
+
+def test_missing_model_backend_is_not_transient(app_client, monkeypatch):
+    monkeypatch.setattr(main.model_router, "order", [])
+    result = app_client.portal.call(main.generate_test_cases_with_gemini, "As a user I want to log in.")
+    assert result['error'] == main.NO_MODEL_BACKEND_ERROR
+    assert not result.get('transient')
@@ -0,0 +1,189 @@
+import asyncio
+
+import httpx
+import pytest
+
+from model_router import (
+    CircuitBreaker, CircuitOpen, FakeBackend, ModelBackend, ModelRouter, NoBackendAvailable, create_backend,
+    is_transient_error,
+)
+
+
+class ScriptedBackend(ModelBackend):
+    """Backend answering after a delay, failing while ``failing`` is set"""
+
+    kind = "scripted"
+
+    def __init__(self, model, delay=0.0, failing=False, text=None):
+        super().__init__(model)
+        self.delay = delay
+        self.failing = failing
+        self.text = text or f"from {model}"
+        self.calls = 0
+
+    async def generate(self, prompt, response_model=None):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.failing:
+            raise RuntimeError(f"{self.name} is down")
+        return self.text
+
+
+def make_router(*backends, **options):
+    options.setdefault("hedge", False)
+    return ModelRouter(list(backends), **options)
+
+
+def breaker(**options):
+    options = {"window": 4, "min_requests": 2, "failure_ratio": 0.5, "cooldown": 0.05, **options}
+    return CircuitBreaker(**options)
+
+
+def test_backend_base_is_abstract():
+    with pytest.raises(TypeError):
+        ModelBackend("model")
+
+
+def test_failed_backend_falls_back_to_the_next():
+    primary, secondary = ScriptedBackend("primary", failing=True), ScriptedBackend("secondary")
+    router = make_router(primary, secondary)
+    assert asyncio.run(router.generate("prompt")) == "from secondary"
+    assert router.stats()["scripted:primary"]["failures"] == 1
+
+
+def test_rejected_output_falls_back_to_the_next():
+    router = make_router(ScriptedBackend("primary", text="not json"), ScriptedBackend("secondary", text="{}"))
+
+    def parse(text):
+        if not text.startswith("{"):
+            raise ValueError("not a suite")
+        return text
+
+    assert asyncio.run(router.generate("prompt", parse=parse)) == "{}"
+
+
+def test_last_error_is_raised_when_every_backend_fails():
+    router = make_router(ScriptedBackend("primary", failing=True), ScriptedBackend("secondary", failing=True))
+    with pytest.raises(RuntimeError, match="secondary is down"):
+        asyncio.run(router.generate("prompt"))
+
+
+def test_slow_backend_is_hedged_and_the_first_result_wins():
+    slow, fast = ScriptedBackend("slow", delay=1), ScriptedBackend("fast")
+    router = make_router(slow, fast, hedge=True, hedge_min_seconds=0.02)
+    assert asyncio.run(router.generate("prompt")) == "from fast"
+    stats = router.stats()
+    assert stats["scripted:fast"]["hedges_won"] == 1
+    # The losing call was cancelled, which does not count against the slow backend
+    assert stats["scripted:slow"]["failures"] == 0
+    assert router.circuit_states()["scripted:slow"] == CircuitBreaker.CLOSED
+
+
+def test_large_prompts_use_their_own_backends():
+    small, large = ScriptedBackend("small"), ScriptedBackend("large")
+    router = ModelRouter([small], [large], large_prompt_tokens=10, hedge=False)
+    assert asyncio.run(router.generate("short")) == "from small"
+    assert asyncio.run(router.generate("x" * 100)) == "from large"
+    assert router.model_id == "scripted:small"
+
+
+def test_no_backends_raise():
+    with pytest.raises(NoBackendAvailable):
+        asyncio.run(make_router().generate("prompt"))
+
+
+def test_breaker_opens_on_the_failure_ratio_and_skips_calls():
+    circuit = breaker()
+    circuit.record(True)
+    assert circuit.state == CircuitBreaker.CLOSED
+    circuit.record(False)
+    assert circuit.state == CircuitBreaker.OPEN
+    assert not circuit.allow()
+    with pytest.raises(CircuitOpen):
+        circuit.begin()
+
+
+def test_half_open_breaker_lets_a_single_probe_through():
+    circuit = breaker()
+    circuit.record(False)
+    circuit.record(False)
+    asyncio.run(asyncio.sleep(0.06))
+    assert circuit.allow()
+    assert circuit.begin() is True
+    assert circuit.state == CircuitBreaker.HALF_OPEN
+    assert not circuit.allow()
+    with pytest.raises(CircuitOpen):
+        circuit.begin()
+    # Results of calls started before the circuit opened do not close it
+    circuit.record(True)
+    assert circuit.state == CircuitBreaker.HALF_OPEN
+    circuit.record(True, probe=True)
+    assert circuit.state == CircuitBreaker.CLOSED
+    assert circuit.begin() is False
+
+
+def test_failed_probe_opens_the_circuit_again():
+    circuit = breaker()
+    circuit.record(False)
+    circuit.record(False)
+    asyncio.run(asyncio.sleep(0.06))
+    circuit.record(False, probe=circuit.begin())
+    assert circuit.state == CircuitBreaker.OPEN
+    assert not circuit.allow()
+
+
+def test_abandoned_probe_frees_the_half_open_circuit():
+    circuit = breaker(cooldown=0)
+    circuit.record(False)
+    circuit.record(False)
+    circuit.abandon(circuit.begin())
+    assert circuit.allow()
+    assert circuit.begin() is True
+
+
+def test_recovering_backend_gets_one_probe_while_others_fall_back():
+    flaky = ScriptedBackend("flaky", failing=True)
+    steady = ScriptedBackend("steady")
+    router = make_router(flaky, steady)
+
+    async def scenario():
+        for _ in range(5):
+            await router.generate("prompt")
+        assert router.circuit_states()["scripted:flaky"] == CircuitBreaker.OPEN
+        calls = flaky.calls
+        router._states["scripted:flaky"].breaker.cooldown = 0
+        flaky.failing, flaky.delay = False, 0.02
+        results = await asyncio.gather(*(router.generate("prompt") for _ in range(5)))
+        return calls, results
+
+    calls, results = asyncio.run(scenario())
+    assert flaky.calls == calls + 1
+    assert sorted(results) == ["from flaky"] + ["from steady"] * 4
+    assert router.circuit_states()["scripted:flaky"] == CircuitBreaker.CLOSED
+
+
+def test_stream_falls_back_when_a_backend_fails_before_any_text():
+    router = make_router(ScriptedBackend("primary", failing=True), FakeBackend(latency=0, test_cases=1))
+
+    async def scenario():
+        return "".join([chunk async for chunk in router.stream("prompt")])
+
+    assert '"total_test_cases": 1' in asyncio.run(scenario())
+
+
+def test_fake_backend_spec():
+    backend = create_backend("fake:50:0.25")
+    assert (backend.name, backend.latency, backend.error_rate) == ("fake:50ms", 0.05, 0.25)
+    assert create_backend("gemini:gemini-2.0-flash-lite") is None
+    assert create_backend("unknown:model") is None
+
+
+@pytest.mark.parametrize("error, transient", [
+    (NoBackendAvailable("all circuits open"), True),
+    (httpx.ReadTimeout("slow"), True),
+    (httpx.HTTPStatusError("", request=httpx.Request("POST", "http://x"), response=httpx.Response(429)), True),
+    (httpx.HTTPStatusError("", request=httpx.Request("POST", "http://x"), response=httpx.Response(401)), False),
+    (ValueError("bad prompt"), False),
+])
+def test_transient_errors(error, transient):
+    assert is_transient_error(error) is transient
@@ -0,0 +1,155 @@
+import pytest
+
+import main
+from prompt_builder import (
+    build_repair_instructions, estimate_tokens, merge_test_suites, normalize_description, prepare_description,
+    split_sections, truncate_to_budget,
+)
+
+BASE_URL = "https://jira.example.com"
+
+
+def large_description(sections=3, paragraph_count=30):
+    """A description with headings, far above one section's budget"""
+    return "\n\n".join(
+        f"h2. Area {number}\n" + "\n\n".join(
+            f"Requirement {number}.{paragraph}: the system must record event {paragraph} of area {number}."
+            for paragraph in range(paragraph_count)
+        )
+        for number in range(1, sections + 1)
+    )
+
+
+@pytest.mark.parametrize("markup", [
+    "!screenshot.png!",
+    "!https://jira.example.com/secure/attachment/1/diagram.JPG|thumbnail!",
+    "!mockups/login form.svg|width=300!",
+])
+def test_image_embeds_are_removed(markup):
+    assert normalize_description(f"Login page {markup} shows the form") == "Login page shows the form"
+
+
+@pytest.mark.parametrize("text", [
+    "The total must be != 0 and the count != 5",
+    "Done! Ship it!",
+    "Warn users: !important! values are kept",
+])
+def test_text_between_exclamation_marks_is_kept(text):
+    assert normalize_description(text) == text
+
+
+def test_wiki_markup_is_stripped_and_headings_kept():
+    text = normalize_description(
+        "h1. Login\nAs a *user* I want [the docs|https://docs.example.com] from [~accountid:abc]\n"
+        "{color:red}Required{color}\n\n\n\nDone"
+    )
+    assert text == "## Login\nAs a user I want the docs from\nRequired\n\nDone"
+
+
+def test_pasted_blocks_keep_their_first_lines():
+    log = "\n".join(f"line {number}" for number in range(40))
+    text = normalize_description(f"Crash:\n{{noformat}}\n{log}\n{{noformat}}")
+    assert "line 14" in text and "line 15" not in text
+    assert "[... 25 more lines omitted]" in text
+
+
+def test_truncation_cuts_at_a_line_within_the_budget():
+    text = "\n".join("x" * 39 for _ in range(100))
+    truncated = truncate_to_budget(text, 100)
+    assert estimate_tokens(truncated) <= 120
+    assert truncated.endswith("[... truncated to fit the prompt budget]")
+    assert truncate_to_budget("short", 100) == "short"
+
+
+def test_small_description_is_one_part():
+    assert prepare_description("As a user I want to log in.") == ["As a user I want to log in."]
+
+
+def test_large_description_is_split_on_headings_within_the_budget():
+    parts = prepare_description(large_description(), section_tokens=600, max_sections=4)
+    assert len(parts) == 3
+    assert all(estimate_tokens(part) <= 600 for part in parts)
+    assert [split_sections(part)[0][0] for part in parts] == ["Area 1", "Area 2", "Area 3"]
+
+
+def test_overflow_is_folded_into_the_last_part():
+    parts = prepare_description(large_description(sections=6), section_tokens=600, max_sections=3)
+    assert len(parts) == 3
+    assert parts[-1].startswith("## Area 3")
+
+
+def test_merge_drops_duplicates_and_renumbers():
+    first = {"test_suite": {"suite_name": "Login", "test_cases": [
+        {"test_case_id": "TC_007", "title": "Valid login"}, {"test_case_id": "TC_008", "title": "Locked account"},
+    ]}}
+    second = {"test_suite": {"suite_name": "Other", "test_cases": [
+        {"test_case_id": "TC_001", "title": "valid  LOGIN!"}, {"test_case_id": "TC_002", "title": "Password reset"},
+    ]}}
+    suite = merge_test_suites([first, second])["test_suite"]
+    assert suite["suite_name"] == "Login"
+    assert [(case["test_case_id"], case["title"]) for case in suite["test_cases"]] == [
+        ("TC_001", "Valid login"), ("TC_002", "Locked account"), ("TC_003", "Password reset"),
+    ]
+    assert suite["total_test_cases"] == 3
+
+
+def test_repair_instructions_list_the_existing_titles():
+    instructions = build_repair_instructions(["Valid login", "Locked account"], 2)
+    assert "- Valid login\n- Locked account" in instructions
+    assert "Generate only 2 additional test case(s)" in instructions
+
+
+@pytest.fixture
+def small_sections(monkeypatch):
+    """Split descriptions into sections of 600 tokens"""
+    monkeypatch.setattr(main, "prepare_description", lambda description: prepare_description(description, 600))
+
+
+def stream(app_client, description):
+    async def collect():
+        return [event async for event in main.stream_test_cases_with_gemini(description)]
+
+    return app_client.portal.call(collect)
+
+
+def test_stream_generates_every_section(app_client, small_sections):
+    description = large_description()
+    events = stream(app_client, description)
+    kind, suite = events[-1]
+    assert kind == "suite"
+    # Every section contributes its test cases, the same suite the JSON endpoint generates
+    assert suite["test_suite"]["total_test_cases"] == 3 * 5
+    assert suite == app_client.portal.call(main.generate_test_cases_with_gemini, description)
+    streamed = [data for kind, data in events if kind == "test_case"]
+    assert len(streamed) == 5
+
+
+@pytest.fixture
+def failing_section(monkeypatch, small_sections):
+    """Fail the generation of the section about area 2, transiently"""
+    generate_section = main.generate_test_cases_for_section
+
+    async def generate(description):
+        if description.startswith("## Area 2"):
+            return {'error': 'Gemini returned 503', 'transient': True}
+        return await generate_section(description)
+
+    monkeypatch.setattr(main, "generate_test_cases_for_section", generate)
+
+
+def test_failed_section_fails_the_generation(app_client, failing_section):
+    result = app_client.portal.call(main.generate_test_cases_with_gemini, large_description())
+    assert result == {'error': "1 of 3 sections failed to generate: Gemini returned 503", 'transient': True}
+    kind, data = stream(app_client, large_description())[-1]
+    assert (kind, data) == ('error', result)
+
+
+def test_partial_suite_is_not_cached(app_client, failing_section):
+    description = large_description(paragraph_count=31)
+    issue_details = {'title': "Audit", 'description': description}
+    response = app_client.portal.call(main.generate_test_cases_for_issue, "P-9", issue_details, False, BASE_URL)
+    assert response.error == "Failed to generate test cases: 1 of 3 sections failed to generate: Gemini returned 503"
+    assert response.transient
+    model = main.model_router.model_id
+    assert main.suite_cache.get(main.suite_cache.make_key(main.load_test_case_prompt(), model, description)) is None
+    assert main.suite_cache.get_issue_suite(f"{BASE_URL}/P-9", model) is None
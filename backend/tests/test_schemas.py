@@ -0,0 +1,67 @@
+import json
+
+import pytest
+from pydantic import ValidationError
+
+import schemas
+from model_router import FakeBackend
+from schemas import response_schema
+from suite_parser import parse_structured_suite
+
+SUITE_TEXT = FakeBackend(test_cases=3).response_text("Password reset")
+
+
+def test_test_case_defaults_and_coercions():
+    case = schemas.TestCase.model_validate({
+        "title": "Reset link expires",
+        "preconditions": "A reset email was sent",
+        "test_steps": ["Wait an hour", {"step_number": 2, "step_description": "Open the link"}],
+        "jira_label": "kept",
+    })
+    assert case.priority == "Medium" and case.test_type == "Functional"
+    assert case.preconditions == ["A reset email was sent"]
+    assert [(step.step_number, step.step_description) for step in case.test_steps] == [
+        (1, "Wait an hour"), (2, "Open the link"),
+    ]
+    # Unknown fields the model adds are kept
+    assert case.model_dump()["jira_label"] == "kept"
+
+
+def test_document_requires_a_test_suite():
+    with pytest.raises(ValidationError):
+        schemas.TestSuiteDocument.model_validate({"test_cases": []})
+
+
+def test_response_schema_is_inlined_and_gemini_compatible():
+    schema = response_schema(schemas.TestSuiteDocument)
+    assert "$ref" not in json.dumps(schema) and "$defs" not in json.dumps(schema)
+    suite = schema["properties"]["test_suite"]
+    assert schema["required"] == ["test_suite"]
+    assert suite["properties"]["suite_name"] == {"type": "string", "nullable": True}
+    case = suite["properties"]["test_cases"]["items"]
+    assert case["properties"]["priority"] == {"type": "string", "format": "enum", "enum": ["High", "Medium", "Low"]}
+    assert case["properties"]["test_steps"]["items"]["properties"]["step_number"]["nullable"]
+    # Union values cannot be expressed and are requested as strings
+    assert case["properties"]["test_data"]["properties"]["input_data"] == {"type": "string", "nullable": True}
+    assert "estimated_duration" not in case["required"] and "title" in case["required"]
+
+
+def test_update_schema_lists_changes():
+    schema = response_schema(schemas.TestSuiteUpdate)
+    assert set(schema["properties"]) == {"added", "modified", "retired"}
+    assert schema["properties"]["retired"] == {"type": "array", "items": {"type": "string"}}
+
+
+def test_structured_output_is_validated_in_one_parse():
+    extracted = parse_structured_suite(SUITE_TEXT)
+    assert not extracted.truncated
+    assert extracted.count == 3
+    assert extracted.document == json.loads(SUITE_TEXT)
+
+
+def test_structured_output_that_does_not_validate_falls_back_to_extraction():
+    cut = SUITE_TEXT.index("Verify scenario 3")
+    extracted = parse_structured_suite(SUITE_TEXT[:cut])
+    assert extracted.truncated
+    assert extracted.count == 2
+    assert extracted.missing(expected=3) == 1
@@ -0,0 +1,129 @@
+import numpy as np
+import pytest
+
+import main
+import similarity_index
+from similarity_index import SimilarityIndex, minhash
+from suite_cache import SuiteCache
+
+BASE_URL = "https://jira.example.com"
+LOGIN = (
+    "As a registered user I want to log in with my email and password so that I can see my orders. "
+    "The password field is masked and the login button stays disabled until both fields are filled. "
+    "After five failed attempts the account is locked for fifteen minutes and an email is sent. "
+    "The user must be redirected to the order history page after a successful login."
+)
+SEARCH = "As a shopper I want to search the catalogue by brand, colour and price range and sort the results."
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = SimilarityIndex(str(tmp_path / "suites.db"))
+    yield index
+    index.close()
+
+
+def test_similar_descriptions_rank_first(index):
+    index.add(f"{BASE_URL}/P-1", LOGIN)
+    index.add(f"{BASE_URL}/P-2", SEARCH)
+    matches = index.query(LOGIN.replace("fifteen", "thirty"))
+    assert matches[0][0] == f"{BASE_URL}/P-1"
+    assert matches[0][1] > 0.7
+    assert f"{BASE_URL}/P-2" not in [issue_id for issue_id, _ in matches]
+
+
+def test_normalized_duplicates_are_identical(index):
+    index.add(f"{BASE_URL}/P-1", LOGIN)
+    assert index.query("  " + LOGIN.upper() + "\n") == [(f"{BASE_URL}/P-1", 1.0)]
+
+
+def test_issue_itself_is_excluded(index):
+    index.add(f"{BASE_URL}/P-1", LOGIN)
+    assert index.query(LOGIN, exclude=f"{BASE_URL}/P-1") == []
+
+
+def test_reindexed_issue_matches_its_new_description(index):
+    index.add(f"{BASE_URL}/P-1", LOGIN)
+    index.query(LOGIN)
+    index.add(f"{BASE_URL}/P-1", SEARCH)
+    assert index.query(SEARCH) == [(f"{BASE_URL}/P-1", 1.0)]
+    assert index.query(LOGIN) == []
+
+
+def test_sorted_bands_find_the_same_matches(index, monkeypatch):
+    monkeypatch.setattr(similarity_index, "REINDEX_MIN_ROWS", 0)
+    index.add_many((f"{BASE_URL}/P-{n}", f"{SEARCH} Variant {n}.") for n in range(20))
+    index.add(f"{BASE_URL}/P-LOGIN", LOGIN)
+    assert index.query(LOGIN)[0] == (f"{BASE_URL}/P-LOGIN", 1.0)
+    assert len(index) == 21
+
+
+def test_empty_description_is_not_indexed(index):
+    assert minhash(" \n ") is None
+    assert index.add_many([(f"{BASE_URL}/P-1", "")]) == 0
+    assert index.query("") == []
+
+
+def test_signatures_are_shared_between_processes(index, tmp_path):
+    other = SimilarityIndex(str(tmp_path / "suites.db"))
+    try:
+        other.add(f"{BASE_URL}/P-1", LOGIN)
+        assert index.query(LOGIN) == [(f"{BASE_URL}/P-1", 1.0)]
+        assert index.stats()['entries'] == 1
+    finally:
+        other.close()
+
+
+def test_prune_drops_signatures_without_a_suite(tmp_path):
+    path = str(tmp_path / "suites.db")
+    cache = SuiteCache(path=path)
+    index = SimilarityIndex(path)
+    try:
+        cache.make_key("prompt", "model", LOGIN)
+        cache.put_issue_suite(f"{BASE_URL}/P-1", "model", LOGIN, "", {})
+        index.add_many([(f"{BASE_URL}/P-1", LOGIN), (f"{BASE_URL}/P-2", SEARCH)])
+        assert index.prune() == 1
+        index.refresh()
+        assert [issue_id for issue_id, _ in index.query(SEARCH)] == []
+    finally:
+        index.close()
+        cache.close()
+
+
+def test_signatures_are_stable_across_runs():
+    signature = minhash(LOGIN)
+    assert signature.dtype == np.uint32
+    assert np.array_equal(signature, minhash(LOGIN))
+
+
+def cache_key(description):
+    return main.suite_cache.make_key(main.load_test_case_prompt(), main.model_router.model_id, description)
+
+
+def store(app_client, issue_key, description, suite):
+    app_client.portal.call(main.store_issue_suite, f"{BASE_URL}/{issue_key}", cache_key(description), description, "", suite)
+
+
+def match(app_client, issue_key, description):
+    return app_client.portal.call(
+        main.match_similar_suite, f"{BASE_URL}/{issue_key}", issue_key, cache_key(description), description, ""
+    )
+
+
+def test_identical_description_reuses_the_suite(app_client):
+    suite = {"test_suite": {"test_cases": [{"test_case_id": "TC-001", "title": "Login succeeds"}]}}
+    store(app_client, "SIM-1", LOGIN, suite)
+    similar = match(app_client, "SIM-2", LOGIN)
+    assert similar.issue_key == "SIM-1"
+    assert similar.reused
+    assert main.suite_cache.get_issue_suite(f"{BASE_URL}/SIM-2", main.model_router.model_id).test_cases == suite
+
+
+def test_negated_requirement_is_adapted_not_reused(app_client):
+    suite = {"test_suite": {"test_cases": [{"test_case_id": "TC-001", "title": "Redirect after login"}]}}
+    store(app_client, "SIM-3", LOGIN + " Audit.", suite)
+    negated = (LOGIN + " Audit.").replace("must be", "must not be")
+    similar = match(app_client, "SIM-4", negated)
+    assert similar.issue_key == "SIM-3"
+    assert not similar.reused
+    assert main.suite_cache.get_issue_suite(f"{BASE_URL}/SIM-4", main.model_router.model_id) is None
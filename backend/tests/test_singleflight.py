@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+
+from metrics import render_metrics
+from singleflight import SingleFlight
+
+
+def coalesced_total(flight):
+    prefix = f'singleflight_coalesced_total{{flight="{flight}",'
+    samples = [line for line in render_metrics().splitlines() if line.startswith(prefix)]
+    return float(samples[0].split()[-1]) if samples else 0
+
+
+def test_identical_keys_share_one_call():
+    before = coalesced_total("shared")
+
+    async def scenario():
+        flight = SingleFlight("shared")
+        calls = []
+
+        async def call():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"value": len(calls)}
+
+        results = await asyncio.gather(*(flight.do("key", call) for _ in range(5)))
+        return flight, calls, results
+
+    flight, calls, results = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert flight.stats() == {"executions": 1, "coalesced": 4, "in_flight": 0}
+    assert coalesced_total("shared") == before + 4
+
+
+def test_different_keys_run_separately():
+    async def scenario():
+        flight = SingleFlight("test")
+
+        async def call(value):
+            await asyncio.sleep(0.01)
+            return value
+
+        return flight, await asyncio.gather(
+            flight.do(("generate", "a"), lambda: call("generate")),
+            flight.do(("update", "a"), lambda: call("update")),
+        )
+
+    flight, results = asyncio.run(scenario())
+    assert results == ["generate", "update"]
+    assert flight.executions == 2
+    assert flight.coalesced == 0
+
+
+def test_key_is_released_once_the_call_finishes():
+    async def scenario():
+        flight = SingleFlight("test")
+        calls = []
+
+        async def call():
+            calls.append(1)
+            return len(calls)
+
+        first = await flight.do("key", call)
+        second = await flight.do("key", call)
+        return first, second
+
+    assert asyncio.run(scenario()) == (1, 2)
+
+
+def test_errors_reach_every_waiter():
+    async def scenario():
+        flight = SingleFlight("test")
+
+        async def call():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("upstream failed")
+
+        return await asyncio.gather(*(flight.do("key", call) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert [str(result) for result in results] == ["upstream failed"] * 3
+
+
+def test_cancelled_leader_does_not_cancel_the_shared_call():
+    async def scenario():
+        flight = SingleFlight("test")
+
+        async def call():
+            await asyncio.sleep(0.02)
+            return "done"
+
+        leader = asyncio.create_task(flight.do("key", call))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("key", call))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(scenario()) == "done"
@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+import main
+
+BASE_URL = "https://jira.example.com"
+
+
+@pytest.fixture
+def issue(monkeypatch):
+    """Serve one issue from memory instead of Jira; tests set its description"""
+    details = {'title': "Sign in", 'description': ""}
+
+    async def fetch(issue_key, base_url, auth_token=None, priority=main.INTERACTIVE):
+        return dict(details)
+
+    monkeypatch.setattr(main, "fetch_jira_issue_details_with_auth", fetch)
+    return details
+
+
+def stream_events(client, issue_key):
+    response = client.post("/generate-test-cases/stream", json={"url": f"{BASE_URL}/browse/{issue_key}"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = []
+    for block in response.text.strip().split("\n\n"):
+        event, data = block.split("\n", 1)
+        events.append((event.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+    return events
+
+
+def test_each_test_case_is_streamed_before_the_complete_suite(app_client, issue):
+    issue['description'] = "As a shopper I want to stream my saved carts so that I can restore one."
+    events = stream_events(app_client, "S-1")
+    kinds = [kind for kind, _ in events]
+    assert kinds[0] == "issue" and kinds[-1] == "complete"
+    complete = events[-1][1]
+    assert not complete["cached"]
+    streamed = [data for kind, data in events if kind == "test_case"]
+    assert streamed == complete["test_cases"]["test_suite"]["test_cases"]
+
+
+def test_repeated_stream_is_served_from_the_cache(app_client, issue):
+    issue['description'] = "As an auditor I want to stream sign-in history so that I can review it."
+    first = stream_events(app_client, "S-2")
+    second = stream_events(app_client, "S-2")
+    assert second[-1][1]["cached"]
+    assert second[-1][1]["test_cases"] == first[-1][1]["test_cases"]
+
+
+def test_issue_without_description_streams_an_error(app_client, issue):
+    events = stream_events(app_client, "S-3")
+    assert events[-1][0] == "error"
+    assert "No description found" in events[-1][1]["error"]
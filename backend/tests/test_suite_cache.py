@@ -0,0 +1,86 @@
+import time
+
+import pytest
+
+from suite_cache import SuiteCache, content_hash
+
+SUITE = {"test_cases": [{"title": "Login succeeds"}]}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = SuiteCache(path=str(tmp_path / "suites.db"), max_entries=2)
+    yield cache
+    cache.close()
+
+
+def test_content_hash_separates_parts():
+    assert content_hash("ab", "c") != content_hash("a", "bc")
+    assert content_hash("a", "b") == content_hash("a", "b")
+
+
+def test_suite_is_served_by_key_and_counted(cache):
+    key = cache.make_key("prompt", "model", "As a user I log in.")
+    assert cache.get(key) is None
+    cache.put(key, "model", SUITE)
+    assert cache.get(key) == SUITE
+    assert cache.stats() == {"entries": 1, "hits": 1, "misses": 1, "hit_ratio": 0.5}
+
+
+def test_key_covers_prompt_model_and_description(cache):
+    key = cache.make_key("prompt", "model", "description")
+    assert cache.make_key("prompt", "other model", "description") != key
+    assert cache.make_key("prompt", "model", "other description") != key
+    assert cache.make_key("new prompt", "model", "description") != key
+
+
+def test_new_prompt_template_purges_old_suites(cache):
+    key = cache.make_key("prompt", "model", "description")
+    cache.put(key, "model", SUITE)
+    cache.put_issue_suite("https://jira/P-1", "model", "description", "2024-01-01", SUITE)
+    cache.make_key("new prompt", "model", "description")
+    assert cache.get(key) is None
+    assert cache.get_issue_suite("https://jira/P-1", "model") is None
+
+
+def test_suites_past_the_max_age_are_not_served(cache):
+    key = cache.make_key("prompt", "model", "description")
+    cache.put(key, "model", SUITE)
+    cache.max_age_seconds = 0.01
+    time.sleep(0.02)
+    assert cache.get(key) is None
+
+
+def test_least_recently_used_suite_is_evicted(cache):
+    keys = [cache.make_key("prompt", "model", f"description {n}") for n in range(3)]
+    cache.put(keys[0], "model", SUITE)
+    time.sleep(0.01)
+    cache.put(keys[1], "model", SUITE)
+    time.sleep(0.01)
+    cache.get(keys[0])
+    time.sleep(0.01)
+    cache.put(keys[2], "model", SUITE)
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) == SUITE
+
+
+def test_issue_suite_is_kept_per_model(cache):
+    cache.make_key("prompt", "model", "description")
+    cache.put_issue_suite("https://jira/P-1", "model", "description", "2024-01-01", SUITE)
+    suite = cache.get_issue_suite("https://jira/P-1", "model")
+    assert (suite.description, suite.updated_date, suite.test_cases) == ("description", "2024-01-01", SUITE)
+    assert cache.get_issue_suite("https://jira/P-1", "other model") is None
+
+
+def test_issue_suites_are_listed_by_project_and_key_in_pages(cache):
+    cache.max_entries = 100
+    cache.make_key("prompt", "model", "description")
+    for issue_key in ("AB_C-1", "AB_C-2", "ABXC-3", "OTHER-1"):
+        cache.put_issue_suite(f"https://jira/{issue_key}", "model", "description", "", SUITE)
+
+    # The underscore in the project key is literal, not a LIKE wildcard
+    project = [issue_id for issue_id, _ in cache.iter_issue_suites(project="AB_C", page_size=1)]
+    assert project == ["https://jira/AB_C-1", "https://jira/AB_C-2"]
+    keys = [issue_id for issue_id, _ in cache.iter_issue_suites(issue_keys=["OTHER-1", "ABXC-3"])]
+    assert keys == ["https://jira/ABXC-3", "https://jira/OTHER-1"]
+    assert len(list(cache.iter_issue_suites(page_size=3))) == 4
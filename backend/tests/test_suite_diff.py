@@ -0,0 +1,104 @@
+import main
+import schemas
+from suite_cache import IssueSuite
+from suite_diff import apply_suite_update, diff_descriptions
+
+BASE_URL = "https://jira.example.com"
+
+DESCRIPTION = """h2. Login
+Users sign in with email and password.
+
+h2. Lockout
+Five failed attempts lock the account for 15 minutes.
+
+h2. Audit
+Every sign-in is logged."""
+
+
+def suite(*case_ids):
+    return {
+        "test_suite": {
+            "suite_name": "Login",
+            "total_test_cases": len(case_ids),
+            "test_cases": [{"test_case_id": case_id, "title": f"Case {case_id}"} for case_id in case_ids],
+        }
+    }
+
+
+def test_identical_descriptions_have_no_changes():
+    diff = diff_descriptions(DESCRIPTION, DESCRIPTION)
+    assert not diff.has_changes
+    assert diff.unchanged == 3
+    assert diff.changed_ratio == 0.0
+
+
+def test_changed_section_is_reported_with_both_versions():
+    edited = DESCRIPTION.replace("Five failed attempts", "Three failed attempts")
+    diff = diff_descriptions(DESCRIPTION, edited)
+    assert diff.added == [] and diff.removed == []
+    assert len(diff.changed) == 1
+    old_text, new_text = diff.changed[0]
+    assert "Five failed attempts" in old_text and "Three failed attempts" in new_text
+    assert diff.unchanged == 2
+    assert diff.changed_ratio == 1 / 3
+
+
+def test_added_section():
+    diff = diff_descriptions(DESCRIPTION, DESCRIPTION + "\n\nh2. Remember me\nSessions last 30 days when ticked.")
+    assert len(diff.added) == 1 and "Remember me" in diff.added[0]
+    assert diff.changed == [] and diff.removed == []
+    assert diff.unchanged == 3
+
+
+def test_removed_section():
+    diff = diff_descriptions(DESCRIPTION, DESCRIPTION.replace("\n\nh2. Lockout\nFive failed attempts lock the account for 15 minutes.", ""))
+    assert len(diff.removed) == 1 and "Lockout" in diff.removed[0]
+    assert diff.added == [] and diff.changed == []
+    assert diff.unchanged == 2
+
+
+def test_update_keeps_ids_and_numbers_new_cases_after_the_highest():
+    update = schemas.TestSuiteUpdate(
+        added=[schemas.TestCase(test_case_id="TC_001", title="Remember me")],
+        modified=[schemas.TestCase(test_case_id="TC_002", title="Lockout after three attempts")],
+        retired=["TC_003", "TC_999"],
+    )
+    updated, changes = apply_suite_update(suite("TC_001", "TC_002", "TC_003", "TC_007"), update)
+    cases = updated["test_suite"]["test_cases"]
+    assert [case["test_case_id"] for case in cases] == ["TC_001", "TC_002", "TC_007", "TC_008"]
+    assert cases[1]["title"] == "Lockout after three attempts"
+    assert cases[3]["title"] == "Remember me"
+    assert updated["test_suite"]["total_test_cases"] == 4
+    assert updated["test_suite"]["suite_name"] == "Login"
+    assert changes == {"added": ["TC_008"], "modified": ["TC_002"], "retired": ["TC_003"]}
+
+
+def test_modified_case_that_never_existed_is_added():
+    update = schemas.TestSuiteUpdate(modified=[schemas.TestCase(test_case_id="TC_050", title="Unknown")])
+    updated, changes = apply_suite_update(suite("TC_001"), update)
+    assert changes == {"added": ["TC_002"], "modified": [], "retired": []}
+    assert updated["test_suite"]["test_cases"][1]["title"] == "Unknown"
+
+
+def test_update_flights_are_keyed_apart_from_generations():
+    cache_key = "prompt-model-description"
+    previous = IssueSuite("Old description", "", {"test_suite": {"test_cases": []}})
+    edited = IssueSuite("Older description", "", previous.test_cases)
+    assert main.update_flight_key(cache_key, previous) != cache_key
+    assert main.update_flight_key(cache_key, previous) == main.update_flight_key(cache_key, previous)
+    # Updates from different previous suites cannot share a result
+    assert main.update_flight_key(cache_key, previous) != main.update_flight_key(cache_key, edited)
+
+
+def test_edited_issue_is_updated_instead_of_regenerated(app_client):
+    def generate(description):
+        details = {'title': "Login", 'description': description}
+        return app_client.portal.call(main.generate_test_cases_for_issue, "D-1", details, False, BASE_URL)
+
+    first = generate(DESCRIPTION)
+    assert first.changes is None and not first.cached
+    updated = generate(DESCRIPTION.replace("Five failed attempts", "Three failed attempts"))
+    assert updated.changes == {"added": [], "modified": [], "retired": []}
+    # Nothing was affected, so the previous suite is kept as it was
+    assert updated.test_cases == first.test_cases
+    assert generate(DESCRIPTION.replace("Five failed attempts", "Three failed attempts")).cached
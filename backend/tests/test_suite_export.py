@@ -0,0 +1,86 @@
+import csv
+import io
+import json
+import xml.etree.ElementTree as ElementTree
+
+import pytest
+
+import main
+from suite_export import export_csv, export_jsonl, export_testrail, export_xray, export_zephyr
+
+SUITE = {"test_suite": {"suite_name": "Checkout", "test_cases": [
+    {
+        "test_case_id": "TC_001", "title": "Pay by card", "description": "Card payment <succeeds> & confirms",
+        "preconditions": ["Cart has items", "User signed in"],
+        "test_steps": [
+            {"step_number": 1, "step_description": "Enter card", "expected_result": "Card accepted"},
+            {"step_number": 2, "step_description": "Confirm", "expected_result": "Order placed"},
+        ],
+        "test_data": {"input_data": {"card": "4111 1111 1111 1111", "cvv": "123"}, "expected_output": ["receipt"]},
+        "priority": "Medium", "test_type": "Functional", "estimated_duration": "5 minutes",
+    },
+    {"test_case_id": "TC_002", "title": "Empty cart", "test_data": {"input_data": "no items"}, "priority": "High"},
+]}}
+SUITES = [("SHOP-7", SUITE)]
+
+
+def read(chunks):
+    return "".join(chunks)
+
+
+def test_csv_has_one_row_per_step_and_json_test_data():
+    rows = list(csv.DictReader(io.StringIO(read(export_csv(SUITES)))))
+    assert [(row["test_case_id"], row["step_number"]) for row in rows] == [("TC_001", "1"), ("TC_001", "2"), ("TC_002", "")]
+    assert json.loads(rows[0]["input_data"]) == {"card": "4111 1111 1111 1111", "cvv": "123"}
+    assert json.loads(rows[0]["expected_output"]) == ["receipt"]
+    assert rows[0]["preconditions"] == "Cart has items\nUser signed in"
+    assert (rows[2]["input_data"], rows[2]["expected_output"]) == ("no items", "")
+
+
+def test_jsonl_has_one_object_per_test_case():
+    lines = [json.loads(line) for line in read(export_jsonl(SUITES)).splitlines()]
+    assert [(line["issue_key"], line["suite_name"], line["test_case_id"]) for line in lines] == [
+        ("SHOP-7", "Checkout", "TC_001"), ("SHOP-7", "Checkout", "TC_002"),
+    ]
+
+
+def test_xray_tests_link_their_requirement_and_carry_json_test_data():
+    tests = json.loads(read(export_xray(SUITES + [("SHOP-8", {"test_suite": {}})])))
+    first = tests[0]
+    assert first["fields"]["project"] == {"key": "SHOP"}
+    assert first["update"]["issuelinks"][0]["add"]["outwardIssue"] == {"key": "SHOP-7"}
+    assert "* User signed in" in first["fields"]["description"]
+    assert json.loads(first["steps"][0]["data"]) == {"card": "4111 1111 1111 1111", "cvv": "123"}
+    assert first["steps"][1]["data"] == ""
+    assert len(tests) == 2
+
+
+def test_zephyr_maps_priorities_and_carries_json_test_data():
+    tests = json.loads(read(export_zephyr(SUITES)))
+    assert [test["priority"] for test in tests] == ["Normal", "High"]
+    steps = tests[0]["testScript"]["steps"]
+    assert json.loads(steps[0]["testData"]) == {"card": "4111 1111 1111 1111", "cvv": "123"}
+    assert tests[0]["issueLinks"] == ["SHOP-7"]
+
+
+def test_testrail_xml_is_escaped_and_well_formed():
+    root = ElementTree.fromstring(read(export_testrail(SUITES)))
+    section = root.find("sections/section")
+    assert section.findtext("name") == "SHOP-7: Checkout"
+    case = section.find("cases/case")
+    assert case.findtext("references") == "SHOP-7"
+    assert [step.findtext("content") for step in case.findall("custom/steps_separated/step")] == ["Enter card", "Confirm"]
+
+
+def test_export_endpoint_streams_cached_suites(app_client):
+    main.suite_cache.put_issue_suite("https://jira.example.com/EXP-1", main.model_router.model_id, "", "", SUITE)
+    response = app_client.get("/export", params={"format": "jsonl", "issue_keys": "EXP-1"})
+    assert response.status_code == 200
+    assert response.headers["content-disposition"] == 'attachment; filename="test_cases_export.jsonl"'
+    assert [json.loads(line)["title"] for line in response.text.splitlines()] == ["Pay by card", "Empty cart"]
+
+
+@pytest.mark.parametrize("params", [{"format": "pdf"}, {"source": "elsewhere"}])
+def test_export_rejects_unknown_options(app_client, params):
+    assert app_client.get("/export", params=params).status_code == 400
+
@@ -0,0 +1,94 @@
+import json
+
+import pytest
+
+import suite_parser
+from model_router import FakeBackend
+from suite_parser import SuiteExtractionError, extract_json_object, extract_suite
+
+SUITE_TEXT = FakeBackend(test_cases=3).response_text("Login with SSO")
+CASES = json.loads(SUITE_TEXT)["test_suite"]["test_cases"]
+
+
+def feed_in_chunks(text, size):
+    parser = suite_parser.TestCaseStreamParser()
+    emitted = []
+    for start in range(0, len(text), size):
+        emitted.extend(parser.feed(text[start:start + size]))
+    return parser, emitted
+
+
+@pytest.mark.parametrize("size", [1, 7, 256, len(SUITE_TEXT)])
+def test_stream_parser_emits_every_case_of_a_complete_suite(size):
+    parser, emitted = feed_in_chunks(f"```json\n{SUITE_TEXT}\n```", size)
+    assert parser.finished
+    assert emitted == CASES
+    assert parser.metadata["suite_name"].startswith("Fake suite")
+
+
+@pytest.mark.parametrize("size", [1, 13, 4096])
+def test_stream_parser_keeps_completed_cases_of_truncated_input(size):
+    # Cut the stream in the middle of the third test case
+    cut = SUITE_TEXT.index(CASES[2]["title"]) + 5
+    parser, emitted = feed_in_chunks(SUITE_TEXT[:cut], size)
+    assert not parser.finished
+    assert emitted == CASES[:2]
+    suite = parser.assembled_suite()["test_suite"]
+    assert suite["total_test_cases"] == 2
+    assert suite["test_cases"] == CASES[:2]
+
+
+def test_stream_parser_ignores_braces_inside_strings():
+    case = {**CASES[0], "description": 'Handles "{quoted}" input and } stray [brackets]'}
+    text = json.dumps({"test_suite": {"suite_name": "S", "test_cases": [case]}})
+    parser, emitted = feed_in_chunks(text, 3)
+    assert parser.finished
+    assert emitted == [case]
+
+
+def test_stream_parser_truncated_inside_a_string_escape():
+    case = {**CASES[0], "description": 'Path C:\\temp\\"new"'}
+    text = json.dumps({"test_suite": {"test_cases": [CASES[1], case]}})
+    cut = text.index("new") - 1
+    parser, emitted = feed_in_chunks(text[:cut], 1)
+    assert emitted == [CASES[1]]
+    assert not parser.finished
+
+
+
+def test_extract_suite_skips_the_fence_and_surrounding_prose():
+    text = f"Here are your tests:\n```json\n{SUITE_TEXT}\n```\nLet me know {{if}} you need more."
+    extracted = extract_suite(text)
+    assert not extracted.truncated
+    assert extracted.document["test_suite"]["test_cases"] == CASES
+    assert extracted.missing(expected=5) == 0
+
+
+def test_extract_suite_recovers_complete_cases_from_truncated_output():
+    cut = SUITE_TEXT.index(CASES[2]["title"]) + 5
+    extracted = extract_suite(SUITE_TEXT[:cut])
+    assert extracted.truncated
+    assert extracted.count == 2
+    assert extracted.missing(expected=3) == 1
+
+
+def test_extract_suite_drops_invalid_cases_and_normalizes_the_rest():
+    loose = {**CASES[0], "preconditions": "Logged out", "test_steps": ["Open the page", "Sign in"]}
+    text = json.dumps({"test_suite": {"test_cases": [loose, {"title": None}], "total_test_cases": 2}})
+    extracted = extract_suite(text)
+    [case] = extracted.document["test_suite"]["test_cases"]
+    assert case["preconditions"] == ["Logged out"]
+    assert [step["step_description"] for step in case["test_steps"]] == ["Open the page", "Sign in"]
+    assert extracted.dropped == 1
+    assert extracted.missing(expected=5) == 1
+
+
+def test_extract_suite_without_json_fails():
+    with pytest.raises(SuiteExtractionError):
+        extract_suite("The model refused to answer.")
+
+
+def test_extract_json_object_requires_complete_json():
+    assert extract_json_object('Sure: {"added": []} and {"ignored": true}') == {"added": []}
+    with pytest.raises(SuiteExtractionError):
+        extract_json_object('{"added": [')
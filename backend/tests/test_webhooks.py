@@ -0,0 +1,147 @@
+import hashlib
+import hmac
+import json
+import os
+from dataclasses import replace
+
+import pytest
+
+import main
+from webhooks import allowed_base_url, parse_issue_event, skip_reason, verify_signature
+
+SAMPLES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "webhook_samples")
+SECRET = "s3cret"
+
+
+def load_sample(name):
+    with open(os.path.join(SAMPLES_DIR, f"{name}.json")) as f:
+        return parse_issue_event(json.load(f))
+
+
+def sign(body, secret=SECRET):
+    return "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def test_nothing_verifies_without_a_secret():
+    assert not verify_signature(b"{}", None, secret=None)
+    assert not verify_signature(b"{}", sign(b"{}", secret=""), secret="")
+
+
+def test_valid_signature_is_accepted():
+    body = b'{"webhookEvent": "jira:issue_updated"}'
+    assert verify_signature(body, sign(body), secret=SECRET)
+
+
+@pytest.mark.parametrize("signature", [
+    None,
+    "",
+    "md5=abc",
+    sign(b"{}"),
+    sign(b'{"webhookEvent": "jira:issue_updated"}', secret="other"),
+    sign(b'{"webhookEvent": "jira:issue_updated"}')[len("sha256="):],
+])
+def test_invalid_signatures_are_rejected(signature):
+    assert not verify_signature(b'{"webhookEvent": "jira:issue_updated"}', signature, secret=SECRET)
+
+
+def test_description_edit_is_generated():
+    issue = load_sample("issue_updated_description")
+    assert skip_reason(issue, project_keys=["PROJECT"], issue_types=["story"]) is None
+
+
+def test_created_issue_is_generated():
+    assert skip_reason(load_sample("issue_created"), project_keys=[], issue_types=["story"]) is None
+
+
+def test_update_without_description_change_is_skipped():
+    issue = load_sample("issue_updated_status")
+    assert skip_reason(issue, project_keys=[], issue_types=["story"]) == "no description or summary change"
+
+
+def test_update_without_changelog_is_generated():
+    issue = replace(load_sample("issue_updated_status"), changed_fields=None)
+    assert skip_reason(issue, project_keys=[], issue_types=["story"]) is None
+
+
+def test_unwatched_project_is_skipped():
+    issue = load_sample("issue_updated_description")
+    assert skip_reason(issue, project_keys=["OTHER"], issue_types=["story"]) == "project PROJECT not watched"
+
+
+def test_unwatched_issue_type_is_skipped():
+    issue = replace(load_sample("issue_created"), issue_type="Epic")
+    assert skip_reason(issue, project_keys=[], issue_types=["story", "bug"]) == "issue type Epic not watched"
+
+
+def test_other_events_are_not_parsed():
+    assert parse_issue_event({"webhookEvent": "comment_created", "issue": {"key": "PROJECT-1"}}) is None
+    assert parse_issue_event({"webhookEvent": "jira:issue_updated"}) is None
+
+
+def test_only_configured_jira_sites_are_allowed():
+    allowed = [None, "https://yourcompany.atlassian.net/", "http://127.0.0.1:8100"]
+    assert allowed_base_url("HTTPS://YourCompany.atlassian.net", allowed) == "https://yourcompany.atlassian.net"
+    assert allowed_base_url("http://127.0.0.1:8100", allowed) == "http://127.0.0.1:8100"
+    assert allowed_base_url("https://attacker.example", allowed) is None
+    assert allowed_base_url("http://yourcompany.atlassian.net", allowed) is None
+    assert allowed_base_url("https://yourcompany.atlassian.net.attacker.example", allowed) is None
+
+
+@pytest.fixture
+def receiver(app_client, monkeypatch):
+    """The webhook endpoint with a secret and the recorded Jira site configured"""
+    monkeypatch.setattr(main, "JIRA_WEBHOOK_SECRET", SECRET)
+    monkeypatch.setattr(main, "JIRA_BASE_URL", "https://yourcompany.atlassian.net")
+    monkeypatch.setattr(main, "WEBHOOK_ALLOWED_BASE_URLS", [])
+
+    def deliver(payload, secret=SECRET):
+        body = json.dumps(payload).encode()
+        headers = {"Content-Type": "application/json", "X-Hub-Signature": sign(body, secret)}
+        return app_client.post("/webhooks/jira", content=body, headers=headers)
+
+    return deliver
+
+
+@pytest.fixture
+def scheduled(monkeypatch):
+    """Requests handed to the debouncer, which is not run"""
+    requests = []
+    monkeypatch.setattr(main.webhook_debouncer, "schedule", lambda key, request: requests.append(request) or 0)
+    return requests
+
+
+def sample_payload(name, **issue):
+    with open(os.path.join(SAMPLES_DIR, f"{name}.json")) as f:
+        payload = json.load(f)
+    payload["issue"].update(issue)
+    return payload
+
+
+def test_signed_delivery_for_the_configured_site_is_scheduled(receiver, scheduled):
+    response = receiver(sample_payload("issue_created"))
+    assert response.status_code == 202
+    assert response.json()["accepted"]
+    assert scheduled[0]["url"] == "https://yourcompany.atlassian.net/browse/PROJECT-42"
+
+
+def test_deliveries_are_refused_without_a_secret(receiver, monkeypatch):
+    monkeypatch.setattr(main, "JIRA_WEBHOOK_SECRET", None)
+    assert receiver(sample_payload("issue_created"), secret="").status_code == 503
+
+
+def test_wrongly_signed_delivery_is_rejected(receiver):
+    assert receiver(sample_payload("issue_created"), secret="guess").status_code == 401
+
+
+def test_issue_on_another_site_is_not_fetched(receiver, scheduled):
+    payload = sample_payload("issue_created", self="https://attacker.example/rest/api/2/issue/10042")
+    response = receiver(payload)
+    assert not response.json()["accepted"]
+    assert "attacker.example" in response.json()["reason"]
+    assert scheduled == []
+
+
+def test_listed_site_is_fetched_from(receiver, scheduled, monkeypatch):
+    monkeypatch.setattr(main, "WEBHOOK_ALLOWED_BASE_URLS", ["http://127.0.0.1:8100"])
+    receiver(sample_payload("issue_created", self="http://127.0.0.1:8100/rest/api/2/issue/10042"))
+    assert scheduled[0]["url"] == "http://127.0.0.1:8100/browse/PROJECT-42"
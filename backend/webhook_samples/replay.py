@@ -0,0 +1,44 @@
+"""Post recorded Jira webhook payloads to a running backend.
+
+Signs each body with JIRA_WEBHOOK_SECRET the way Jira does (the backend
+refuses unsigned deliveries), and can rewrite the issue's ``self`` URL so the
+queued job fetches from a local stub Jira instead of the recorded site; the
+backend must list that URL in WEBHOOK_ALLOWED_BASE_URLS.
+
+Run from the backend directory:
+    python webhook_samples/replay.py webhook_samples/issue_created.json
+    python webhook_samples/replay.py webhook_samples/*.json --jira-url http://127.0.0.1:8100
+"""
+import argparse
+import hashlib
+import hmac
+import json
+import os
+
+import httpx
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("payloads", nargs="+", help="recorded webhook JSON files")
+    parser.add_argument("--url", default="http://localhost:8000/webhooks/jira")
+    parser.add_argument("--jira-url", default=None, help="replace the recorded Jira site in issue.self")
+    parser.add_argument("--secret", default=os.getenv("JIRA_WEBHOOK_SECRET"))
+    args = parser.parse_args()
+
+    for path in args.payloads:
+        with open(path) as f:
+            payload = json.load(f)
+        if args.jira_url and payload.get("issue", {}).get("self"):
+            issue = payload["issue"]
+            issue["self"] = f"{args.jira_url.rstrip('/')}/rest/api/2/issue/{issue.get('id', issue['key'])}"
+        body = json.dumps(payload).encode()
+        headers = {"Content-Type": "application/json"}
+        if args.secret:
+            headers["X-Hub-Signature"] = "sha256=" + hmac.new(args.secret.encode(), body, hashlib.sha256).hexdigest()
+        response = httpx.post(args.url, content=body, headers=headers)
+        print(f"{os.path.basename(path)}: {response.status_code} {response.text}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+import asyncio
+import hashlib
+import hmac
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# Projects and issue types to pre-generate suites for (empty = any)
+WEBHOOK_PROJECT_KEYS = [
+    key.strip() for key in os.getenv("WEBHOOK_PROJECT_KEYS", os.getenv("DEFAULT_PROJECT_KEY", "")).split(',') if key.strip()
+]
+WEBHOOK_ISSUE_TYPES = [
+    name.strip().lower() for name in os.getenv("WEBHOOK_ISSUE_TYPES", "Story,Task,Bug").split(',') if name.strip()
+]
+# Wait for edits to settle before generating, but never longer than the max after the first edit
+WEBHOOK_DEBOUNCE_SECONDS = float(os.getenv("WEBHOOK_DEBOUNCE_SECONDS", "30"))
+WEBHOOK_DEBOUNCE_MAX_SECONDS = float(os.getenv("WEBHOOK_DEBOUNCE_MAX_SECONDS", "300"))
+# Shared secret configured on the Jira webhook; requests must carry a matching X-Hub-Signature
+# (deliveries are refused while it is unset)
+JIRA_WEBHOOK_SECRET = os.getenv("JIRA_WEBHOOK_SECRET")
+# Jira sites other than JIRA_BASE_URL whose issues webhooks may name; the job fetches with JIRA_API_TOKEN
+WEBHOOK_ALLOWED_BASE_URLS = [
+    url.strip() for url in os.getenv("WEBHOOK_ALLOWED_BASE_URLS", "").split(',') if url.strip()
+]
+
+ISSUE_EVENTS = ('jira:issue_created', 'jira:issue_updated')
+# Changelog fields that affect the generated suite
+GENERATION_FIELDS = {'description', 'summary'}
+
+
+@dataclass
+class WebhookIssue:
+    """The parts of a Jira issue webhook the pre-warmer needs"""
+
+    event: str
+    issue_key: str
+    project_key: str
+    issue_type: str
+    base_url: Optional[str]
+    updated: str
+    changed_fields: Optional[List[str]]
+
+
+def verify_signature(body: bytes, signature: Optional[str], secret: Optional[str] = JIRA_WEBHOOK_SECRET) -> bool:
+    """Check Jira's ``X-Hub-Signature: sha256=<hmac>`` header; never true without a secret"""
+    if not secret or not signature or not signature.startswith('sha256='):
+        return False
+    expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature[len('sha256='):])
+
+
+def parse_issue_event(payload: Dict[str, Any]) -> Optional[WebhookIssue]:
+    """Extract the issue from an issue_created/issue_updated payload, or None for other events"""
+    event = payload.get('webhookEvent', '')
+    issue = payload.get('issue') or {}
+    if event not in ISSUE_EVENTS or not issue.get('key'):
+        return None
+    fields = issue.get('fields') or {}
+    issue_key = issue['key']
+    project_key = (fields.get('project') or {}).get('key') or issue_key.rsplit('-', 1)[0]
+    parsed = urlparse(issue.get('self') or '')
+    changelog = payload.get('changelog')
+    changed_fields = None
+    if changelog is not None:
+        changed_fields = [item.get('field', '').lower() for item in changelog.get('items') or []]
+    return WebhookIssue(
+        event=event,
+        issue_key=issue_key,
+        project_key=project_key,
+        issue_type=(fields.get('issuetype') or {}).get('name', ''),
+        base_url=f"{parsed.scheme}://{parsed.netloc}" if parsed.netloc else None,
+        updated=fields.get('updated') or str(payload.get('timestamp', '')),
+        changed_fields=changed_fields,
+    )
+
+
+def _site(url: str) -> str:
+    parsed = urlparse(url.strip())
+    return f"{parsed.scheme.lower()}://{parsed.netloc.lower()}"
+
+
+def allowed_base_url(base_url: str, allowed: List[Optional[str]]) -> Optional[str]:
+    """The configured Jira site a webhook's issue URL points at, or None if it is not one we send the API token to"""
+    for url in allowed:
+        if url and _site(url) == _site(base_url):
+            return url.rstrip('/')
+    return None
+
+
+def skip_reason(
+    issue: WebhookIssue,
+    project_keys: List[str] = WEBHOOK_PROJECT_KEYS,
+    issue_types: List[str] = WEBHOOK_ISSUE_TYPES,
+) -> Optional[str]:
+    """Why an issue event should not trigger generation, or None to generate"""
+    if project_keys and issue.project_key not in project_keys:
+        return f"project {issue.project_key} not watched"
+    if issue_types and issue.issue_type.lower() not in issue_types:
+        return f"issue type {issue.issue_type or 'unknown'} not watched"
+    if issue.event == 'jira:issue_updated' and issue.changed_fields is not None:
+        if not GENERATION_FIELDS.intersection(issue.changed_fields):
+            return "no description or summary change"
+    return None
+
+
+class Debouncer:
+    """Run an async callback once per key after events for that key stop arriving
+
+    Each event pushes the deadline out by ``delay``, capped at ``max_delay``
+    after the first pending event so a constantly edited issue still runs.
+    The latest event's argument wins.
+    """
+
+    def __init__(
+        self,
+        callback: Callable[[str, Any], Awaitable[None]],
+        delay: float = WEBHOOK_DEBOUNCE_SECONDS,
+        max_delay: float = WEBHOOK_DEBOUNCE_MAX_SECONDS,
+    ):
+        self.callback = callback
+        self.delay = delay
+        self.max_delay = max(max_delay, delay)
+        self.coalesced = 0
+        self._pending: Dict[str, Tuple[asyncio.TimerHandle, float, Any]] = {}
+        self._running: Set[asyncio.Task] = set()
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def schedule(self, key: str, value: Any) -> float:
+        """Schedule (or push back) the callback for a key; returns the seconds until it runs"""
+        now = time.monotonic()
+        first_seen = now
+        if key in self._pending:
+            handle, first_seen, _ = self._pending[key]
+            handle.cancel()
+            self.coalesced += 1
+        run_at = min(now + self.delay, first_seen + self.max_delay)
+        handle = asyncio.get_running_loop().call_later(run_at - now, self._fire, key)
+        self._pending[key] = (handle, first_seen, value)
+        return run_at - now
+
+    def _fire(self, key: str) -> None:
+        _, _, value = self._pending.pop(key)
+        task = asyncio.create_task(self._run(key, value))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run(self, key: str, value: Any) -> None:
+        try:
+            await self.callback(key, value)
+        except Exception as e:
+            logger.error(f"Debounced callback for {key} failed: {e}")
+
+    def cancel_all(self) -> int:
+        """Drop pending events on shutdown; returns how many were dropped"""
+        dropped = len(self._pending)
+        for handle, _, _ in self._pending.values():
+            handle.cancel()
+        self._pending.clear()
+        return dropped
@@ -38,6 +38,7 @@ function App() {
   const [success, setSuccess] = useState(null);
   const [issueData, setIssueData] = useState(null);
   const [testCasesData, setTestCasesData] = useState(null);
+  const [lastGeneratedUrl, setLastGeneratedUrl] = useState(null);
 
   // Check API health and configuration on component mount
   useEffect(() => {
@@ -92,23 +93,82 @@ function App() {
     }
   };
 
-  const handleGenerateTestCases = async (url) => {
+  const handleGenerateTestCases = async (url, forceRegenerate = false) => {
     setLoading(true);
     setError(null);
     setTestCasesData(null);
 
-    try {
-      const response = await apiService.generateTestCases(url);
+    let failed = false;
+    let cached = false;
+    let updated = false;
+
+    // Append each streamed test case to the suite shown so far
+    const appendTestCase = (prev, testCase) => {
+      const testSuite = prev.test_cases.test_suite;
+      const testCases = [...testSuite.test_cases, testCase];
+      return {
+        ...prev,
+        test_cases: {
+          test_suite: { ...testSuite, test_cases: testCases, total_test_cases: testCases.length },
+        },
+      };
+    };
 
-      if (response.data.error) {
-        setError(response.data.error);
-      } else {
-        setIssueData(response.data);
-        setTestCasesData(response.data);
-        setSuccess('Test cases generated successfully!');
+    try {
+      await apiService.streamTestCases(url, forceRegenerate, (event, data) => {
+        switch (event) {
+          case 'issue':
+            setIssueData(data);
+            setTestCasesData({
+              ...data,
+              streaming: true,
+              test_cases: { test_suite: { test_cases: [], total_test_cases: 0 } },
+            });
+            break;
+          case 'changes':
+            // The previous suite was updated for an edited description
+            updated = true;
+            setTestCasesData((prev) => (prev ? { ...prev, changes: data } : prev));
+            break;
+          case 'test_case':
+            setTestCasesData((prev) => (prev ? appendTestCase(prev, data) : prev));
+            break;
+          case 'complete':
+            cached = data.cached;
+            setTestCasesData((prev) => ({
+              ...prev,
+              test_cases: data.test_cases,
+              cached: data.cached,
+              changes: data.changes || null,
+              similar_issue: data.similar_issue || null,
+              similarity: data.similarity ?? null,
+              streaming: false,
+            }));
+            setLastGeneratedUrl(url);
+            break;
+          case 'error':
+            failed = true;
+            setError(data.error);
+            setTestCasesData((prev) =>
+              prev && prev.test_cases.test_suite.test_cases.length > 0 ? { ...prev, streaming: false } : null
+            );
+            break;
+          default:
+            break;
+        }
+      });
+
+      if (!failed) {
+        if (cached) {
+          setSuccess('Loaded previously generated test cases');
+        } else if (updated) {
+          setSuccess('Test cases updated for the edited description');
+        } else {
+          setSuccess('Test cases generated successfully!');
+        }
       }
     } catch (error) {
-      setError(error.response?.data?.detail || error.message || 'Failed to generate test cases');
+      setError(error.message || 'Failed to generate test cases');
     } finally {
       setLoading(false);
     }
@@ -140,7 +200,11 @@ function App() {
           )}
 
           {testCasesData && (
-            <TestCasesDisplay testCasesData={testCasesData} />
+            <TestCasesDisplay
+              testCasesData={testCasesData}
+              onRegenerate={() => handleGenerateTestCases(lastGeneratedUrl, true)}
+              loading={loading}
+            />
           )}
         </Container>
 
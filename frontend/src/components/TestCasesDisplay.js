@@ -16,16 +16,31 @@ import {
   Divider,
   Button,
   Alert,
+  LinearProgress,
+  Menu,
+  MenuItem,
 } from '@mui/material';
 import {
   ExpandMore as ExpandMoreIcon,
   BugReport as BugReportIcon,
   Schedule as ScheduleIcon,
   Download as DownloadIcon,
+  Refresh as RefreshIcon,
+  FileDownload as FileDownloadIcon,
 } from '@mui/icons-material';
+import { apiService } from '../services/api';
 
-const TestCasesDisplay = ({ testCasesData }) => {
+const EXPORT_FORMATS = [
+  { format: 'csv', label: 'CSV' },
+  { format: 'xray', label: 'Xray JSON' },
+  { format: 'zephyr', label: 'Zephyr Scale JSON' },
+  { format: 'testrail', label: 'TestRail XML' },
+  { format: 'jsonl', label: 'JSON Lines' },
+];
+
+const TestCasesDisplay = ({ testCasesData, onRegenerate, loading }) => {
   const [expandedTestCase, setExpandedTestCase] = useState(false);
+  const [exportAnchor, setExportAnchor] = useState(null);
 
   if (!testCasesData || !testCasesData.test_cases) {
     return null;
@@ -75,6 +90,15 @@ const TestCasesDisplay = ({ testCasesData }) => {
     linkElement.click();
   };
 
+  // Export every cached suite of the issue's project, streamed by the backend
+  const projectKey = testCasesData.issue_key?.split('-')[0];
+  const handleProjectExport = (format) => {
+    setExportAnchor(null);
+    const linkElement = document.createElement('a');
+    linkElement.setAttribute('href', apiService.exportUrl({ format, project: projectKey }));
+    linkElement.click();
+  };
+
   return (
     <Paper elevation={2} sx={{ p: 3 }}>
       <Box sx={{ display: 'flex', justifyContent: 'space-between', alignItems: 'center', mb: 2 }}>
@@ -82,23 +106,68 @@ const TestCasesDisplay = ({ testCasesData }) => {
           <BugReportIcon sx={{ mr: 1, verticalAlign: 'middle' }} />
           Generated Test Cases
         </Typography>
-        <Button
-          variant="outlined"
-          startIcon={<DownloadIcon />}
-          onClick={handleDownload}
-          size="small"
-        >
-          Download JSON
-        </Button>
+        <Box sx={{ display: 'flex', gap: 1 }}>
+          {onRegenerate && (
+            <Button
+              variant="outlined"
+              startIcon={<RefreshIcon />}
+              onClick={onRegenerate}
+              disabled={loading}
+              size="small"
+            >
+              Regenerate
+            </Button>
+          )}
+          <Button
+            variant="outlined"
+            startIcon={<DownloadIcon />}
+            onClick={handleDownload}
+            size="small"
+          >
+            Download JSON
+          </Button>
+          {projectKey && (
+            <>
+              <Button
+                variant="outlined"
+                startIcon={<FileDownloadIcon />}
+                onClick={(event) => setExportAnchor(event.currentTarget)}
+                size="small"
+              >
+                Export {projectKey}
+              </Button>
+              <Menu
+                anchorEl={exportAnchor}
+                open={Boolean(exportAnchor)}
+                onClose={() => setExportAnchor(null)}
+              >
+                {EXPORT_FORMATS.map(({ format, label }) => (
+                  <MenuItem key={format} onClick={() => handleProjectExport(format)}>
+                    {label}
+                  </MenuItem>
+                ))}
+              </Menu>
+            </>
+          )}
+        </Box>
       </Box>
 
+      {testCasesData.streaming && (
+        <Box sx={{ mb: 2 }}>
+          <LinearProgress />
+          <Typography variant="body2" color="text.secondary" sx={{ mt: 1 }}>
+            Generating test cases... {test_suite?.test_cases?.length || 0} received so far
+          </Typography>
+        </Box>
+      )}
+
       {test_suite && (
         <>
           {/* Test Suite Overview */}
           <Card variant="outlined" sx={{ mb: 3 }}>
             <CardContent>
               <Typography variant="h6" gutterBottom>
-                {test_suite.suite_name}
+                {test_suite.suite_name || 'Generating test suite...'}
               </Typography>
               <Typography variant="body2" color="text.secondary" sx={{ mb: 2 }}>
                 {test_suite.suite_description}
@@ -114,6 +183,30 @@ const TestCasesDisplay = ({ testCasesData }) => {
                   color="secondary"
                   size="small"
                 />
+                {testCasesData.cached && (
+                  <Chip
+                    label="Cached"
+                    color="default"
+                    size="small"
+                    variant="outlined"
+                  />
+                )}
+                {testCasesData.similar_issue && (
+                  <Chip
+                    label={`${testCasesData.changes ? 'Adapted' : 'Reused'} from ${testCasesData.similar_issue} (${Math.round(testCasesData.similarity * 100)}% similar)`}
+                    color="info"
+                    size="small"
+                    variant="outlined"
+                  />
+                )}
+                {testCasesData.changes && (
+                  <Chip
+                    label={`Updated: ${testCasesData.changes.added.length} added, ${testCasesData.changes.modified.length} modified, ${testCasesData.changes.retired.length} retired`}
+                    color="info"
+                    size="small"
+                    variant="outlined"
+                  />
+                )}
               </Box>
             </CardContent>
           </Card>
@@ -243,7 +336,7 @@ const TestCasesDisplay = ({ testCasesData }) => {
                 </AccordionDetails>
               </Accordion>
             ))
-          ) : (
+          ) : !testCasesData.streaming && (
             <Alert severity="info">
               No test cases were generated. Please check the Jira issue description.
             </Alert>
@@ -31,6 +31,38 @@ api.interceptors.response.use(
   }
 );
 
+// Read a Server-Sent Events stream, calling onEvent(event, data) for each event
+const readEventStream = async (response, onEvent) => {
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary;
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const rawEvent = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+
+      let event = 'message';
+      const dataLines = [];
+      rawEvent.split('\n').forEach((line) => {
+        if (line.startsWith('event:')) {
+          event = line.slice(6).trim();
+        } else if (line.startsWith('data:')) {
+          dataLines.push(line.slice(5).trim());
+        }
+      });
+      if (dataLines.length > 0) {
+        onEvent(event, JSON.parse(dataLines.join('\n')));
+      }
+    }
+  }
+};
+
 // API service functions
 export const apiService = {
   // Health check
@@ -48,8 +80,32 @@ export const apiService = {
   // Parse Jira URL with custom auth
   parseJiraUrlWithAuth: (url, authToken) => api.post('/parse-with-auth', { url, auth_token: authToken }),
   
-  // Generate test cases
-  generateTestCases: (url) => api.post('/generate-test-cases', { url }),
+  // Generate test cases (served from the suite cache unless forceRegenerate is set)
+  generateTestCases: (url, forceRegenerate = false) =>
+    api.post('/generate-test-cases', { url, force_regenerate: forceRegenerate }),
+
+  // Queue a background generation job and poll its status
+  submitGenerationJob: (url, forceRegenerate = false) =>
+    api.post('/jobs', { url, force_regenerate: forceRegenerate }),
+  getGenerationJob: (jobId) => api.get(`/jobs/${jobId}`),
+
+  // URL of a server-side export; the browser streams it straight to disk
+  exportUrl: (params) => `${api.defaults.baseURL}/export?${new URLSearchParams(params)}`,
+
+  // Stream test cases as they are generated (axios cannot read streamed responses)
+  streamTestCases: async (url, forceRegenerate = false, onEvent) => {
+    console.log('Making POST request to: /generate-test-cases/stream');
+    const response = await fetch(`${api.defaults.baseURL}/generate-test-cases/stream`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ url, force_regenerate: forceRegenerate }),
+    });
+    if (!response.ok) {
+      const body = await response.json().catch(() => ({}));
+      throw new Error(body.detail || `Request failed with status ${response.status}`);
+    }
+    await readEventStream(response, onEvent);
+  },
 };
 
 export default api;
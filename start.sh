@@ -70,9 +70,14 @@ if [ ! -f ".env" ]; then
     exit 1
 fi
 
-# Start backend in background
+# Start backend in background (gunicorn runs WEB_CONCURRENCY worker processes, default 1)
 echo "🚀 Starting backend server on http://localhost:8000..."
-python main.py &
+if command_exists gunicorn; then
+    gunicorn -c gunicorn.conf.py main:app &
+else
+    echo "⚠️  gunicorn not found, starting a single worker process with python main.py"
+    python main.py &
+fi
 BACKEND_PID=$!
 
 # Wait a moment for backend to start